@@ -0,0 +1,94 @@
+"""
+Vercel Serverless Function: Agent Context
+
+Endpoint: GET /api/agent-context?wallet_address=r...&conversation_id=abc
+Optional: fields=permitted,products (parts of the document to return)
+Headers: Authorization: Bearer <access_token> (optional)
+         If-None-Match: <etag> (optional, answers 304 when unchanged)
+         Accept-Encoding: gzip, br (optional)
+Returns: {"permitted": [{"key": "...", "name": "..."}],
+          "resources": {key: [...]}, "products": {key: [{"id", "name", "price_xrp"}]}}
+
+Compact, cacheable alternative to /api/check-trustline for the Dify agent.
+Add refresh=1 to force a new ledger check for the conversation.
+"""
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+from src.xrpl_client import XRPLClient, validate_address
+from src.access_control import AccessControl
+from src.access_tokens import get_signer, token_from_request
+from src.agent_context import get_cache
+from src.http_utils import send_body, send_error, send_json
+from src.profiling import profiled
+
+
+class handler(BaseHTTPRequestHandler):
+    @profiled
+    def do_GET(self):
+        try:
+            parsed_url = urlparse(self.path)
+            query_params = parse_qs(parsed_url.query)
+            
+            wallet_address = query_params.get('wallet_address', [None])[0]
+            conversation_id = query_params.get('conversation_id', [''])[0]
+            refresh = query_params.get('refresh', ['0'])[0] == '1'
+            
+            if not wallet_address:
+                send_json(self, {'error': 'wallet_address parameter required'}, status=400)
+                return
+            
+            validate_address(wallet_address)
+            
+            cache = get_cache()
+            cached = None if refresh else cache.get_issuer_keys(wallet_address, conversation_id)
+            
+            if cached is None:
+                token = token_from_request(self.headers, query_params)
+                grant = get_signer().verify(token, wallet_address) if token else None
+                if grant is not None:
+                    cached = (tuple(grant["i"]), grant["l"])
+                else:
+                    state = AccessControl(XRPLClient(testnet=True)).get_opt_in_state(wallet_address)
+                    cached = (tuple(state["opted_in_issuer_keys"]), state["ledger_index"])
+                cache.put_issuer_keys(wallet_address, conversation_id, cached[0], cached[1])
+            
+            issuer_keys, ledger_index = cached
+            body, etag = cache.get_document(issuer_keys, query_params.get('fields', [None])[0])
+            headers = self._cache_headers(etag, ledger_index)
+            
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+            
+            send_body(self, body, headers=headers)
+            
+        except Exception as e:
+            send_error(self, e)
+    
+    def _cache_headers(self, etag, ledger_index):
+        headers = {
+            'Access-Control-Expose-Headers': 'ETag, X-Ledger-Index',
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={settings.AGENT_CONTEXT_TTL_SECONDS}',
+            'Vary': 'Authorization'
+        }
+        if ledger_index is not None:
+            headers['X-Ledger-Index'] = str(ledger_index)
+        return headers
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match')
+        self.end_headers()
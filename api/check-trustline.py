@@ -2,8 +2,13 @@
 Vercel Serverless Function: Check Trustline Status
 
 Endpoint: POST /api/check-trustline
-Body: {"wallet_address": "r..."}
-Returns: {"opted_in": bool, "opted_in_issuers": [...], "allowed_resources": [...]}
+Body: {"wallet_address": "r...", "fields": "opted_in,access_token" (optional, or ?fields=)}
+Returns: {"opted_in": bool, "opted_in_issuers": [...], "opted_in_issuer_keys": [...],
+          "allowed_resources": [...], "ledger_index": N, "stale": bool,
+          "access_token": "..." (when opted in and not stale)}
+
+When rippled misses GATE_DEADLINE_SECONDS the last known decision is returned
+with "stale": true and "stale_age_seconds" while the lookup finishes in the background.
 """
 from http.server import BaseHTTPRequestHandler
 import json
@@ -13,19 +18,19 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.xrpl_client import XRPLClient
+from src.xrpl_client import XRPLClient, validate_address
+from src.access_control import AccessControl
+from src.access_tokens import get_signer
+from src.groups import watch_gate_lookups
+from src.http_utils import send_error, send_json
+from src.profiling import profiled
+from config import settings
 from config.issuers import VERIFIED_ISSUERS
 
 
 class handler(BaseHTTPRequestHandler):
+    @profiled
     def do_POST(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
@@ -34,66 +39,70 @@ class handler(BaseHTTPRequestHandler):
             user_address = data.get('wallet_address')
             
             if not user_address:
-                self.wfile.write(json.dumps({'error': 'wallet_address required'}).encode())
+                send_json(self, {'error': 'wallet_address required'}, status=400, methods='POST, OPTIONS')
                 return
             
+            # Checked locally so typos and junk never reach rippled
+            validate_address(user_address)
+            
+            # Fresh lookups below also update the wallet's group access matrices
+            watch_gate_lookups()
+            
             # Initialize XRPL client
             xrpl_client = XRPLClient(testnet=True)
+            access_control = AccessControl(xrpl_client)
             
-            # Check all required issuers
-            required_issuers = [
-                issuer for issuer in VERIFIED_ISSUERS.values() 
-                if issuer.get("is_required", False)
-            ]
+            # Check all required issuers against a single validated ledger snapshot
+            state = access_control.get_opt_in_state(user_address, budget=settings.GATE_DEADLINE_SECONDS)
+            opted_in_keys = state["opted_in_issuer_keys"]
             
             opted_in_issuers = []
             allowed_resources = []
             
-            for issuer in required_issuers:
-                has_tl = xrpl_client.has_trustline(
-                    user_address,
-                    issuer["address"],
-                    issuer["currency"]
-                )
-                
-                if has_tl:
-                    opted_in_issuers.append(issuer["name"])
-                    allowed_resources.extend(issuer.get("resources", []))
+            for key in opted_in_keys:
+                issuer = VERIFIED_ISSUERS[key]
+                opted_in_issuers.append(issuer["name"])
+                allowed_resources.extend(issuer.get("resources", []))
             
             opted_in = len(opted_in_issuers) > 0
             
             # Determine primary issuer for products URL (use first opted-in issuer or community_aid)
-            primary_issuer_key = None
-            if opted_in_issuers:
-                # Find the issuer key for the first opted-in issuer
-                for key, issuer in VERIFIED_ISSUERS.items():
-                    if issuer["name"] == opted_in_issuers[0]:
-                        primary_issuer_key = key
-                        break
-            
-            # Default to community_aid if no match found
-            if not primary_issuer_key:
-                primary_issuer_key = "community_aid"
+            primary_issuer_key = opted_in_keys[0] if opted_in_keys else "community_aid"
             
             response = {
                 'opted_in': opted_in,
                 'opted_in_issuers': opted_in_issuers,
+                'opted_in_issuer_keys': opted_in_keys,
                 'allowed_resources': allowed_resources,
                 'wallet_address': user_address,
-                'products_url': f'/ui/products.html?issuer={primary_issuer_key}' if opted_in else None
+                'products_url': f'/ui/products.html?issuer={primary_issuer_key}' if opted_in else None,
+                'ledger_index': state["ledger_index"],
+                'stale': state["stale"]
             }
+            if state["stale"]:
+                response['stale_age_seconds'] = state["age_seconds"]
+            
+            # Signed grant lets gated endpoints skip the ledger lookup until it expires
+            # (not issued from a stale decision, which would extend its life)
+            if opted_in and not state["stale"]:
+                grant = get_signer().issue(user_address, opted_in_keys, state["ledger_index"])
+                response['access_token'] = grant["token"]
+                response['access_token_expires_at'] = grant["expires_at"]
             
-            self.wfile.write(json.dumps(response).encode())
+            # Sparse fieldset from the body (string or list) or the query string
+            fields = data.get('fields')
+            if isinstance(fields, list):
+                fields = ','.join(str(field) for field in fields)
+            send_json(self, response, methods='POST, OPTIONS', fields=fields)
             
         except Exception as e:
-            error_response = {'error': str(e)}
-            self.wfile.write(json.dumps(error_response).encode())
+            send_error(self, e, methods='POST, OPTIONS')
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
 
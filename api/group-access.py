@@ -0,0 +1,146 @@
+"""
+Vercel Serverless Function: Group Access Matrix
+
+Endpoint: GET /api/group-access?group=family-smith
+Headers: Authorization: Bearer <manage_token> (from creating the group)
+         If-None-Match: <etag> (optional, answers 304 when unchanged)
+Optional: fields=members,bits,stride (parts of the document to return)
+Returns: {"group": "...", "issuers": [issuer keys], "members": [wallets],
+          "member_count": N, "stride": bytes per member, "bits": base64,
+          "opted_in_counts": {issuer_key: N}, "ledger_index": N, "synced_ledger": N}
+
+Member i has opted into issuer j when byte i * stride + j // 8 of the decoded
+bits has bit j % 8 (least significant first) set. One read covers the whole
+group; the matrix is maintained incrementally (see src/groups.py).
+
+Endpoint: POST /api/group-access
+Body: {"action": "create", "group": "family-smith", "wallets": ["r...", ...]}
+      {"action": "add" | "remove", "group": "...", "wallets": [...]}  (with Authorization)
+      {"action": "delete", "group": "..."}  (with Authorization)
+Returns: {"group": "...", "member_count": N, ...}; create also returns the
+         "manage_token", shown only once
+"""
+from http.server import BaseHTTPRequestHandler
+import json
+import sys
+import os
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.xrpl_client import XRPLClient
+from src.access_tokens import token_from_request
+from src.groups import get_group_store, validate_group_name
+from src.http_utils import requested_fields, send_body, send_error, send_json
+from src.profiling import profiled
+
+
+def _wallets(data):
+    wallets = data.get('wallets', [])
+    if not isinstance(wallets, list) or not all(isinstance(wallet, str) for wallet in wallets):
+        raise ValueError('wallets must be a list of addresses')
+    return wallets
+
+
+class handler(BaseHTTPRequestHandler):
+    @profiled
+    def do_GET(self):
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+
+            name = query_params.get('group', [None])[0]
+            if not name:
+                send_json(self, {'error': 'group parameter required'}, status=400)
+                return
+
+            group = self._authorize(name)
+            if group is None:
+                return
+
+            body, etag = get_group_store().get_view(group, XRPLClient(testnet=True), requested_fields(self))
+            headers = {
+                'Access-Control-Expose-Headers': 'ETag',
+                'ETag': etag,
+                'Cache-Control': 'private, no-cache',
+                'Vary': 'Authorization'
+            }
+
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.end_headers()
+                return
+
+            send_body(self, body, headers=headers)
+
+        except Exception as e:
+            send_error(self, e)
+
+    @profiled
+    def do_POST(self):
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+
+            action = data.get('action')
+            name = data.get('group')
+            validate_group_name(name)
+            store = get_group_store()
+
+            if action == 'create':
+                token = store.create_group(name, _wallets(data), XRPLClient(testnet=True))
+                group = store.groups[name]
+                send_json(self, {
+                    'group': name,
+                    'manage_token': token,
+                    'member_count': len(group.matrix),
+                    'ledger_index': group.matrix.ledger_index()
+                }, status=201, methods='GET, POST, OPTIONS')
+                return
+
+            if action not in ('add', 'remove', 'delete'):
+                send_json(self, {'error': 'action must be create, add, remove or delete'},
+                          status=400, methods='GET, POST, OPTIONS')
+                return
+
+            group = self._authorize(name, methods='GET, POST, OPTIONS')
+            if group is None:
+                return
+
+            if action == 'delete':
+                store.delete_group(group)
+                send_json(self, {'group': name, 'deleted': True}, methods='GET, POST, OPTIONS')
+                return
+
+            if action == 'add':
+                response = {'added': store.add_members(group, _wallets(data), XRPLClient(testnet=True))}
+            else:
+                response = {'removed': store.remove_members(group, _wallets(data))}
+            response['group'] = name
+            response['member_count'] = len(store.groups[name].matrix)
+            send_json(self, response, methods='GET, POST, OPTIONS')
+
+        except Exception as e:
+            send_error(self, e, methods='GET, POST, OPTIONS')
+
+    def _authorize(self, name, methods='GET, OPTIONS'):
+        """The group the request's manage token opens (None after answering 401/404)"""
+        token = token_from_request(self.headers)
+        if not token:
+            send_json(self, {'error': 'Manage token required'}, status=401, methods=methods,
+                      headers={'WWW-Authenticate': 'Bearer'})
+            return None
+        group = get_group_store().authorize(name, token)
+        if group is None:
+            # Same answer for a wrong token, so group names can't be probed
+            send_json(self, {'error': 'Group not found'}, status=404, methods=methods)
+        return group
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match')
+        self.end_headers()
@@ -0,0 +1,75 @@
+"""
+Vercel Serverless Function: Search Guidance Content
+
+Endpoint: GET /api/guidance-search?wallet_address=r...&q=budgeting&limit=5
+Headers: Authorization: Bearer <access_token> (optional, from /api/check-trustline)
+Returns: {"results": [{"issuer": "...", "score": ..., "text": "..."}], ...}
+
+Only guidance from issuers the wallet has trustlines to is searched.
+"""
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.xrpl_client import XRPLClient, validate_address
+from src.access_control import AccessControl
+from src.access_tokens import token_from_request
+from src.guidance_index import get_index
+from src.http_utils import send_error, send_json
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            parsed_url = urlparse(self.path)
+            query_params = parse_qs(parsed_url.query)
+            
+            wallet_address = query_params.get('wallet_address', [None])[0]
+            query = query_params.get('q', [''])[0]
+            limit = min(int(query_params.get('limit', ['5'])[0]), 20)
+            
+            if not wallet_address:
+                send_json(self, {'error': 'wallet_address parameter required'}, status=400)
+                return
+            
+            if not query.strip():
+                send_json(self, {'error': 'q parameter required'}, status=400)
+                return
+            
+            validate_address(wallet_address)
+            
+            # Restrict the search to partitions of issuers the wallet opted into
+            access_control = AccessControl(XRPLClient(testnet=True))
+            issuer_keys = access_control.resolve_opted_in_issuers(
+                wallet_address,
+                token_from_request(self.headers, query_params)
+            )
+            
+            if not issuer_keys:
+                send_json(self, {
+                    'error': 'Trustline required',
+                    'message': 'Please opt in to a guidance issuer first',
+                    'opt_in_url': '/ui/opt-in.html?issuer=community_aid'
+                }, status=403)
+                return
+            
+            response = {
+                'wallet_address': wallet_address,
+                'searched_issuers': issuer_keys,
+                'results': get_index().search(query, issuer_keys, limit)
+            }
+            
+            send_json(self, response)
+            
+        except Exception as e:
+            send_error(self, e)
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
@@ -2,10 +2,10 @@
 Vercel Serverless Function: Get Issuer Information
 
 Endpoint: GET /api/issuer-info/{issuer_key}
+Optional: fields=name,description
 Returns: {"name": "...", "address": "...", "currency": "...", "description": "..."}
 """
 from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 from urllib.parse import urlparse, parse_qs
@@ -14,19 +14,15 @@ from urllib.parse import urlparse, parse_qs
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from config.issuers import get_issuer_by_key
+from src.http_utils import send_error, send_json
 
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         try:
             # Extract issuer key from path
             # Path format: /api/issuer-info/community_aid
-            path = self.path
+            path = urlparse(self.path).path
             path_parts = [p for p in path.split('/') if p]
             
             # Find issuer-info in path and get next part
@@ -43,13 +39,13 @@ class handler(BaseHTTPRequestHandler):
                 issuer_key = query_params.get('issuer', [None])[0]
             
             if not issuer_key:
-                self.wfile.write(json.dumps({'error': 'Issuer key required in path or query'}).encode())
+                send_json(self, {'error': 'Issuer key required in path or query'}, status=400)
                 return
             
             issuer = get_issuer_by_key(issuer_key)
             
             if not issuer:
-                self.wfile.write(json.dumps({'error': f'Issuer "{issuer_key}" not found'}).encode())
+                send_json(self, {'error': f'Issuer "{issuer_key}" not found'}, status=404)
                 return
             
             response = {
@@ -59,9 +55,7 @@ class handler(BaseHTTPRequestHandler):
                 'description': issuer['description']
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            send_json(self, response)
             
         except Exception as e:
-            error_response = {'error': str(e)}
-            self.wfile.write(json.dumps(error_response).encode())
-
+            send_error(self, e)
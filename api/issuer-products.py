@@ -1,28 +1,38 @@
 """
 Vercel Serverless Function: Get Issuer Products
 Endpoint: GET /api/issuer-products?issuer=community_aid&wallet_address=r...
-Returns: List of products if user has trustline
+Optional: type=guide  min_price=0  max_price=10  sort=catalog|price|-price|name|-name
+          limit=50 (max 100)  cursor=<next_cursor from the previous page>
+          fields=products.id,products.price_xrp,next_cursor (parts of the response to return)
+Headers: Authorization: Bearer <access_token> (optional, from /api/check-trustline)
+Returns: One page of products if user has trustline, with total and next_cursor
+         ("stale": true when the trustline decision is a last known one because
+         rippled missed GATE_DEADLINE_SECONDS)
 """
 from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 from urllib.parse import parse_qs, urlparse
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.xrpl_client import XRPLClient
+from src.xrpl_client import XRPLClient, validate_address
+from src.access_tokens import get_signer, token_from_request
+from src.latency_budget import get_trustline_decision
+from src.http_utils import send_error, send_json
+from src.profiling import profiled
+from src.catalog import DEFAULT_PAGE_SIZE, get_catalog
 from config.issuers import VERIFIED_ISSUERS
 
+
+def _optional_float(query_params, name):
+    value = query_params.get(name, [None])[0]
+    return float(value) if value not in (None, '') else None
+
+
 class handler(BaseHTTPRequestHandler):
+    @profiled
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
         try:
             # Parse query parameters
             parsed_url = urlparse(self.path)
@@ -32,54 +42,70 @@ class handler(BaseHTTPRequestHandler):
             wallet_address = query_params.get('wallet_address', [None])[0]
             
             if not issuer_key:
-                self.wfile.write(json.dumps({'error': 'issuer parameter required'}).encode())
+                send_json(self, {'error': 'issuer parameter required'}, status=400)
                 return
             
             if not wallet_address:
-                self.wfile.write(json.dumps({'error': 'wallet_address parameter required'}).encode())
+                send_json(self, {'error': 'wallet_address parameter required'}, status=400)
                 return
             
+            # Checked locally so typos and junk never reach rippled
+            validate_address(wallet_address)
+            
             # Get issuer config
             issuer = VERIFIED_ISSUERS.get(issuer_key)
             if not issuer:
-                self.wfile.write(json.dumps({'error': 'Issuer not found'}).encode())
+                send_json(self, {'error': 'Issuer not found'}, status=404)
                 return
             
-            # Check trustline
-            xrpl_client = XRPLClient(testnet=True)
-            has_trustline = xrpl_client.has_trustline(
-                wallet_address,
-                issuer["address"],
-                issuer["currency"]
-            )
+            # A valid signed grant proves the trustline without a ledger lookup;
+            # expired, revoked or missing grants fall back to checking the ledger
+            token = token_from_request(self.headers, query_params)
+            has_trustline = get_signer().verify(token, wallet_address, issuer_key) is not None
+            stale = False
             
             if not has_trustline:
-                self.wfile.write(json.dumps({
+                xrpl_client = XRPLClient(testnet=True)
+                decision = get_trustline_decision(xrpl_client, wallet_address, [issuer])
+                has_trustline = decision["lines"][issuer["key"]]
+                stale = decision["stale"]
+            
+            if not has_trustline:
+                send_json(self, {
                     'error': 'Trustline required',
                     'message': f'Please create a trustline to {issuer["name"]} first',
                     'opt_in_url': f'/ui/opt-in.html?issuer={issuer_key}'
-                }).encode())
+                }, status=403)
                 return
             
-            # Return products
-            products = issuer.get("products", [])
+            # Return one page from the prebuilt catalog index
+            page = get_catalog().get_index(issuer_key).query(
+                product_type=query_params.get('type', [None])[0] or None,
+                min_price=_optional_float(query_params, 'min_price'),
+                max_price=_optional_float(query_params, 'max_price'),
+                sort=query_params.get('sort', ['catalog'])[0],
+                limit=int(query_params.get('limit', [DEFAULT_PAGE_SIZE])[0]),
+                cursor=query_params.get('cursor', [None])[0]
+            )
             response = {
                 'issuer': issuer["name"],
                 'issuer_address': issuer["address"],
                 'has_access': True,
-                'products': products,
-                'wallet_address': wallet_address
+                'products': page["products"],
+                'total': page["total"],
+                'next_cursor': page["next_cursor"],
+                'wallet_address': wallet_address,
+                'stale': stale
             }
             
-            self.wfile.write(json.dumps(response).encode())
+            send_json(self, response)
             
         except Exception as e:
-            error_response = {'error': str(e)}
-            self.wfile.write(json.dumps(error_response).encode())
+            send_error(self, e)
     
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
@@ -0,0 +1,66 @@
+"""
+Vercel Serverless Function: Issuer Analytics
+
+Endpoint: GET /api/issuer-stats?issuer=community_aid
+Optional: days=30 (max 366)  end=YYYY-MM-DD (default today, UTC)  product=<product id>
+Returns: {"issuer": "...", "totals": {"opt_ins": N, "churn": N, "net_opt_ins": N,
+          "purchases": N, "revenue_xrp": "..."}, "daily": [...], "products": [...],
+          "as_of_ledger": N}
+
+Served from the materialized aggregates in ANALYTICS_PATH (see src/analytics.py);
+no ledger queries and no per-request scan of history.
+"""
+from http.server import BaseHTTPRequestHandler
+from datetime import datetime, timezone
+import sys
+import os
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.analytics import day_number, get_analytics
+from src.http_utils import send_error, send_json
+from config.issuers import VERIFIED_ISSUERS
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            query_params = parse_qs(urlparse(self.path).query)
+            
+            issuer_key = query_params.get('issuer', [None])[0]
+            if not issuer_key:
+                send_json(self, {'error': 'issuer parameter required'}, status=400)
+                return
+            
+            issuer = VERIFIED_ISSUERS.get(issuer_key)
+            if not issuer:
+                send_json(self, {'error': 'Issuer not found'}, status=404)
+                return
+            
+            days = int(query_params.get('days', ['30'])[0])
+            end = query_params.get('end', [None])[0]
+            end_day = None
+            if end:
+                end_date = datetime.strptime(end, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+                end_day = day_number(end_date.timestamp())
+            
+            stats = get_analytics().get_stats(
+                issuer["address"],
+                days=days,
+                end_day=end_day,
+                product_id=query_params.get('product', [None])[0] or None
+            )
+            response = {'issuer': issuer_key, 'issuer_name': issuer["name"], **stats}
+            
+            send_json(self, response, headers={'Cache-Control': 'public, max-age=60'})
+            
+        except Exception as e:
+            send_error(self, e)
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
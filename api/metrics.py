@@ -0,0 +1,43 @@
+"""
+Vercel Serverless Function: Upstream Metrics
+
+Endpoint: GET /api/metrics
+Returns: {"admission": {"queue_depth": N, "in_flight": N, "wait_ms_mean": ..., ...},
+          "cache": {"l1_hit_rate": ..., "l2_hit_rate": ..., ...},
+          "compression": {"compressed": N, "reused": N, "ratio": ..., ...},
+          "groups": {"groups": N, "events_applied": N, "bits_changed": N, ...}}
+
+Counters are per serverless instance and reset when the instance is recycled.
+"""
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.admission import get_admission
+from src.cache import get_trustline_cache
+from src.groups import get_group_store
+from src.http_utils import send_error, send_json
+from src.response_encoding import metrics as compression_metrics
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            metrics = {
+                'admission': get_admission().metrics(),
+                'cache': get_trustline_cache().metrics(),
+                'compression': compression_metrics(),
+                'groups': get_group_store().metrics()
+            }
+            send_json(self, metrics, headers={'Cache-Control': 'no-store'})
+        except Exception as e:
+            send_error(self, e)
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
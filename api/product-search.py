@@ -0,0 +1,75 @@
+"""
+Vercel Serverless Function: Search Products Across Issuers
+
+Endpoint: GET /api/product-search?wallet_address=r...&q=budget&type=toolkit&limit=20
+Headers: Authorization: Bearer <access_token> (optional, from /api/check-trustline)
+Returns: {"results": [{"issuer": "...", "score": ..., "product": {...}}], ...}
+
+Only catalogs of issuers the wallet has trustlines to are searched.
+"""
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.xrpl_client import XRPLClient, validate_address
+from src.access_control import AccessControl
+from src.access_tokens import token_from_request
+from src.catalog import MAX_PAGE_SIZE, get_catalog
+from src.http_utils import send_error, send_json
+from src.profiling import profiled
+
+
+class handler(BaseHTTPRequestHandler):
+    @profiled
+    def do_GET(self):
+        try:
+            parsed_url = urlparse(self.path)
+            query_params = parse_qs(parsed_url.query)
+            
+            wallet_address = query_params.get('wallet_address', [None])[0]
+            query = query_params.get('q', [''])[0]
+            product_type = query_params.get('type', [None])[0] or None
+            limit = min(int(query_params.get('limit', ['20'])[0]), MAX_PAGE_SIZE)
+            
+            if not wallet_address:
+                send_json(self, {'error': 'wallet_address parameter required'}, status=400)
+                return
+            
+            if not query.strip():
+                send_json(self, {'error': 'q parameter required'}, status=400)
+                return
+            
+            validate_address(wallet_address)
+            
+            access_control = AccessControl(XRPLClient(testnet=True))
+            issuer_keys = access_control.resolve_opted_in_issuers(
+                wallet_address,
+                token_from_request(self.headers, query_params)
+            )
+            
+            if not issuer_keys:
+                send_json(self, {
+                    'error': 'Trustline required',
+                    'message': 'Please opt in to an issuer first',
+                    'opt_in_url': '/ui/opt-in.html?issuer=community_aid'
+                }, status=403)
+                return
+            
+            send_json(self, {
+                'wallet_address': wallet_address,
+                'searched_issuers': issuer_keys,
+                'results': get_catalog().search(query, issuer_keys, product_type, limit)
+            })
+            
+        except Exception as e:
+            send_error(self, e)
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
@@ -0,0 +1,101 @@
+"""
+Vercel Serverless Function: Trustline Status Stream
+
+Endpoint: GET /api/trustline-events?wallet_address=r...
+Returns: text/event-stream of "status" events, each carrying
+         {"opted_in": bool, "opted_in_issuers": [...], "ledger_index": N, ...}
+
+The first event is the current state; later events are pushed when a validated
+ledger changes the wallet's trustlines. The stream ends after
+SSE_MAX_STREAM_SECONDS and EventSource reconnects automatically.
+"""
+from http.server import BaseHTTPRequestHandler
+import json
+import queue
+import sys
+import os
+import time
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+from src.access_tokens import get_signer
+from src.trustline_events import get_hub
+from src.http_utils import send_error, send_json
+from src.xrpl_client import validate_address
+
+
+class handler(BaseHTTPRequestHandler):
+    def _send_event(self, event, data):
+        payload = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        self.wfile.write(payload.encode())
+        self.wfile.flush()
+    
+    def _send_status(self, state):
+        event = dict(state)
+        # Attach a fresh grant so the page can go straight to gated endpoints
+        if state["opted_in"]:
+            grant = get_signer().issue(
+                state["wallet_address"],
+                state["opted_in_issuer_keys"],
+                state["ledger_index"]
+            )
+            event['access_token'] = grant["token"]
+            event['access_token_expires_at'] = grant["expires_at"]
+        self._send_event('status', event)
+    
+    def do_GET(self):
+        parsed_url = urlparse(self.path)
+        query_params = parse_qs(parsed_url.query)
+        wallet_address = query_params.get('wallet_address', [None])[0]
+        
+        if not wallet_address:
+            send_json(self, {'error': 'wallet_address parameter required'}, status=400)
+            return
+        
+        # Junk addresses must not reach the shared ledger subscription
+        try:
+            validate_address(wallet_address)
+        except ValueError as e:
+            send_error(self, e)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'keep-alive')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        hub = get_hub()
+        try:
+            # Subscribe before reading the current state so no transition is missed
+            client_queue = hub.subscribe(wallet_address)
+        except Exception as e:
+            self._send_event('error', {'error': str(e)})
+            return
+        
+        try:
+            self.wfile.write(b"retry: 2000\n\n")
+            self._send_status(hub.current_state(wallet_address))
+            
+            deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    state = client_queue.get(timeout=min(remaining, settings.SSE_HEARTBEAT_SECONDS))
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+                    continue
+                self._send_status(state)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            self._send_event('error', {'error': str(e)})
+        finally:
+            hub.unsubscribe(wallet_address, client_queue)
@@ -0,0 +1,235 @@
+"""
+Issuer Registry Loader
+
+Loads the issuer registry from a JSON data file instead of a Python literal so
+issuers can be added or changed without a redeploy.
+
+Layout:
+    config/issuers.json              {"version": N, "issuers": {key: descriptor}}
+    config/products/<issuer_key>.json  product list for one issuer (optional)
+
+Descriptors are indexed by key and by address for O(1) lookups. Product lists
+are only read when an issuer's products are requested. Both files are
+re-checked at most once per reload interval and reloaded when their
+modification time, size or version changes.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REGISTRY_PATH = os.path.join(CONFIG_DIR, "issuers.json")
+
+
+def _file_signature(path):
+    """Cheap change detector for a file: (mtime_ns, size), or None if missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class IssuerRegistry:
+    """Hot-reloadable issuer registry backed by a JSON file"""
+
+    def __init__(self, path=None, reload_interval=1.0, max_cached_catalogs=256):
+        """
+        Initialize issuer registry
+
+        Args:
+            path: Path to the registry JSON file
+            reload_interval: Minimum seconds between file change checks
+            max_cached_catalogs: Product lists kept in memory (least recently used evicted)
+        """
+        self.path = path or os.environ.get("ISSUER_REGISTRY_PATH") or DEFAULT_REGISTRY_PATH
+        self.products_dir = os.path.join(os.path.dirname(self.path), "products")
+        self.reload_interval = reload_interval
+        self.max_cached_catalogs = max_cached_catalogs
+
+        self._lock = threading.Lock()
+        self._signature = None
+        self._next_check = 0.0
+        self._products = OrderedDict()
+        self.version = None
+        self.generation = 0
+        self._by_key = {}
+        self._by_address = {}
+        self._required = []
+        self._optional = []
+
+    def _load(self, signature):
+        """Read the registry file and rebuild all indexes"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        by_key = {}
+        by_address = {}
+        required = []
+        optional = []
+        for key, issuer in data.get("issuers", {}).items():
+            issuer = dict(issuer, key=key)
+            by_key[key] = issuer
+            by_address[issuer["address"]] = issuer
+            if issuer.get("is_required", False):
+                required.append(issuer)
+            else:
+                optional.append(issuer)
+
+        # Swap in the new snapshot atomically; readers never see a half-built index
+        self._by_key = by_key
+        self._by_address = by_address
+        self._required = required
+        self._optional = optional
+        self._products = OrderedDict()
+        self._signature = signature
+        self.version = data.get("version")
+        self.generation += 1
+
+    def refresh(self, force=False):
+        """
+        Reload the registry if the file changed since the last load
+
+        Args:
+            force: Check the file even if the reload interval has not elapsed
+        """
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.reload_interval
+            signature = _file_signature(self.path)
+            if signature is not None and signature != self._signature:
+                self._load(signature)
+
+    def get(self, issuer_key):
+        """Get issuer descriptor by key (None if unknown)"""
+        self.refresh()
+        return self._by_key.get(issuer_key)
+
+    def get_by_address(self, address):
+        """Get issuer descriptor by XRPL address (None if unknown)"""
+        self.refresh()
+        return self._by_address.get(address)
+
+    def keys(self):
+        self.refresh()
+        return self._by_key.keys()
+
+    def required(self):
+        """Issuers whose trustline gates access"""
+        self.refresh()
+        return list(self._required)
+
+    def optional(self):
+        """Issuers whose trustline is informational only"""
+        self.refresh()
+        return list(self._optional)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._by_key)
+
+    def get_products(self, issuer_key):
+        """
+        Get an issuer's product list, loading it on first use
+
+        Args:
+            issuer_key: Issuer key
+
+        Returns:
+            List of product dictionaries (empty if the issuer has none)
+        """
+        self.refresh()
+        if issuer_key not in self._by_key:
+            return []
+
+        path = os.path.join(self.products_dir, f"{issuer_key}.json")
+        cached = self._products.get(issuer_key)
+        # cached = (file signature, products, monotonic time of next change check)
+        if cached is not None and time.monotonic() < cached[2]:
+            return cached[1]
+
+        signature = _file_signature(path)
+        if cached is not None and cached[0] == signature:
+            products = cached[1]
+        elif signature is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                products = json.load(f)
+        else:
+            products = []
+
+        with self._lock:
+            self._products[issuer_key] = (signature, products, time.monotonic() + self.reload_interval)
+            self._products.move_to_end(issuer_key)
+            while len(self._products) > self.max_cached_catalogs:
+                self._products.popitem(last=False)
+        return products
+
+    def catalog_signature(self, issuer_key):
+        """
+        Version of an issuer's product catalog (changes when its file is edited)
+
+        Returns:
+            File signature of the catalog as currently loaded, or None if the
+            issuer has no catalog file
+        """
+        self.get_products(issuer_key)
+        cached = self._products.get(issuer_key)
+        return cached[0] if cached is not None else None
+
+    def _write(self, data):
+        """Atomically replace the registry file"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+
+    def update_issuer(self, issuer_key, **fields):
+        """
+        Update fields of one issuer on disk and bump the registry version
+
+        Running processes pick the change up on their next reload check.
+
+        Args:
+            issuer_key: Issuer key
+            **fields: Descriptor fields to set (e.g. address="r...")
+        """
+        with self._lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["issuers"][issuer_key].update(fields)
+            data["version"] = int(data.get("version") or 0) + 1
+            self._write(data)
+        self.refresh(force=True)
+
+
+class IssuerMapping(Mapping):
+    """Read-only dict view of the registry (key -> issuer descriptor)"""
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def __getitem__(self, issuer_key):
+        issuer = self._registry.get(issuer_key)
+        if issuer is None:
+            raise KeyError(issuer_key)
+        return issuer
+
+    def get(self, issuer_key, default=None):
+        issuer = self._registry.get(issuer_key)
+        return default if issuer is None else issuer
+
+    def __iter__(self):
+        return iter(list(self._registry.keys()))
+
+    def __len__(self):
+        return len(self._registry)
+
+    def __contains__(self, issuer_key):
+        return self._registry.get(issuer_key) is not None
@@ -0,0 +1,117 @@
+"""
+Runtime Settings
+
+Deployment-specific settings read from environment variables.
+Every setting has a safe default so the demo and local runs work unconfigured.
+"""
+import os
+
+
+def _env_int(name, default):
+    """Read an integer environment variable, falling back to default"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_float(name, default):
+    """Read a float environment variable, falling back to default"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def _env_list(name):
+    """Read a comma separated environment variable as a list of strings"""
+    value = os.environ.get(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Access grants (signed tokens returned by /api/check-trustline)
+# All serverless instances must share the same secret for grants to verify
+# across instances; without it each instance signs with a random secret.
+ACCESS_TOKEN_SECRET = os.environ.get("ACCESS_TOKEN_SECRET", "")
+ACCESS_TOKEN_TTL_SECONDS = _env_int("ACCESS_TOKEN_TTL_SECONDS", 300)
+
+# Revocation bloom filter: entries are grant ids or "wallet:<address>"
+ACCESS_TOKEN_REVOKED = _env_list("ACCESS_TOKEN_REVOKED")
+ACCESS_TOKEN_REVOCATION_FILE = os.environ.get("ACCESS_TOKEN_REVOCATION_FILE", "")
+REVOCATION_BLOOM_BITS = _env_int("REVOCATION_BLOOM_BITS", 1 << 16)
+REVOCATION_BLOOM_HASHES = _env_int("REVOCATION_BLOOM_HASHES", 4)
+
+# Trustline event stream (/api/trustline-events)
+XRPL_WS_URL = os.environ.get("XRPL_WS_URL", "wss://s.altnet.rippletest.net:51233")
+SSE_MAX_STREAM_SECONDS = _env_int("SSE_MAX_STREAM_SECONDS", 25)
+SSE_HEARTBEAT_SECONDS = _env_int("SSE_HEARTBEAT_SECONDS", 10)
+
+# Agent context (/api/agent-context)
+AGENT_CONTEXT_TTL_SECONDS = _env_int("AGENT_CONTEXT_TTL_SECONDS", 60)
+
+# Accounts rippled reported as not found are answered locally for this long
+ACCOUNT_NOT_FOUND_TTL_SECONDS = _env_int("ACCOUNT_NOT_FOUND_TTL_SECONDS", 30)
+ACCOUNT_NOT_FOUND_CACHE_SIZE = _env_int("ACCOUNT_NOT_FOUND_CACHE_SIZE", 10000)
+# How long a wallet seen to exist skips the account_info check behind an empty trustline answer
+ACCOUNT_EXISTS_TTL_SECONDS = _env_int("ACCOUNT_EXISTS_TTL_SECONDS", 300)
+
+# Admission control for upstream rippled requests (see src/admission.py)
+ADMISSION_WALLET_RATE = _env_float("ADMISSION_WALLET_RATE", 5.0)
+ADMISSION_WALLET_BURST = _env_int("ADMISSION_WALLET_BURST", 20)
+ADMISSION_GLOBAL_RATE = _env_float("ADMISSION_GLOBAL_RATE", 50.0)
+ADMISSION_GLOBAL_BURST = _env_int("ADMISSION_GLOBAL_BURST", 100)
+UPSTREAM_MAX_CONCURRENCY = _env_int("UPSTREAM_MAX_CONCURRENCY", 8)
+UPSTREAM_MAX_QUEUE = _env_int("UPSTREAM_MAX_QUEUE", 64)
+UPSTREAM_QUEUE_TIMEOUT_SECONDS = _env_float("UPSTREAM_QUEUE_TIMEOUT_SECONDS", 2.0)
+
+# rippled JSON-RPC endpoint (empty: public testnet/mainnet per XRPLClient)
+XRPL_RPC_URL = os.environ.get("XRPL_RPC_URL", "")
+# Read-only queries skip xrpl-py models and reuse keep-alive connections (0 disables)
+XRPL_FAST_READS = _env_int("XRPL_FAST_READS", 1)
+
+# Transaction signing (see src/tx_signing.py)
+SIGNING_KEY_TTL_SECONDS = _env_int("SIGNING_KEY_TTL_SECONDS", 300)
+SIGNING_KEY_CACHE_SIZE = _env_int("SIGNING_KEY_CACHE_SIZE", 256)
+# Worker processes for batch signing (0: one per CPU)
+SIGNING_WORKERS = _env_int("SIGNING_WORKERS", 0)
+
+# Trustline snapshot cache (see src/cache.py)
+CACHE_L1_SIZE = _env_int("CACHE_L1_SIZE", 10000)
+CACHE_L1_TTL_SECONDS = _env_float("CACHE_L1_TTL_SECONDS", 5.0)
+# Shared L2 store: redis://[:password@]host:port/db, rediss://..., file:///path (empty: L1 only)
+CACHE_L2_URL = os.environ.get("CACHE_L2_URL", "")
+CACHE_L2_TTL_SECONDS = _env_float("CACHE_L2_TTL_SECONDS", 30.0)
+CACHE_SYNC_INTERVAL_SECONDS = _env_float("CACHE_SYNC_INTERVAL_SECONDS", 1.0)
+
+# Gate check latency budget (see src/latency_budget.py)
+# Seconds a gate check waits for rippled before answering with the last known decision
+GATE_DEADLINE_SECONDS = _env_float("GATE_DEADLINE_SECONDS", 1.5)
+# How old a last known decision may be
+GATE_STALE_TTL_SECONDS = _env_float("GATE_STALE_TTL_SECONDS", 3600.0)
+GATE_REFRESH_WORKERS = _env_int("GATE_REFRESH_WORKERS", 4)
+
+# Issuer analytics snapshot served by /api/issuer-stats (written by demo/ingest_dump.py)
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYTICS_PATH = os.environ.get("ANALYTICS_PATH", os.path.join(_PROJECT_DIR, "indexes", "analytics.json"))
+
+# Wallet groups served by /api/group-access (see src/groups.py)
+# Shared store holding them (same URL schemes as CACHE_L2_URL; empty: in memory of one instance)
+GROUPS_URL = os.environ.get("GROUPS_URL") or CACHE_L2_URL
+GROUP_MAX_MEMBERS = _env_int("GROUP_MAX_MEMBERS", 1000)
+# Issuers whose trustlines are listed concurrently when members join a group
+GROUP_BUILD_WORKERS = _env_int("GROUP_BUILD_WORKERS", 8)
+# How often a group read first catches up on issuers' ledger history
+GROUP_SYNC_INTERVAL_SECONDS = _env_float("GROUP_SYNC_INTERVAL_SECONDS", 15.0)
+
+# Request profiling (see src/profiling.py)
+# Requests sending "X-Profile-Token: <PROFILE_TOKEN>" are profiled (empty: header ignored)
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Fraction of requests to profile without the header (0 disables)
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_INTERVAL_MS = _env_float("PROFILE_INTERVAL_MS", 1.0)
+# Where profiles are written (empty: <temp dir>/guidancegate-profiles)
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+
+# Response compression (see src/response_encoding.py)
+# Smaller bodies are sent uncompressed (0 compresses everything the client accepts)
+COMPRESSION_MIN_BYTES = _env_int("COMPRESSION_MIN_BYTES", 1024)
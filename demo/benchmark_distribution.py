@@ -0,0 +1,131 @@
+"""
+Benchmark: token distribution to a large holder set
+
+Starts a mock rippled in a separate process with an issuer and N holders
+trusting its currency, then runs a dry run, the distribution itself, checks
+every holder's balance and reruns with the same journal (which must plan
+nothing). The mock applies transactions instantly but closes a ledger every
+--ledger-interval seconds and enforces LastLedgerSequence, so a run that
+outlasts the --ledger-window of its Payments shows up as expiries and extra
+rounds. It measures the client side: signing, submit pipelining, tracking and
+journaling.
+
+Usage:
+    python demo/benchmark_distribution.py [--holders 10000] [--chunk-size 200] [--workers 8]
+                                          [--ledger-interval 3.5] [--ledger-window 20]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Measure the distribution path, not admission control
+os.environ.setdefault("ADMISSION_WALLET_RATE", "1000000")
+os.environ.setdefault("ADMISSION_WALLET_BURST", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_RATE", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_BURST", "1000000")
+
+from xrpl.core.addresscodec import encode_classic_address
+from xrpl.wallet import Wallet
+
+from src.distribution import DEFAULT_LEDGER_WINDOW, DistributionEngine
+from src.mock_ledger import MockLedger
+
+CURRENCY = "GID"
+
+
+def holder_addresses(count, seed=7):
+    """Deterministic holder addresses (no keys needed, they only receive)"""
+    rng = random.Random(seed)
+    return [encode_classic_address(bytes(rng.getrandbits(8) for _ in range(20))) for _ in range(count)]
+
+
+def serve(port, issuer_address, holders, ready, close_interval):
+    """Run the mock ledger in a child process"""
+    ledger = MockLedger()
+    ledger.fund(issuer_address, drops=10 ** 12)
+    for holder in holders:
+        ledger.fund(holder)
+        ledger.add_trustline(holder, issuer_address, CURRENCY)
+    ledger.start(port=port, close_interval=close_interval)
+    ready.set()
+    while True:
+        time.sleep(3600)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark token distribution")
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--amount", default="1")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--ledger-interval", type=float, default=3.5, help="Seconds between ledger closes")
+    parser.add_argument("--ledger-window", type=int, default=DEFAULT_LEDGER_WINDOW,
+                        help="Ledgers each Payment stays valid for")
+    args = parser.parse_args()
+
+    issuer_wallet = Wallet.create()
+    issuer = {"address": issuer_wallet.classic_address, "currency": CURRENCY}
+    holders = holder_addresses(args.holders)
+
+    print("=" * 60)
+    print(f"Distribution Benchmark: {args.holders} holders (mock rippled)")
+    print("=" * 60)
+    print()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, daemon=True,
+                                     args=(args.port, issuer["address"], holders, ready, args.ledger_interval))
+    server.start()
+    ready.wait(120)
+    os.environ["XRPL_RPC_URL"] = f"http://127.0.0.1:{args.port}/"
+
+    # Settings are read at import, so point the client at the mock explicitly
+    from config import settings
+    from src.xrpl_client import XRPLClient
+    settings.XRPL_RPC_URL = os.environ["XRPL_RPC_URL"]
+    client = XRPLClient()
+
+    journal = os.path.join(tempfile.mkdtemp(prefix="distribution-"), "journal.jsonl")
+
+    def engine(**kwargs):
+        return DistributionEngine(client, issuer, args.amount, journal, seed=issuer_wallet.seed,
+                                  chunk_size=args.chunk_size, submit_workers=args.workers,
+                                  ledger_window=args.ledger_window, poll_interval=0.05, **kwargs)
+
+    stats = engine(dry_run=True).run()
+    print(f"Dry run:   {stats['planned']} planned in {stats['chunks']} chunks, "
+          f"{stats['fee_xrp']:.6f} XRP fees ({stats['seconds']:.2f}s)")
+
+    def progress(stats):
+        if stats["submitted"] % (args.chunk_size * 10) == 0:
+            print(f"  {stats['submitted']:>7} submitted | {stats['delivered']:>7} delivered | "
+                  f"{stats['submitted'] / stats['seconds']:7.1f} tx/s")
+
+    _, first_ledger = client.get_account_root(issuer["address"])
+    stats = engine().run(progress=progress)
+    _, last_ledger = client.get_account_root(issuer["address"])
+    print(f"Delivered: {stats['delivered']} | failed {stats['failed']} | expired {stats['expired']} | "
+          f"unknown {stats['unknown']} | {stats['rounds']} rounds")
+    print(f"Time:      {stats['seconds']:.1f}s ({stats['delivered'] / stats['seconds']:.0f} tx/s), "
+          f"{last_ledger - first_ledger} ledgers closed (window {args.ledger_window})")
+
+    lines, _ = client.get_all_trustlines(issuer["address"])
+    paid = sum(1 for line in lines if float(line["balance"]) == -float(args.amount))
+    print(f"Balances:  {paid} / {len(holders)} holders hold exactly {args.amount} {CURRENCY}")
+
+    stats = engine().run()
+    print(f"Rerun:     {stats['planned']} planned, {stats['skipped']} already delivered")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: caregiver group view vs one trustline check per member
+
+Serves the endpoints in-process (see src/local_api.py) against an in-process
+mock rippled with N funded members, each opted into about half the issuers,
+and compares:
+
+    per-wallet   N /api/check-trustline calls (cold trustline cache)
+    group        building the group once, then GET /api/group-access
+    incremental  catching up after --changes trustline changes: one sync
+                 (account_tx per issuer) instead of re-reading every member
+
+with the server time and the number of rippled requests of each.
+
+Usage:
+    python demo/benchmark_groups.py [--members 500] [--reads 200] [--changes 50]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Reads don't sync on their own; groups go to a scratch store the gate also updates
+os.environ.setdefault("GROUP_SYNC_INTERVAL_SECONDS", "1000000")
+os.environ.setdefault("GROUPS_URL", "file://" + tempfile.mkdtemp(prefix="benchmark-groups-"))
+
+
+class CountingLedger:
+    """Counts the JSON-RPC requests a MockLedger answers"""
+
+    def __init__(self, ledger):
+        self.requests = 0
+        handle = ledger.handle
+
+        def counted(payload):
+            self.requests += 1
+            return handle(payload)
+        ledger.handle = counted
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark group access views")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=200, help="Group reads to time")
+    parser.add_argument("--changes", type=int, default=50, help="Trustline changes before the sync")
+    args = parser.parse_args()
+
+    from src.mock_ledger import MockLedger
+    ledger = MockLedger()
+    counter = CountingLedger(ledger)
+    os.environ["XRPL_RPC_URL"] = ledger.start()
+
+    from config import settings
+    from config.issuers import VERIFIED_ISSUERS
+    from src.groups import get_group_store
+    from src.local_api import call
+    from src.xrpl_client import XRPLClient
+    from xrpl.core.addresscodec import encode_classic_address
+
+    settings.XRPL_RPC_URL = os.environ["XRPL_RPC_URL"]
+    rng = random.Random(7)
+    issuers = [VERIFIED_ISSUERS[key] for key in VERIFIED_ISSUERS]
+    members = [encode_classic_address(bytes(rng.getrandbits(8) for _ in range(20))) for _ in range(args.members)]
+    for issuer in issuers:
+        ledger.fund(issuer["address"])
+    for wallet in members:
+        ledger.fund(wallet)
+        for issuer in issuers:
+            if rng.random() < 0.5:
+                ledger.add_trustline(wallet, issuer["address"], issuer["currency"])
+    ledger.close_ledger()
+
+    print("=" * 60)
+    print(f"Group Benchmark: {args.members} members x {len(issuers)} issuers")
+    print("=" * 60)
+    print()
+
+    def timed(label, func):
+        requests = counter.requests
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        print(f"{label:34}{elapsed * 1000:10.1f} ms {counter.requests - requests:8} rippled requests")
+        return result
+
+    def check_each():
+        for wallet in members:
+            status, _, body = call("check-trustline", "POST", "/api/check-trustline", body={"wallet_address": wallet})
+            if status != 200:
+                raise RuntimeError(f"check-trustline returned {status}: {body[:200]}")
+
+    timed(f"per-wallet checks ({args.members})", check_each)
+
+    def create():
+        status, _, body = call("group-access", "POST", "/api/group-access",
+                               body={"action": "create", "group": "benchmark", "wallets": members})
+        if status != 201:
+            raise RuntimeError(f"group-access returned {status}: {body[:200]}")
+        return json.loads(body)["manage_token"]
+
+    token = timed("build group (once)", create)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    timings = []
+    requests = counter.requests
+    for _ in range(args.reads):
+        start = time.perf_counter()
+        status, _, body = call("group-access", "GET", "/api/group-access?group=benchmark", headers=headers)
+        timings.append(time.perf_counter() - start)
+    print(f"{'group read (median)':34}{statistics.median(timings) * 1000:10.3f} ms "
+          f"{(counter.requests - requests) / args.reads:8.0f} rippled requests")
+    print(f"{'group read size':34}{len(body):10} bytes")
+
+    # Flip random cells, then catch up with one sync
+    store = get_group_store()
+    flipped = []
+    for _ in range(args.changes):
+        wallet, issuer = rng.choice(members), rng.choice(issuers)
+        if store.groups["benchmark"].matrix.get(wallet, issuer["key"]):
+            ledger.remove_trustline(wallet, issuer["address"], issuer["currency"])
+        else:
+            ledger.add_trustline(wallet, issuer["address"], issuer["currency"])
+        flipped.append((wallet, issuer))
+    ledger.close_ledger()
+
+    timed(f"sync after {args.changes} changes", lambda: store.sync(XRPLClient(testnet=True)))
+    timed("write to the store (background)", store.flush)
+
+    client = XRPLClient(testnet=True)
+    matrix = store.groups["benchmark"].matrix
+    mismatches = 0
+    for wallet in members:
+        entries, _ = client.get_trustline_entries(wallet, issuers)
+        mismatches += sum(matrix.get(wallet, issuer["key"]) != (entry is not None)
+                          for issuer, entry in zip(issuers, entries))
+    print()
+    print(f"Matrix vs ledger after sync: {mismatches} mismatched cells")
+    print(f"Store: {json.dumps(store.metrics())}")
+    ledger.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: response bytes and encoding CPU per fieldset and content coding
+
+Serves the gate endpoints in-process (see src/local_api.py) against an
+in-process mock rippled, with every catalog padded to --products products, and
+reports for each endpoint the bytes on the wire and the server time per
+request with the full response or a sparse fieldset, sent identity, gzip or br
+(br only when the brotli package is installed). "cold" compresses every
+response; "warm" reuses compressed bodies the way repeated requests do.
+Padded catalogs repeat the real products, so compression ratios here are
+better than on a real catalog of the same size.
+
+Usage:
+    python demo/benchmark_responses.py [--products 100] [--requests 200]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Measure the response path, not admission control
+os.environ.setdefault("ADMISSION_WALLET_RATE", "1000000")
+os.environ.setdefault("ADMISSION_WALLET_BURST", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_RATE", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_BURST", "1000000")
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config')
+
+
+def padded_registry(products_per_issuer):
+    """Copy of config/ with every catalog repeated to the given size"""
+    directory = tempfile.mkdtemp(prefix="benchmark-responses-")
+    shutil.copy(os.path.join(CONFIG_DIR, "issuers.json"), directory)
+    os.makedirs(os.path.join(directory, "products"))
+    for name in os.listdir(os.path.join(CONFIG_DIR, "products")):
+        with open(os.path.join(CONFIG_DIR, "products", name), encoding="utf-8") as f:
+            catalog = json.load(f)
+        padded = []
+        for i in range(products_per_issuer):
+            product = dict(catalog[i % len(catalog)])
+            product["id"] = f"{product['id']}-{i}"
+            product["name"] = f"{product['name']} ({i // len(catalog) + 1})"
+            padded.append(product)
+        with open(os.path.join(directory, "products", name), "w", encoding="utf-8") as f:
+            json.dump(padded, f)
+    return os.path.join(directory, "issuers.json")
+
+
+def measure(call, case, accept_encoding, requests):
+    """Median server time (ms) and bytes of one request shape"""
+    name, method, path, body = case
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    timings = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, response_headers, payload = call(name, method, path, body=body, headers=headers)
+        timings.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"{name} returned {status}: {payload[:200]}")
+        size = len(payload)
+    return statistics.median(timings) * 1000, size, response_headers.get("content-encoding")
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark sparse fieldsets and compression")
+    parser.add_argument("--products", type=int, default=100, help="Products per issuer catalog")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per measurement")
+    args = parser.parse_args()
+
+    os.environ["ISSUER_REGISTRY_PATH"] = padded_registry(args.products)
+
+    from src.mock_ledger import MockLedger
+    ledger = MockLedger()
+    os.environ["XRPL_RPC_URL"] = ledger.start()
+
+    from config import settings
+    from config.issuers import VERIFIED_ISSUERS
+    from src import response_encoding
+    from src.local_api import call
+    from xrpl.core.addresscodec import encode_classic_address
+
+    settings.XRPL_RPC_URL = os.environ["XRPL_RPC_URL"]
+    wallet = encode_classic_address(bytes(range(20)))
+    ledger.fund(wallet)
+    for issuer in VERIFIED_ISSUERS.values():
+        ledger.fund(issuer["address"])
+        ledger.add_trustline(wallet, issuer["address"], issuer["currency"])
+
+    status, _, body = call("check-trustline", "POST", "/api/check-trustline", body={"wallet_address": wallet})
+    if status != 200:
+        print(f"check-trustline returned {status}: {body[:200]}")
+        return
+    issuer_key = json.loads(body)["opted_in_issuer_keys"][0]
+    products = f"/api/issuer-products?issuer={issuer_key}&wallet_address={wallet}&limit=100"
+
+    cases = [
+        ("check-trustline", "full", ("check-trustline", "POST", "/api/check-trustline",
+                                     {"wallet_address": wallet})),
+        ("check-trustline", "opted_in,access_token",
+         ("check-trustline", "POST", "/api/check-trustline?fields=opted_in,access_token",
+          {"wallet_address": wallet})),
+        ("issuer-products", "full", ("issuer-products", "GET", products, None)),
+        ("issuer-products", "products.id,products.price_xrp",
+         ("issuer-products", "GET", products + "&fields=products.id,products.price_xrp,next_cursor", None)),
+        ("agent-context", "full", ("agent-context", "GET", f"/api/agent-context?wallet_address={wallet}", None)),
+        ("agent-context", "permitted",
+         ("agent-context", "GET", f"/api/agent-context?wallet_address={wallet}&fields=permitted", None)),
+    ]
+    codings = [(None, "identity"), ("gzip", "gzip")]
+    if response_encoding.brotli is not None:
+        codings.append(("br, gzip", "br"))
+
+    print("=" * 88)
+    print(f"Response Benchmark: {args.products} products per catalog, {args.requests} requests each")
+    print("=" * 88)
+    print()
+    print(f"{'endpoint':17}{'fields':32}{'coding':10}{'bytes':>9}{'cold ms':>10}{'warm ms':>10}")
+
+    cache_bytes = response_encoding.COMPRESSED_CACHE_BYTES
+    baseline = {}
+    for endpoint, label, case in cases:
+        for accept_encoding, coding in codings:
+            response_encoding.COMPRESSED_CACHE_BYTES = 0
+            cold_ms, size, sent_coding = measure(call, case, accept_encoding, args.requests)
+            response_encoding.COMPRESSED_CACHE_BYTES = cache_bytes
+            warm_ms, _, _ = measure(call, case, accept_encoding, args.requests)
+            baseline.setdefault(endpoint, size)
+            shown = coding if sent_coding or coding == "identity" else f"{coding}*"
+            print(f"{endpoint:17}{label:32}{shown:10}{size:9}{cold_ms:10.3f}{warm_ms:10.3f}"
+                  f"   {size / baseline[endpoint]:6.1%}")
+
+    # Encoding alone: per-request json.dumps (as before fragments) vs pre-encoded products
+    from src.catalog import get_catalog
+    page = get_catalog().get_index(issuer_key).query(limit=100)
+    payload = {"products": [dict(product) for product in page["products"]], "total": page["total"]}
+    encoded = {"products": page["products"], "total": page["total"]}
+    selector = response_encoding.parse_fields("products.id,products.price_xrp")
+    print()
+    print(f"Encoding a {len(payload['products'])}-product page (us):")
+    for label, encode in (
+        ("json.dumps", lambda: json.dumps(payload).encode()),
+        ("pre-encoded, full", lambda: response_encoding.encode_json(encoded)),
+        ("pre-encoded, fields", lambda: response_encoding.encode_json(encoded, selector)),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            encode()
+        print(f"   {label:22}{(time.perf_counter() - start) / args.requests * 1e6:8.1f}")
+
+    print()
+    print("Percentages are of the full identity response; * = below COMPRESSION_MIN_BYTES, "
+          f"sent uncompressed ({settings.COMPRESSION_MIN_BYTES} bytes)")
+    if response_encoding.brotli is None:
+        print("brotli is not installed; br was skipped")
+    ledger.stop()
+
+
+if __name__ == "__main__":
+    main()
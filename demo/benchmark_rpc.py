@@ -0,0 +1,117 @@
+"""
+Benchmark: raw JSON-RPC fast path vs xrpl-py models
+
+Starts a mock rippled in a separate process, checks that both read paths
+return identical results, then compares client CPU time and wall time per
+request for the gate's queries.
+
+Usage:
+    python demo/benchmark_rpc.py [--requests 300] [--wallets 200]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Measure the transports, not admission control
+os.environ.setdefault("ADMISSION_WALLET_RATE", "1000000")
+os.environ.setdefault("ADMISSION_WALLET_BURST", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_RATE", "1000000")
+os.environ.setdefault("ADMISSION_GLOBAL_BURST", "1000000")
+
+from src.mock_ledger import MockLedger, populate
+from src.xrpl_client import XRPLClient, AccountNotFoundError, _MISSING_ACCOUNTS
+from config.issuers import VERIFIED_ISSUERS, get_required_issuers
+
+
+def serve(port, wallets, ready):
+    """Run the mock ledger in a child process"""
+    ledger = MockLedger()
+    populate(ledger, list(VERIFIED_ISSUERS.values()), wallets)
+    ledger.start(port=port)
+    ready.set()
+    while True:
+        time.sleep(3600)
+
+
+def run_queries(client, wallets, issuers):
+    """One gate check per wallet plus a trustline listing"""
+    results = []
+    for wallet in wallets:
+        try:
+            entries, ledger_index = client.get_trustline_entries(wallet, issuers)
+            results.append((entries, ledger_index, client.get_validated_trustlines(wallet)))
+        except AccountNotFoundError as e:
+            results.append(str(e))
+    return results
+
+
+def measure(client, wallets, issuers):
+    """Client CPU and wall time per wallet"""
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    run_queries(client, wallets, issuers)
+    cpu = (time.process_time() - cpu_start) / len(wallets)
+    wall = (time.perf_counter() - wall_start) / len(wallets)
+    return cpu * 1000, wall * 1000
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark read transports")
+    parser.add_argument("--requests", type=int, default=300, help="Wallet checks per transport")
+    parser.add_argument("--wallets", type=int, default=200, help="Wallets on the mock ledger")
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.port, args.wallets, ready), daemon=True)
+    server.start()
+    ready.wait(30)
+    os.environ["XRPL_RPC_URL"] = f"http://127.0.0.1:{args.port}/"
+
+    # Settings are read at import, so point the clients at the mock explicitly
+    from config import settings
+    settings.XRPL_RPC_URL = os.environ["XRPL_RPC_URL"]
+
+    # Same seed as the server, so these are the served wallets; plus some unfunded ones
+    funded = populate(MockLedger(), list(VERIFIED_ISSUERS.values()), args.wallets)
+    unfunded = populate(MockLedger(), [], 10, seed=99)
+    wallets = (funded * (args.requests // len(funded) + 1))[:args.requests]
+    issuers = get_required_issuers()
+
+    print("=" * 60)
+    print("Read Path Benchmark (mock rippled)")
+    print("=" * 60)
+    print()
+
+    fast = XRPLClient(fast_reads=True)
+    slow = XRPLClient(fast_reads=False)
+
+    sample = funded[:50] + unfunded
+    fast_results = run_queries(fast, sample, issuers)
+    # Unfunded wallets must reach the ledger on both paths
+    _MISSING_ACCOUNTS.clear()
+    same = fast_results == run_queries(slow, sample, issuers)
+    print(f"Identical results on both paths: {same}")
+    print()
+
+    slow_cpu, slow_wall = measure(slow, wallets, issuers)
+    fast_cpu, fast_wall = measure(fast, wallets, issuers)
+
+    calls = len(issuers) + 1
+    print(f"{'':24}{'CPU ms/check':>14}{'wall ms/check':>15}")
+    print(f"{'xrpl-py models':24}{slow_cpu:14.2f}{slow_wall:15.2f}")
+    print(f"{'raw JSON-RPC':24}{fast_cpu:14.2f}{fast_wall:15.2f}")
+    print()
+    print(f"Each check = {calls} upstream calls ({len(issuers)} ledger_entry + account_lines)")
+    print(f"CPU per check reduced {slow_cpu / fast_cpu:.1f}x")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: transaction signing throughput
+
+Measures keypair derivation with and without the key cache, then signatures
+per second for a batch of autofilled TrustSet transactions on 0 (in-process)
+up to N worker processes.
+
+Usage:
+    python demo/benchmark_signing.py [--transactions 400] [--wallets 20] [--max-workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from xrpl.models.transactions import TrustSet
+from xrpl.wallet import Wallet
+
+from config.issuers import get_required_issuers
+from src.tx_signing import KeyCache, SigningService
+from src.xrpl_client import format_currency_code
+
+
+def make_batch(seeds, count):
+    """Autofilled TrustSets spread over the wallets (sequence numbers are synthetic)"""
+    issuer = get_required_issuers()[0]
+    wallets = [Wallet.from_seed(seed) for seed in seeds]
+    batch = []
+    for i in range(count):
+        wallet = wallets[i % len(wallets)]
+        tx = TrustSet(
+            account=wallet.classic_address,
+            limit_amount={
+                "currency": format_currency_code(issuer["currency"]),
+                "issuer": issuer["address"],
+                "value": "1000000000",
+            },
+            sequence=1000 + i // len(wallets),
+            fee="12",
+            last_ledger_sequence=2000,
+        )
+        batch.append((tx, wallet.seed))
+    return batch
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark transaction signing")
+    parser.add_argument("--transactions", type=int, default=400)
+    parser.add_argument("--wallets", type=int, default=20)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    seeds = [Wallet.create().seed for _ in range(args.wallets)]
+    batch = make_batch(seeds, args.transactions)
+
+    print("=" * 60)
+    print("Signing Benchmark")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    for seed in seeds:
+        Wallet.from_seed(seed)
+    derive_ms = (time.perf_counter() - start) / len(seeds) * 1000
+    cache = KeyCache()
+    for seed in seeds:
+        cache.wallet(seed)
+    start = time.perf_counter()
+    for seed in seeds:
+        cache.wallet(seed)
+    cached_ms = (time.perf_counter() - start) / len(seeds) * 1000
+    print(f"Key derivation: {derive_ms:.2f} ms uncached, {cached_ms:.3f} ms cached")
+    print()
+
+    print(f"{'workers':>8}{'sigs/sec':>12}{'speedup':>10}")
+    baseline = None
+    reference = None
+    for workers in range(0, args.max_workers + 1):
+        with SigningService(cache, workers=workers) as service:
+            if workers:
+                # Start the worker processes outside the timed run
+                service.sign_batch(batch[:service.chunk_size * workers + 1])
+            start = time.perf_counter()
+            results = service.sign_batch(batch)
+            rate = len(batch) / (time.perf_counter() - start)
+        errors = [r for r in results if "error" in r]
+        if errors:
+            print(f"{workers:>8}  {len(errors)} failed: {errors[0]['error']}")
+            return
+        blobs = [r["tx_blob"] for r in results]
+        reference = reference or blobs
+        baseline = baseline or rate
+        label = "in-process" if not workers else ""
+        print(f"{workers:>8}{rate:12.0f}{rate / baseline:9.1f}x  {label}")
+        if blobs != reference:
+            print("         blobs differ from the in-process run")
+
+    print()
+    print(f"CPU cores: {os.cpu_count()}")
+    cache.clear()
+
+
+if __name__ == "__main__":
+    main()
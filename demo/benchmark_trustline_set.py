@@ -0,0 +1,115 @@
+"""
+Benchmark: TrustlineSet vs account_lines dictionaries
+
+Builds a synthetic 50k-line account (like a busy issuer or operator) and
+compares memory, point lookups and a full-column scan.
+
+Usage:
+    python demo/benchmark_trustline_set.py [--lines 50000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from xrpl.core.addresscodec import encode_classic_address
+
+from src.trustline_set import TrustlineSet
+from src.xrpl_client import trustline_exists
+
+
+def make_lines(count):
+    """Synthetic account_lines output with a handful of currencies"""
+    rng = random.Random(7)
+    currencies = ["USD", "EUR", "GID", "524C555344000000000000000000000000000000"]
+    lines = []
+    for _ in range(count):
+        lines.append({
+            "account": encode_classic_address(rng.randbytes(20)),
+            "balance": str(round(rng.uniform(-1000, 1000), 6)),
+            "currency": rng.choice(currencies),
+            "limit": "1000000000",
+            "limit_peer": "0",
+            "no_ripple": rng.random() < 0.5,
+            "no_ripple_peer": False,
+            "quality_in": 0,
+            "quality_out": 0,
+        })
+    return lines
+
+
+def measure(build):
+    """Peak traced memory and time of building a structure"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark TrustlineSet")
+    parser.add_argument("--lines", type=int, default=50000, help="Number of trustlines")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"TrustlineSet Benchmark ({args.lines:,} lines)")
+    print("=" * 60)
+    print()
+
+    source = make_lines(args.lines)
+    # Both structures are built from the decoded RPC payload, as in production
+    payload = json.dumps(source)
+    dicts, dict_bytes, _ = measure(lambda: json.loads(payload))
+    compact, compact_bytes, _ = measure(lambda: TrustlineSet(json.loads(payload)))
+
+    decoded = json.loads(payload)
+    start = time.perf_counter()
+    TrustlineSet(decoded)
+    build_seconds = time.perf_counter() - start
+
+    print(f"Memory (list of dicts):  {dict_bytes / 1e6:8.2f} MB")
+    print(f"Memory (TrustlineSet):   {compact_bytes / 1e6:8.2f} MB "
+          f"(columns and index {compact.nbytes() / 1e6:.2f} MB)")
+    print(f"TrustlineSet build:      {build_seconds * 1000:8.1f} ms")
+    print()
+
+    probes = [(line["account"], line["currency"]) for line in random.Random(1).sample(source, 200)]
+
+    start = time.perf_counter()
+    for account, currency in probes:
+        trustline_exists(dicts, account, currency if len(currency) <= 20 else "RLUSD")
+    scan_us = (time.perf_counter() - start) / len(probes) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(50):
+        for account, currency in probes:
+            compact.contains(account, currency)
+    indexed_us = (time.perf_counter() - start) / (50 * len(probes)) * 1e6
+
+    print(f"Lookup (trustline_exists scan): {scan_us:10.1f} µs")
+    print(f"Lookup (TrustlineSet index):    {indexed_us:10.1f} µs")
+    print()
+
+    start = time.perf_counter()
+    dict_total = sum(float(line["balance"]) for line in dicts if line["currency"] == "USD")
+    dict_sum_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    compact_total = compact.total_balance("USD")
+    compact_sum_ms = (time.perf_counter() - start) * 1000
+
+    print(f"USD balance sum (dicts):        {dict_sum_ms:10.2f} ms")
+    print(f"USD balance sum (TrustlineSet): {compact_sum_ms:10.2f} ms")
+    print(f"Totals match: {abs(dict_total - compact_total) < 1e-6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Build Guidance Index
+
+Parses the issuer guidance documents in knowledgedocs/ once and writes the
+issuer-partitioned search index served by /api/guidance-search.
+Documents are matched to issuers by file name (e.g. "CalmBridge Financial Wellbeing.docx").
+
+Re-run after editing any document:
+    python demo/build_guidance_index.py
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.guidance_index import build_index, DEFAULT_INDEX_PATH
+from config.issuers import VERIFIED_ISSUERS
+
+
+def find_documents(docs_dir):
+    """Map issuer keys to their guidance document"""
+    keys_by_name = {issuer["name"].lower(): key for key, issuer in VERIFIED_ISSUERS.items()}
+    documents = {}
+    for filename in sorted(os.listdir(docs_dir)):
+        # Skip Word lock files ("~$...docx")
+        if not filename.endswith(".docx") or filename.startswith("~$"):
+            continue
+        issuer_key = keys_by_name.get(os.path.splitext(filename)[0].lower())
+        if issuer_key:
+            documents[issuer_key] = os.path.join(docs_dir, filename)
+        else:
+            print(f"   ⚠️  Skipping {filename} - no issuer with that name")
+    return documents
+
+
+def main():
+    """Build the index"""
+    print("=" * 60)
+    print("Building Guidance Index")
+    print("=" * 60)
+    print()
+
+    docs_dir = os.path.join(os.path.dirname(__file__), '..', 'knowledgedocs')
+    documents = find_documents(docs_dir)
+
+    start = time.perf_counter()
+    counts = build_index(documents)
+    elapsed = time.perf_counter() - start
+
+    for issuer_key, passages in counts.items():
+        print(f"   ✅ {issuer_key}: {passages} passages")
+    print()
+    print(f"Index written to {os.path.normpath(DEFAULT_INDEX_PATH)} in {elapsed * 1000:.1f} ms")
+    print(f"Size: {os.path.getsize(DEFAULT_INDEX_PATH)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Bulk Onboarding
+
+Checks and completes trustline setup for every wallet in a CSV or JSON Lines
+file. Progress is checkpointed, so rerunning the same command resumes where
+it stopped and only retries failures.
+
+Input rows: "address" (check only) and/or "seed" (check and create trustlines).
+
+Usage:
+    python demo/bulk_onboard.py wallets.csv [--workers 8] [--include-optional] [--check-only]
+"""
+import argparse
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.bulk_onboarding import BulkOnboarding, iter_wallet_rows
+from src.xrpl_client import XRPLClient
+
+
+def print_progress(stats, record):
+    """One status line per report"""
+    rate = stats["processed"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"  {stats['processed']:>7} done | {stats['skipped']:>7} skipped | "
+          f"{stats['trustlines_created']:>6} trustlines | {stats['failed']:>5} failed | {rate:6.1f} wallets/s")
+    if record["status"] == "failed":
+        print(f"  ❌ {record['address']}: {record['error']}")
+
+
+def main():
+    """Run bulk onboarding"""
+    parser = argparse.ArgumentParser(description="Bulk onboard wallets")
+    parser.add_argument("input", help="Wallet list (.csv or .jsonl)")
+    parser.add_argument("--checkpoint", help="Progress file (default: <input>.checkpoint.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="Wallets processed in parallel")
+    parser.add_argument("--include-optional", action="store_true", help="Also create RLUSD trustlines")
+    parser.add_argument("--check-only", action="store_true", help="Only check status, submit nothing")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.input}.checkpoint.jsonl"
+
+    print("=" * 60)
+    print("Bulk Onboarding")
+    print("=" * 60)
+    print(f"Input:       {args.input}")
+    print(f"Checkpoint:  {checkpoint}")
+    print(f"Workers:     {args.workers}")
+    print()
+
+    onboarding = BulkOnboarding(
+        XRPLClient(testnet=True),
+        checkpoint,
+        workers=args.workers,
+        include_optional=args.include_optional,
+        check_only=args.check_only
+    )
+    stats = onboarding.run(iter_wallet_rows(args.input), progress=print_progress)
+
+    print()
+    print(f"Processed:            {stats['processed']}")
+    print(f"Skipped (checkpoint): {stats['skipped']}")
+    print(f"Completed:            {stats['complete']}")
+    print(f"Already complete:     {stats['already_complete']}")
+    print(f"Need a seed:          {stats['needs_seed']}")
+    print(f"Pending (check only): {stats['pending']}")
+    print(f"Failed:               {stats['failed']}")
+    print(f"Trustlines created:   {stats['trustlines_created']}")
+    print(f"Time:                 {stats['seconds']:.1f}s")
+    if stats["failed"]:
+        print()
+        print("Rerun the same command to retry failed wallets.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Distribute Tokens
+
+Sends an amount of an issuer's currency to every wallet that trusts it (or to
+the wallets in a CSV / JSON Lines file), e.g. to hand out programme-completion
+credentials. Every submission and result is journaled, so rerunning the same
+command resumes and never pays a holder twice (see src/distribution.py).
+
+The issuer's seed is read from ISSUER_SEED (or prompted for), never from the
+command line.
+
+Usage:
+    python demo/distribute.py community_aid --amount 1 --dry-run
+    ISSUER_SEED=s... python demo/distribute.py community_aid --amount 1 --memo "Credential: foundations"
+    ISSUER_SEED=s... python demo/distribute.py community_aid --amount 1 --holders graduates.csv
+"""
+import argparse
+import getpass
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.issuers import get_issuer_by_key
+from src.bulk_onboarding import iter_wallet_rows
+from src.distribution import DistributionEngine
+from src.xrpl_client import XRPLClient
+
+
+def print_progress(stats):
+    """One status line per chunk"""
+    rate = stats["submitted"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"  round {stats['rounds']} | {stats['submitted']:>7} submitted | {stats['delivered']:>7} delivered | "
+          f"{stats['failed']:>5} failed | {stats['expired']:>5} expired | {rate:6.1f} tx/s")
+
+
+def main():
+    """Run a distribution"""
+    parser = argparse.ArgumentParser(description="Distribute an issuer's token to its holders")
+    parser.add_argument("issuer", help="Issuer key (see config/issuers.json)")
+    parser.add_argument("--amount", required=True, help="Amount per holder")
+    parser.add_argument("--memo", help="Text attached to every Payment")
+    parser.add_argument("--holders", help="Only pay these wallets (.csv or .jsonl with an address column)")
+    parser.add_argument("--journal", help="Journal file (default: distribution-<issuer>.jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Payments signed and tracked together")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent submit requests")
+    parser.add_argument("--dry-run", action="store_true", help="Plan and report only")
+    args = parser.parse_args()
+
+    issuer = get_issuer_by_key(args.issuer)
+    if issuer is None:
+        parser.error(f"Unknown issuer: {args.issuer}")
+    journal = args.journal or f"distribution-{args.issuer}.jsonl"
+    addresses = None
+    if args.holders:
+        addresses = [row["address"] for row in iter_wallet_rows(args.holders) if row.get("address")]
+    seed = None
+    if not args.dry_run:
+        seed = os.environ.get("ISSUER_SEED") or getpass.getpass("Issuer seed: ")
+
+    print("=" * 60)
+    print(f"Distribution{' (dry run)' if args.dry_run else ''}")
+    print("=" * 60)
+    print(f"Issuer:   {issuer['name']} ({issuer['address']})")
+    print(f"Amount:   {args.amount} {issuer['currency']} per holder")
+    print(f"Journal:  {journal}")
+    print()
+
+    engine = DistributionEngine(
+        XRPLClient(testnet=True),
+        issuer,
+        args.amount,
+        journal,
+        seed=seed,
+        memo=args.memo,
+        chunk_size=args.chunk_size,
+        submit_workers=args.workers,
+        dry_run=args.dry_run
+    )
+    stats = engine.run(addresses, progress=print_progress)
+
+    print()
+    print(f"Holders:                {stats['holders']}")
+    print(f"Already delivered:      {stats['skipped']}")
+    print(f"Outcome unknown:        {stats['unknown']}")
+    print(f"No trustline:           {stats['no_trustline']}")
+    print(f"Limit too low:          {stats['over_limit']}")
+    print(f"Planned:                {stats['planned']}")
+    if args.dry_run:
+        print(f"Chunks:                 {stats['chunks']}")
+        print(f"Fees:                   {stats['fee_xrp']:.6f} XRP")
+        return
+    print(f"Recovered from journal: {stats['recovered']}")
+    print(f"Delivered:              {stats['delivered']}")
+    print(f"Failed:                 {stats['failed']}")
+    print(f"Expired (retried):      {stats['expired']}")
+    print(f"Rounds:                 {stats['rounds']}")
+    print(f"Time:                   {stats['seconds']:.1f}s")
+    if stats["pending"]:
+        print()
+        print(f"{stats['pending']} holders still pending; rerun the same command to retry.")
+    if stats["unknown"]:
+        print()
+        print(f"{stats['unknown']} holders have an unknown outcome (Sequence used, lookup failed); "
+              f"they are not paid again. Rerun later to look them up.")
+
+
+if __name__ == "__main__":
+    main()
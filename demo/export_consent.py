@@ -0,0 +1,75 @@
+"""
+Export Consent Intervals
+
+Builds (or incrementally updates) the consent timeline for an issuer from its
+transaction history and writes every consent interval as CSV. The same
+transactions are counted into the issuer analytics snapshot served by
+/api/issuer-stats (ANALYTICS_PATH unless --analytics is given).
+
+Usage:
+    python demo/export_consent.py community_aid [--timeline consent.json] [--out intervals.csv]
+                                                [--analytics analytics.json]
+"""
+import argparse
+import csv
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.xrpl_client import XRPLClient
+from src.analytics import IssuerAnalytics
+from src.consent_timeline import ConsentTimeline
+from config import settings
+from config.issuers import VERIFIED_ISSUERS, get_issuer_by_key
+
+
+def main():
+    """Update the timeline and export intervals"""
+    parser = argparse.ArgumentParser(description="Export consent intervals for an issuer")
+    parser.add_argument("issuer", help="Issuer key (e.g. community_aid)")
+    parser.add_argument("--timeline", help="Timeline file to load and update (optional)")
+    parser.add_argument("--out", help="CSV output path (default: stdout)")
+    parser.add_argument("--analytics", default=settings.ANALYTICS_PATH,
+                        help="Analytics snapshot to update ('' to skip)")
+    args = parser.parse_args()
+
+    issuer = get_issuer_by_key(args.issuer)
+    if not issuer:
+        print(f"❌ Unknown issuer: {args.issuer}", file=sys.stderr)
+        return 1
+
+    timeline = ConsentTimeline(VERIFIED_ISSUERS.values())
+    if args.timeline and os.path.exists(args.timeline):
+        timeline.load(args.timeline)
+
+    analytics = None
+    if args.analytics:
+        analytics = IssuerAnalytics(VERIFIED_ISSUERS.values())
+        if os.path.exists(args.analytics):
+            analytics.load(args.analytics)
+
+    client = XRPLClient(testnet=True)
+    processed = timeline.ingest_issuer_history(client, issuer["address"], analytics=analytics)
+    print(f"Processed {processed} new transaction(s) for {issuer['name']}", file=sys.stderr)
+
+    if args.timeline:
+        timeline.save(args.timeline)
+    if analytics is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.analytics)), exist_ok=True)
+        analytics.save(args.analytics)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=["holder", "start_ledger", "end_ledger"])
+        writer.writeheader()
+        for interval in timeline.iter_intervals(issuer["address"]):
+            writer.writerow(interval)
+    finally:
+        if args.out:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 """
 Generate Issuers Script (Non-Interactive)
 
-Automatically creates test issuer wallets and updates config/issuers.py
+Automatically creates test issuer wallets and updates config/issuers.json
 Generates wallets for any issuer with placeholder addresses
 """
 import sys
@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.xrpl_client import XRPLClient
-from config.issuers import VERIFIED_ISSUERS
+from config.issuers import VERIFIED_ISSUERS, registry
 
 
 def is_placeholder_address(address):
@@ -27,11 +27,6 @@ def generate_issuers():
     
     client = XRPLClient(testnet=True)
     
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'issuers.py')
-    
-    with open(config_path, 'r') as f:
-        content = f.read()
-    
     wallets_created = []
     
     # Check each issuer and generate wallet if needed
@@ -44,12 +39,8 @@ def generate_issuers():
             print(f"   Seed: {wallet.seed}")
             print()
             
-            # Replace placeholder in config
-            old_address = issuer["address"]
-            content = content.replace(
-                f'"address": "{old_address}"',
-                f'"address": "{wallet.classic_address}"'
-            )
+            # Write the new address to the registry file (bumps its version)
+            registry.update_issuer(issuer_key, address=wallet.classic_address)
             
             wallets_created.append({
                 "name": issuer["name"],
@@ -60,10 +51,6 @@ def generate_issuers():
             print(f"Skipping {issuer['name']} - already has address: {issuer['address']}")
     
     if wallets_created:
-        # Write updated config
-        with open(config_path, 'w') as f:
-            f.write(content)
-        
         print("=" * 60)
         print("✅ Config file updated automatically!")
         print("=" * 60)
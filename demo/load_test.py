@@ -0,0 +1,493 @@
+"""
+Load Test: opt-in -> products journey
+
+Simulates virtual users walking the real user journey against the API
+handlers (called in-process, see src/local_api.py) and a mock rippled in a
+separate process:
+
+    1. GET  /api/issuer-info/<issuer>
+    2. POST /api/check-trustline          (not opted in yet)
+    3. TrustSet                           (XRPLClient.create_trustline)
+    4. POST /api/check-trustline          (opted in, returns an access token)
+    5. GET  /api/issuer-products          (with the access token)
+    6. Payment for the first product      (submit_and_wait)
+
+After each journey the wallet's trustline is removed again (untimed) so the
+next journey starts as a new user. xrpl-py's submit_and_wait waits one second
+before looking for the validated result, so steps 3 and 6 take at least that.
+
+Profiles:
+    ramp  users are added evenly over --ramp seconds, then held until --duration
+    soak  all users run for a long --duration; memory is sampled throughout and
+          its growth per hour reported, so leaks and cache bloat show up
+
+Requests pass through admission control with the configured limits
+(ADMISSION_*, UPSTREAM_*), so shed requests show up as 429 errors; raise the
+limits through the environment to measure raw capacity.
+
+Usage:
+    python demo/load_test.py --profile ramp --users 50 --ramp 60 --duration 300
+    python demo/load_test.py --profile soak --users 20 --duration 14400 --tracemalloc
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+STEPS = ("issuer_info", "check_trustline", "trust_set", "recheck", "issuer_products", "payment")
+
+PROFILES = {
+    "ramp": {"ramp": 60.0, "duration": 300.0, "sample_every": 10.0},
+    "soak": {"ramp": 60.0, "duration": 4 * 3600.0, "sample_every": 60.0},
+}
+
+
+class LatencyHistogram:
+    """Log-bucketed latencies: bounded memory however long the run"""
+
+    _BASE = 1e-5      # 10 microseconds
+    _GROWTH = 1.05    # ~2.5% error on reported percentiles
+    _BUCKETS = 400    # covers up to ~30 minutes
+
+    def __init__(self):
+        self.counts = [0] * self._BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one latency"""
+        bucket = 0 if seconds <= self._BASE else int(math.log(seconds / self._BASE, self._GROWTH)) + 1
+        self.counts[min(bucket, self._BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Latency in seconds below which a fraction q of samples fall"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                # Geometric middle of the bucket, capped at the observed maximum
+                return min(self.max, self._BASE * self._GROWTH ** (bucket - 0.5))
+        return self.max
+
+
+class StepStats:
+    """Latency histogram and outcome counters of one journey step"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = {}
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    def record(self, seconds, error=None):
+        self.latency.record(seconds)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+
+def rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current where /proc is unavailable (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def growth_per_hour(samples):
+    """Least-squares slope of (seconds, bytes) samples, in bytes per hour (None if too few)"""
+    if len(samples) < 5:
+        return None
+    # The first samples include warm-up (imports, caches filling); skip a fifth
+    samples = samples[len(samples) // 5:]
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_b = sum(b for _, b in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not var:
+        return 0.0
+    return sum((t - mean_t) * (b - mean_b) for t, b in samples) / var * 3600
+
+
+def serve(port, addresses, ready):
+    """Run the mock ledger (in a child process) with the issuers and wallets funded"""
+    from config.issuers import VERIFIED_ISSUERS
+    from src.mock_ledger import MockLedger
+
+    ledger = MockLedger()
+    for issuer in VERIFIED_ISSUERS.values():
+        ledger.fund(issuer["address"])
+    for address in addresses:
+        ledger.fund(address, drops=10 ** 12)
+    ledger.start(port=port)
+    ready.set()
+    threading.Event().wait()
+
+
+class LoadTest:
+    """Virtual users running the journey, with per-step and memory statistics"""
+
+    def __init__(self, wallets, issuer, think=0.0):
+        """
+        Initialize load test
+
+        Args:
+            wallets: xrpl Wallets funded on the mock ledger (one per concurrent user or more)
+            issuer: Issuer dictionary ("key", "address", "currency") users opt in to
+            think: Mean pause between steps in seconds (randomized +/-50%)
+        """
+        self.issuer = issuer
+        self.think = think
+        self.wallets = queue.Queue()
+        for wallet in wallets:
+            self.wallets.put(wallet)
+        self.steps = {step: StepStats() for step in STEPS}
+        self.journeys = 0
+        self.failed_journeys = 0
+        self.samples = []
+        self.tracemalloc_samples = []
+        self.baseline_snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._users = []
+
+    # One journey
+
+    def _think(self):
+        if self.think:
+            time.sleep(self.think * random.uniform(0.5, 1.5))
+
+    def _timed(self, step, func):
+        """Run one step; returns its value, or raises _StepFailed after recording the error"""
+        start = time.perf_counter()
+        try:
+            value, error = func()
+        except Exception as e:
+            value, error = None, type(e).__name__
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.steps[step].record(elapsed, error)
+        if error:
+            raise _StepFailed(step)
+        self._think()
+        return value
+
+    @staticmethod
+    def _http_result(response, check=None):
+        status, _, body = response
+        data = json.loads(body) if body else {}
+        if status != 200:
+            return data, f"HTTP {status}"
+        if "error" in data:
+            return data, "error body"
+        if check is not None and not check(data):
+            return data, "unexpected body"
+        return data, None
+
+    def journey(self, wallet):
+        """Walk the six steps for one wallet"""
+        from xrpl.models.transactions import Payment
+        from xrpl.transaction import submit_and_wait
+        from xrpl.utils import xrp_to_drops
+
+        from src.local_api import call
+        from src.xrpl_client import XRPLClient
+
+        issuer = self.issuer
+        address = wallet.classic_address
+        check_body = {"wallet_address": address}
+
+        def transaction_result(response):
+            result = response.result["meta"]["TransactionResult"]
+            return response, None if result == "tesSUCCESS" else result
+
+        self._timed("issuer_info", lambda: self._http_result(
+            call("issuer-info", "GET", f"/api/issuer-info/{issuer['key']}")))
+        self._timed("check_trustline", lambda: self._http_result(
+            call("check-trustline", "POST", "/api/check-trustline", body=check_body)))
+        self._timed("trust_set", lambda: transaction_result(
+            XRPLClient(testnet=True).create_trustline(wallet, issuer["address"], issuer["currency"])))
+        grant = self._timed("recheck", lambda: self._http_result(
+            call("check-trustline", "POST", "/api/check-trustline", body=check_body),
+            check=lambda data: data.get("opted_in")))
+        page = self._timed("issuer_products", lambda: self._http_result(
+            call("issuer-products", "GET",
+                 f"/api/issuer-products?issuer={issuer['key']}&wallet_address={address}&limit=10",
+                 headers={"Authorization": f"Bearer {grant.get('access_token', '')}"}),
+            check=lambda data: data.get("products")))
+        product = page["products"][0]
+        self._timed("payment", lambda: transaction_result(submit_and_wait(
+            Payment(account=address, destination=issuer["address"],
+                    amount=xrp_to_drops(float(product.get("price_xrp") or 1))),
+            XRPLClient(testnet=True).client, wallet)))
+
+    def _reset(self, wallet):
+        """Remove the journey's trustline again (TrustSet with a zero limit; not timed)"""
+        from xrpl.models.transactions import TrustSet
+        from xrpl.transaction import autofill_and_sign
+
+        from src.cache import get_trustline_cache
+        from src.xrpl_client import XRPLClient, format_currency_code
+
+        client = XRPLClient(testnet=True)
+        tx = TrustSet(account=wallet.classic_address, limit_amount={
+            "currency": format_currency_code(self.issuer["currency"]),
+            "issuer": self.issuer["address"],
+            "value": "0",
+        })
+        try:
+            client.submit_blob(autofill_and_sign(tx, client.client, wallet).blob())
+        except Exception:
+            pass
+        get_trustline_cache().invalidate(wallet.classic_address)
+
+    def _user(self):
+        while not self._stop.is_set():
+            wallet = self.wallets.get()
+            try:
+                self.journey(wallet)
+                ok = True
+            except _StepFailed:
+                ok = False
+            finally:
+                self._reset(wallet)
+                self.wallets.put(wallet)
+            with self._lock:
+                self.journeys += 1
+                self.failed_journeys += not ok
+
+    # Run
+
+    def add_user(self):
+        thread = threading.Thread(target=self._user, daemon=True)
+        self._users.append(thread)
+        thread.start()
+
+    def sample_memory(self, elapsed):
+        """Record RSS (and traced Python heap when tracemalloc is on)"""
+        self.samples.append((elapsed, rss_bytes()))
+        if tracemalloc.is_tracing():
+            self.tracemalloc_samples.append((elapsed, tracemalloc.get_traced_memory()[0]))
+
+    def run(self, users, ramp, duration, sample_every, report_every, report):
+        """
+        Run the load
+
+        Args:
+            users: Concurrent virtual users at full load
+            ramp: Seconds over which users are added
+            duration: Total seconds to run (including the ramp)
+            sample_every: Seconds between memory samples
+            report_every: Seconds between progress lines
+            report: Callback(elapsed) for progress lines
+        """
+        start = time.monotonic()
+        next_sample = next_report = 0.0
+        try:
+            while True:
+                elapsed = time.monotonic() - start
+                if elapsed >= duration:
+                    break
+                target = users if ramp <= 0 else min(users, int(users * elapsed / ramp) + 1)
+                while len(self._users) < target:
+                    self.add_user()
+                if tracemalloc.is_tracing() and self.baseline_snapshot is None and elapsed >= ramp + sample_every:
+                    # Compare against a warmed-up heap, not the one before the first requests
+                    self.baseline_snapshot = tracemalloc.take_snapshot()
+                if elapsed >= next_sample:
+                    self.sample_memory(elapsed)
+                    next_sample += sample_every
+                if elapsed >= next_report:
+                    report(elapsed)
+                    next_report += report_every
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("\nInterrupted; finishing in-flight journeys...")
+        self._stop.set()
+        for thread in self._users:
+            thread.join(timeout=30)
+        self.sample_memory(time.monotonic() - start)
+        return time.monotonic() - start
+
+
+class _StepFailed(Exception):
+    """A journey step failed; the rest of the journey is skipped"""
+
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description="Load test the opt-in -> products journey")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="ramp")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--ramp", type=float, help="Seconds to reach full load")
+    parser.add_argument("--duration", type=float, help="Total seconds to run")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean pause between steps (seconds)")
+    parser.add_argument("--issuer", default="community_aid")
+    parser.add_argument("--sample-every", type=float, help="Seconds between memory samples")
+    parser.add_argument("--report-every", type=float, default=10.0)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Also trace the Python heap and report the top growing allocation sites")
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+    profile = PROFILES[args.profile]
+    ramp = profile["ramp"] if args.ramp is None else args.ramp
+    duration = profile["duration"] if args.duration is None else args.duration
+    sample_every = args.sample_every or profile["sample_every"]
+
+    # Point every client at the mock before the settings are imported
+    os.environ["XRPL_RPC_URL"] = f"http://127.0.0.1:{args.port}/"
+
+    from xrpl.wallet import Wallet
+
+    from config.issuers import get_issuer_by_key
+    from src.admission import get_admission
+    from src.cache import get_trustline_cache
+    from src.local_api import load_handler
+    from src.tx_signing import get_key_cache
+    from src.xrpl_client import _MISSING_ACCOUNTS
+
+    issuer = dict(get_issuer_by_key(args.issuer), key=args.issuer)
+
+    print("=" * 72)
+    print(f"Load Test ({args.profile}): {args.users} users, {ramp:.0f}s ramp, {duration:.0f}s total")
+    print("=" * 72)
+    print(f"Creating {args.users} wallets...")
+    wallets = [Wallet.create() for _ in range(args.users)]
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(args.port, [w.classic_address for w in wallets], ready), daemon=True
+    )
+    server.start()
+    if not ready.wait(60):
+        print("Mock ledger did not start")
+        return
+
+    # Load the handlers (and everything they import) before measuring memory
+    for name in ("issuer-info", "check-trustline", "issuer-products"):
+        load_handler(name)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    test = LoadTest(wallets, issuer, think=args.think)
+    started = time.monotonic()
+    last = {"journeys": 0, "at": 0.0}
+
+    def report(elapsed):
+        with test._lock:
+            journeys = test.journeys
+            requests = sum(stats.latency.count for stats in test.steps.values())
+            errors = sum(stats.error_count for stats in test.steps.values())
+        rate = (journeys - last["journeys"]) / max(elapsed - last["at"], 1e-9)
+        last.update(journeys=journeys, at=elapsed)
+        rss = test.samples[-1][1] / 1e6 if test.samples else 0.0
+        print(f"[{elapsed:7.0f}s] users {len(test._users):4}  journeys {journeys:7} ({rate:5.1f}/s)  "
+              f"errors {errors / max(requests, 1):6.2%}  rss {rss:7.1f} MB")
+
+    elapsed = test.run(args.users, ramp, duration, sample_every, args.report_every, report)
+    server.terminate()
+
+    # Per-step report
+    print()
+    print(f"{'step':18}{'count':>9}{'errors':>8}{'err%':>8}{'p50 ms':>10}{'p90 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}")
+    results = {"profile": args.profile, "users": args.users, "seconds": elapsed, "steps": {}}
+    total_requests = 0
+    for step in STEPS:
+        stats = test.steps[step]
+        latency = stats.latency
+        total_requests += latency.count
+        row = {
+            "count": latency.count,
+            "errors": stats.errors,
+            "p50_ms": latency.percentile(0.50) * 1000,
+            "p90_ms": latency.percentile(0.90) * 1000,
+            "p99_ms": latency.percentile(0.99) * 1000,
+            "max_ms": latency.max * 1000,
+        }
+        results["steps"][step] = row
+        print(f"{step:18}{latency.count:9}{stats.error_count:8}"
+              f"{stats.error_count / max(latency.count, 1):8.2%}{row['p50_ms']:10.1f}"
+              f"{row['p90_ms']:10.1f}{row['p99_ms']:10.1f}{row['max_ms']:10.1f}")
+        for error, count in sorted(stats.errors.items(), key=lambda item: -item[1]):
+            print(f"{'':20}{count:7}  {error}")
+
+    print()
+    results["journeys"] = test.journeys
+    results["failed_journeys"] = test.failed_journeys
+    results["journeys_per_second"] = test.journeys / elapsed
+    results["requests_per_second"] = total_requests / elapsed
+    print(f"Journeys: {test.journeys} ({test.failed_journeys} failed), "
+          f"{results['journeys_per_second']:.2f}/s; steps {results['requests_per_second']:.1f}/s")
+
+    # Memory
+    def trend(samples):
+        growth = growth_per_hour(samples)
+        return (None, "n/a (too few samples)") if growth is None else (growth / 1e6, f"{growth / 1e6:+.1f} MB/hour")
+
+    rss = [b for _, b in test.samples]
+    rss_growth, rss_trend = trend(test.samples)
+    results["memory"] = {
+        "rss_start_mb": rss[0] / 1e6,
+        "rss_end_mb": rss[-1] / 1e6,
+        "rss_peak_mb": max(rss) / 1e6,
+        "rss_growth_mb_per_hour": rss_growth,
+        "samples": len(rss),
+    }
+    print(f"RSS: {rss[0] / 1e6:.1f} MB -> {rss[-1] / 1e6:.1f} MB (peak {max(rss) / 1e6:.1f} MB), "
+          f"trend {rss_trend} over {len(rss)} samples")
+    if args.tracemalloc:
+        heap_growth, heap_trend = trend(test.tracemalloc_samples)
+        results["memory"]["heap_growth_mb_per_hour"] = heap_growth
+        print(f"Python heap trend {heap_trend}")
+        if test.baseline_snapshot is not None:
+            print("Top growth since warm-up:")
+            for stat in tracemalloc.take_snapshot().compare_to(test.baseline_snapshot, "lineno")[:8]:
+                print(f"    {stat.size_diff / 1024:+9.1f} KiB  {stat.traceback}")
+
+    caches = {
+        "trustline_cache": get_trustline_cache().metrics(),
+        "key_cache": len(get_key_cache()),
+        "missing_accounts": len(_MISSING_ACCOUNTS._expires),
+        "admission": get_admission().metrics(),
+    }
+    results["caches"] = caches
+    trustlines = caches["trustline_cache"]
+    print(f"Trustline cache: L1 hit rate {trustlines['l1_hit_rate']}, L2 hit rate {trustlines['l2_hit_rate']}, "
+          f"{trustlines['l1_entries']} entries")
+    print(f"Caches: {caches['key_cache']} cached keys, {caches['missing_accounts']} missing accounts, "
+          f"{caches['admission'].get('tracked_wallets', 0)} rate-limited wallets tracked")
+    print(f"Wall time {time.monotonic() - started:.0f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Prerender UI
+
+Builds a static opt-in and products page per issuer with the issuer descriptor
+and catalog inlined, plus content-hashed JSON assets (see src/prerender.py).
+Runs as the Vercel build command; run it locally after editing
+config/issuers.json or config/products/:
+    python demo/prerender_ui.py [--issuer community_aid]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.prerender import Prerenderer
+
+
+def main():
+    """Build the pages"""
+    parser = argparse.ArgumentParser(description="Prerender issuer pages and catalogs")
+    parser.add_argument("--issuer", action="append", help="Issuer key to build (repeatable; default: all)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Prerendering UI")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    result = Prerenderer().build(args.issuer)
+    elapsed = time.perf_counter() - start
+
+    for issuer_key, entry in result["manifest"].items():
+        print(f"   ✅ {issuer_key}: {entry['opt_in']}, {entry['products']}")
+        print(f"      {entry['issuer']}")
+        print(f"      {entry['catalog']}")
+    print()
+    if result["removed"]:
+        print(f"Removed {result['removed']} stale files")
+    print(f"Built {len(result['manifest'])} issuers in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
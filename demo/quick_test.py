@@ -118,7 +118,7 @@ def quick_test():
         print("Troubleshooting:")
         print("1. Check internet connection")
         print("2. Verify XRPL testnet is accessible")
-        print("3. Check if issuer addresses in config/issuers.py are valid")
+        print("3. Check if issuer addresses in config/issuers.json are valid")
         return False
     
     return True
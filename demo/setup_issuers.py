@@ -2,7 +2,7 @@
 Setup Issuers Script
 
 Creates test issuer wallets for the demo.
-Run this to generate issuer addresses for config/issuers.py
+Run this to generate issuer addresses for config/issuers.json
 """
 import sys
 import os
@@ -10,6 +10,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.xrpl_client import XRPLClient
+from config.issuers import registry
 
 
 def setup_issuers():
@@ -57,10 +58,10 @@ def setup_issuers():
     
     print()
     print("=" * 60)
-    print("Configuration for config/issuers.py")
+    print("Configuration for config/issuers.json")
     print("=" * 60)
     print()
-    print("Update your config/issuers.py with these addresses:")
+    print("Update your config/issuers.json with these addresses:")
     print()
     print(f'    "community_aid": {{')
     print(f'        "address": "{guidance_wallet.classic_address}",')
@@ -82,39 +83,45 @@ def setup_issuers():
     print()
     
     # Ask if they want to auto-update config
-    auto_update = input("Auto-update config/issuers.py? (y/n): ").lower().strip()
+    auto_update = input("Auto-update config/issuers.json? (y/n): ").lower().strip()
     
     if auto_update == 'y':
-        update_config_file(guidance_wallet.classic_address, rlusd_address)
+        update_config_file(guidance_wallet.classic_address,
+                           rlusd_address if create_rlusd == 'y' else None)
         print("✅ Config file updated!")
     else:
-        print("Please manually update config/issuers.py with the addresses above.")
+        print("Please manually update config/issuers.json with the addresses above.")
     
     print()
     print("✅ Issuer setup complete! You can now run the full demo.")
 
 
-def update_config_file(guidance_address, rlusd_address):
-    """Update config/issuers.py with actual addresses"""
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'issuers.py')
-    
-    with open(config_path, 'r') as f:
-        content = f.read()
-    
-    # Replace guidance issuer address
-    content = content.replace(
-        '"address": "rYOUR_ISSUER_ADDRESS"',
-        f'"address": "{guidance_address}"'
-    )
+# Addresses shipped in config/issuers.json until setup replaces them
+PLACEHOLDER_ADDRESSES = {
+    "community_aid": "rYOUR_ISSUER_ADDRESS",
+    "rlusd": "rRLUSD_ISSUER_ADDRESS",
+}
+
+
+def update_config_file(guidance_address, rlusd_address=None):
+    """
+    Update config/issuers.json with actual addresses
     
-    # Replace RLUSD issuer address
-    content = content.replace(
-        '"address": "rRLUSD_ISSUER_ADDRESS"',
-        f'"address": "{rlusd_address}"'
-    )
+    Only issuers whose address is still a placeholder are changed, so a real
+    address already in the file is never overwritten.
     
-    with open(config_path, 'w') as f:
-        f.write(content)
+    Args:
+        guidance_address: New guidance issuer address
+        rlusd_address: New RLUSD issuer address (None: leave RLUSD as it is)
+    """
+    for issuer_key, address in (("community_aid", guidance_address), ("rlusd", rlusd_address)):
+        issuer = registry.get(issuer_key)
+        if address is None or issuer is None:
+            continue
+        if issuer["address"] != PLACEHOLDER_ADDRESSES[issuer_key]:
+            print(f"Keeping existing {issuer_key} address {issuer['address']}")
+            continue
+        registry.update_issuer(issuer_key, address=address)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ Gates resources based on trustlines. Only guidance issuer trustline is required.
 RLUSD trustline is optional and doesn't gate access.
 """
 from src.xrpl_client import XRPLClient
+from src.access_tokens import get_signer
+from src.cache import get_trustline_state
+from src.latency_budget import get_trustline_decision
 from config.issuers import VERIFIED_ISSUERS, get_required_issuers
 
 
@@ -33,21 +36,15 @@ class AccessControl:
         Returns:
             Dictionary with access status and permitted resources
         """
-        trustlines = self.client.get_user_trustlines(user_address)
-        
         # Check required issuers (guidance issuer only)
         required_issuers = get_required_issuers()
         has_access = False
         permitted_resources = []
         
-        for issuer in required_issuers:
-            has_tl = self.client.has_trustline(
-                user_address,
-                issuer["address"],
-                issuer["currency"]
-            )
-            
-            if has_tl:
+        entries, _ = self.client.get_trustline_entries(user_address, required_issuers)
+        
+        for issuer, entry in zip(required_issuers, entries):
+            if entry is not None:
                 has_access = True
                 permitted_resources.extend(issuer["resources"])
         
@@ -85,6 +82,62 @@ class AccessControl:
                 ]
             }
     
+    def get_opt_in_state(self, user_address, budget=None):
+        """
+        Check which required issuers a user has opted into
+        
+        Answered from the trustline cache when possible (see src/cache.py);
+        otherwise each issuer's trustline is fetched directly by its ledger
+        object ID, with the lookups running concurrently.
+        
+        Args:
+            user_address: User's XRPL address
+            budget: Seconds to wait for the ledger before answering with the
+                last known decision (see src/latency_budget.py); None waits
+                for the ledger
+            
+        Returns:
+            Dictionary with opted-in issuer keys, the validated ledger index
+            and whether the answer is a stale last known decision
+        """
+        required_issuers = get_required_issuers()
+        if budget is None:
+            lines, ledger_index = get_trustline_state(self.client, user_address, required_issuers)
+            stale, age = False, 0.0
+        else:
+            decision = get_trustline_decision(self.client, user_address, required_issuers, budget)
+            lines, ledger_index = decision["lines"], decision["ledger_index"]
+            stale, age = decision["stale"], decision["age_seconds"]
+        
+        opted_in_keys = [issuer["key"] for issuer in required_issuers if lines[issuer["key"]]]
+        
+        return {
+            "wallet_address": user_address,
+            "opted_in_issuer_keys": opted_in_keys,
+            "ledger_index": ledger_index,
+            "stale": stale,
+            "age_seconds": age
+        }
+    
+    def resolve_opted_in_issuers(self, user_address, token=None):
+        """
+        Get the issuer keys a user has opted into, preferring a signed grant
+        
+        A valid access grant answers without touching the ledger; otherwise
+        (no grant, expired or revoked) the ledger is queried.
+        
+        Args:
+            user_address: User's XRPL address
+            token: Access token from /api/check-trustline (optional)
+            
+        Returns:
+            List of opted-in issuer keys
+        """
+        grant = get_signer().verify(token, user_address) if token else None
+        if grant is not None:
+            return list(grant["i"])
+        return self.get_opt_in_state(user_address)["opted_in_issuer_keys"]
+    
     def format_rlusd_example(self, amount, description):
         """
         Format financial example using RLUSD as unit of account
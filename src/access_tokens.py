@@ -0,0 +1,190 @@
+"""
+Access Tokens
+
+Short-lived, HMAC-signed access grants issued once a trustline check succeeds.
+A grant records the wallet, the issuer keys it has opted into and the validated
+ledger index the check ran against, so gated endpoints can verify access
+without another ledger lookup until the grant expires or is revoked.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from config import settings
+
+
+def _b64encode(data):
+    """URL-safe base64 without padding"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    """Decode URL-safe base64 that may have had its padding stripped"""
+    padded = text + "=" * (-len(text) % 4)
+    return base64.urlsafe_b64decode(padded.encode("ascii"))
+
+
+class RevocationFilter:
+    """Bloom filter of revoked grant ids and wallets
+
+    False positives only cause an extra ledger lookup, never wrongful access.
+    """
+
+    def __init__(self, num_bits=None, num_hashes=None):
+        """
+        Initialize revocation filter
+
+        Args:
+            num_bits: Filter size in bits (default from settings)
+            num_hashes: Number of bit positions per entry (default from settings)
+        """
+        self.num_bits = num_bits or settings.REVOCATION_BLOOM_BITS
+        self.num_hashes = num_hashes or settings.REVOCATION_BLOOM_HASHES
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, entry):
+        digest = hashlib.sha256(entry.encode("utf-8")).digest()
+        # Double hashing: position_i = h1 + i * h2
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, entry):
+        """Mark an entry (grant id or "wallet:<address>") as revoked"""
+        for pos in self._positions(entry):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, entry):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(entry))
+
+    @classmethod
+    def from_settings(cls):
+        """Build the filter from ACCESS_TOKEN_REVOKED and ACCESS_TOKEN_REVOCATION_FILE"""
+        revocations = cls()
+        for entry in settings.ACCESS_TOKEN_REVOKED:
+            revocations.add(entry)
+        path = settings.ACCESS_TOKEN_REVOCATION_FILE
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    entry = line.strip()
+                    if entry and not entry.startswith("#"):
+                        revocations.add(entry)
+        return revocations
+
+
+class AccessTokenSigner:
+    """Issues and verifies signed access grants"""
+
+    def __init__(self, secret=None, ttl_seconds=None, revocations=None):
+        """
+        Initialize token signer
+
+        Args:
+            secret: HMAC secret (default from settings, random if unset)
+            ttl_seconds: Grant lifetime in seconds (default from settings)
+            revocations: RevocationFilter instance (default from settings)
+        """
+        secret = secret or settings.ACCESS_TOKEN_SECRET
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        # Without a shared secret grants only verify on the instance that issued them
+        self.secret = secret or os.urandom(32)
+        self.ttl_seconds = ttl_seconds or settings.ACCESS_TOKEN_TTL_SECONDS
+        self.revocations = revocations if revocations is not None else RevocationFilter.from_settings()
+
+    def _sign(self, body):
+        return hmac.new(self.secret, body.encode("ascii"), hashlib.sha256).digest()
+
+    def issue(self, wallet_address, issuer_keys, ledger_index):
+        """
+        Issue a grant for a wallet's opted-in issuers
+
+        Args:
+            wallet_address: User's XRPL address
+            issuer_keys: Issuer keys the wallet has trustlines to
+            ledger_index: Validated ledger index the trustline check ran against
+
+        Returns:
+            Dictionary with the token string and its expiry (unix seconds)
+        """
+        now = int(time.time())
+        payload = {
+            "w": wallet_address,
+            "i": sorted(issuer_keys),
+            "l": ledger_index,
+            "iat": now,
+            "exp": now + self.ttl_seconds,
+            "jti": _b64encode(os.urandom(9)),
+        }
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        token = f"{body}.{_b64encode(self._sign(body))}"
+        return {"token": token, "expires_at": payload["exp"]}
+
+    def verify(self, token, wallet_address, issuer_key=None):
+        """
+        Verify a grant without touching the ledger
+
+        Args:
+            token: Token string from issue()
+            wallet_address: Wallet the caller is asking about
+            issuer_key: Issuer key the grant must cover (optional)
+
+        Returns:
+            Decoded payload if the grant is valid, otherwise None
+        """
+        if not token or "." not in token:
+            return None
+        body, _, signature = token.partition(".")
+        try:
+            if not hmac.compare_digest(_b64decode(signature), self._sign(body)):
+                return None
+            payload = json.loads(_b64decode(body))
+        except (ValueError, TypeError):
+            return None
+
+        if payload.get("w") != wallet_address:
+            return None
+        if payload.get("exp", 0) <= time.time():
+            return None
+        if issuer_key is not None and issuer_key not in payload.get("i", []):
+            return None
+        if payload.get("jti") in self.revocations or f"wallet:{wallet_address}" in self.revocations:
+            return None
+        return payload
+
+
+_default_signer = None
+
+
+def get_signer():
+    """Get the process-wide signer (created on first use)"""
+    global _default_signer
+    if _default_signer is None:
+        _default_signer = AccessTokenSigner()
+    return _default_signer
+
+
+def token_from_request(headers, query_params=None):
+    """
+    Extract an access token from a request
+
+    Looks at "Authorization: Bearer <token>" first, then the access_token
+    query parameter.
+
+    Args:
+        headers: Request headers (BaseHTTPRequestHandler.headers)
+        query_params: Parsed query string from parse_qs (optional)
+
+    Returns:
+        Token string or None
+    """
+    auth = headers.get("Authorization", "") if headers else ""
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    if query_params:
+        return query_params.get("access_token", [None])[0]
+    return None
@@ -0,0 +1,234 @@
+"""
+Admission Control
+
+Protects the rippled backend from bursts. Every upstream request passes:
+
+    1. A per-wallet token bucket: a single wallet hammering the API is
+       rejected immediately. A lookup that fans out into several requests
+       (one per issuer, see XRPLClient.get_trustline_entries) is charged one
+       token, so the wallet limits count gate checks, not raw calls.
+    2. A global token bucket: bursts above the sustained rate wait for tokens
+       until the queue deadline.
+    3. A bounded concurrency limit: at most UPSTREAM_MAX_CONCURRENCY requests
+       are in flight; others queue (up to UPSTREAM_MAX_QUEUE) until the deadline.
+
+Requests that cannot be admitted raise AdmissionRejected, which the API turns
+into 429 with Retry-After. Counters are per process (per serverless instance).
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being sent upstream"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Too many requests ({reason}); retry in {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket: refills at rate tokens/second up to burst"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now=None):
+        """
+        Take one token if available (caller holds the controller lock)
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Token buckets plus a bounded, deadline-limited upstream queue"""
+
+    def __init__(self, wallet_rate=None, wallet_burst=None, global_rate=None, global_burst=None,
+                 max_concurrency=None, max_queue=None, queue_timeout=None, max_wallets=10000):
+        """
+        Initialize admission controller
+
+        Args:
+            wallet_rate: Sustained upstream requests/second per wallet
+            wallet_burst: Burst size per wallet
+            global_rate: Sustained upstream requests/second for the process
+            global_burst: Global burst size
+            max_concurrency: Upstream requests in flight at once
+            max_queue: Requests allowed to wait for a slot; more are shed
+            queue_timeout: Longest a request may wait before being shed (seconds)
+            max_wallets: Per-wallet buckets kept (least recently used are dropped)
+
+        All defaults come from settings.
+        """
+        self.wallet_rate = wallet_rate or settings.ADMISSION_WALLET_RATE
+        self.wallet_burst = wallet_burst or settings.ADMISSION_WALLET_BURST
+        self.max_concurrency = max_concurrency or settings.UPSTREAM_MAX_CONCURRENCY
+        self.max_queue = settings.UPSTREAM_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or settings.UPSTREAM_QUEUE_TIMEOUT_SECONDS
+        self.max_wallets = max_wallets
+        self._global = TokenBucket(
+            global_rate or settings.ADMISSION_GLOBAL_RATE,
+            global_burst or settings.ADMISSION_GLOBAL_BURST
+        )
+        self._wallets = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+        self.stats = {
+            "admitted": 0,
+            "rejected_wallet_rate": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "max_queue_depth": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _take_wallet_token(self, wallet, now):
+        bucket = self._wallets.get(wallet)
+        if bucket is None:
+            bucket = self._wallets[wallet] = TokenBucket(self.wallet_rate, self.wallet_burst)
+            if len(self._wallets) > self.max_wallets:
+                # An evicted bucket was idle, i.e. full; dropping it loses nothing
+                self._wallets.popitem(last=False)
+        else:
+            self._wallets.move_to_end(wallet)
+        return bucket.take(now)
+
+    def charge_wallet(self, wallet):
+        """
+        Take one token from a wallet's bucket without holding an upstream slot
+
+        For lookups that then send several requests with admit(None).
+
+        Raises:
+            AdmissionRejected: If the wallet is over its rate
+        """
+        with self._lock:
+            wait = self._take_wallet_token(wallet, time.monotonic())
+            if wait:
+                self.stats["rejected_wallet_rate"] += 1
+                raise AdmissionRejected("wallet_rate", wait)
+
+    def _reject(self, reason, retry_after):
+        with self._lock:
+            self.stats[f"rejected_{reason}"] += 1
+        raise AdmissionRejected(reason, retry_after)
+
+    @contextmanager
+    def admit(self, wallet=None):
+        """
+        Hold an upstream slot for the duration of one request
+
+        Args:
+            wallet: Wallet the request is about (None skips the per-wallet bucket)
+
+        Raises:
+            AdmissionRejected: If the request is shed
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+
+        with self._lock:
+            if wallet is not None:
+                wait = self._take_wallet_token(wallet, start)
+                if wait:
+                    self.stats["rejected_wallet_rate"] += 1
+                    raise AdmissionRejected("wallet_rate", wait)
+            if self._waiting >= self.max_queue:
+                self.stats["rejected_queue_full"] += 1
+                raise AdmissionRejected("queue_full", self.queue_timeout)
+            self._waiting += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+
+        acquired = False
+        try:
+            # Global rate: wait for a token rather than failing the burst outright
+            while True:
+                with self._lock:
+                    wait = self._global.take()
+                if not wait:
+                    break
+                if time.monotonic() + wait > deadline:
+                    self._reject("deadline", wait)
+                time.sleep(wait)
+            acquired = self._slots.acquire(timeout=max(0.0, deadline - time.monotonic()))
+            if not acquired:
+                self._reject("deadline", self.queue_timeout)
+        finally:
+            waited = time.monotonic() - start
+            with self._lock:
+                self._waiting -= 1
+                if acquired:
+                    self._in_flight += 1
+                    self.stats["admitted"] += 1
+                    self.stats["wait_seconds_total"] += waited
+                    self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def metrics(self):
+        """
+        Snapshot of admission metrics
+
+        Returns:
+            Dictionary with current queue depth and in-flight count, counters
+            and the mean/max queue wait in milliseconds
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            queue_depth = self._waiting
+            in_flight = self._in_flight
+            tracked_wallets = len(self._wallets)
+        admitted = stats.pop("admitted")
+        wait_total = stats.pop("wait_seconds_total")
+        wait_max = stats.pop("wait_seconds_max")
+        return {
+            "queue_depth": queue_depth,
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            "tracked_wallets": tracked_wallets,
+            "admitted": admitted,
+            "wait_ms_mean": round(1000 * wait_total / admitted, 3) if admitted else 0.0,
+            "wait_ms_max": round(1000 * wait_max, 3),
+            **stats,
+        }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission():
+    """Process-wide admission controller shared by every XRPLClient"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,130 @@
+"""
+Agent Context
+
+Compact gated context for the Dify agent: which issuers a wallet has opted
+into, with their resources and products, in one small JSON document.
+
+The document depends only on the set of permitted issuers, so it is encoded
+once per issuer set (and registry and product catalog version) and shared by every wallet with the
+same opt-ins; a fields= selection is cut from its pre-encoded parts. Each
+conversation remembers its wallet's issuer set for a short TTL, so repeat
+turns are answered from memory without a ledger lookup.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from config import settings
+from config.issuers import VERIFIED_ISSUERS, get_issuer_products, registry
+from src.response_encoding import PreEncoded, encode_json, parse_fields
+
+
+def build_context(issuer_keys):
+    """
+    Build the compact context document for a set of issuers
+
+    Args:
+        issuer_keys: Opted-in issuer keys
+
+    Returns:
+        Dictionary with permitted issuers, resources and product summaries
+    """
+    context = {"permitted": [], "resources": {}, "products": {}}
+    for key in issuer_keys:
+        issuer = VERIFIED_ISSUERS.get(key)
+        if issuer is None:
+            continue
+        context["permitted"].append({"key": key, "name": issuer["name"]})
+        context["resources"][key] = issuer.get("resources", [])
+        context["products"][key] = [
+            {"id": p["id"], "name": p["name"], "price_xrp": p.get("price_xrp")}
+            for p in get_issuer_products(key)
+        ]
+    return context
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+class AgentContextCache:
+    """Per-conversation opt-in cache plus pre-encoded context documents"""
+
+    def __init__(self, ttl_seconds=None, max_conversations=10000):
+        """
+        Initialize agent context cache
+
+        Args:
+            ttl_seconds: How long a conversation reuses its opt-in result
+            max_conversations: Conversations remembered (least recently used evicted)
+        """
+        self.ttl_seconds = ttl_seconds or settings.AGENT_CONTEXT_TTL_SECONDS
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._conversations = OrderedDict()
+        self._documents = {}
+
+    def get_issuer_keys(self, wallet_address, conversation_id):
+        """Cached (issuer_keys, ledger_index) for a conversation, or None"""
+        key = (wallet_address, conversation_id)
+        with self._lock:
+            entry = self._conversations.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                return None
+            self._conversations.move_to_end(key)
+            return entry[0], entry[1]
+
+    def put_issuer_keys(self, wallet_address, conversation_id, issuer_keys, ledger_index):
+        """Remember a conversation's opt-in result"""
+        key = (wallet_address, conversation_id)
+        with self._lock:
+            self._conversations[key] = (tuple(issuer_keys), ledger_index, time.monotonic() + self.ttl_seconds)
+            self._conversations.move_to_end(key)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def get_document(self, issuer_keys, fields=None):
+        """
+        Encoded context document for an issuer set
+
+        Args:
+            issuer_keys: Opted-in issuer keys
+            fields: fields= selector (optional, see src/response_encoding.py)
+
+        Returns:
+            Tuple of (JSON bytes, ETag string)
+
+        Raises:
+            ValueError: For a malformed field selector
+        """
+        selector = parse_fields(fields)
+        registry.refresh()
+        keys = tuple(sorted(issuer_keys))
+        # Registry reloads change the generation, catalog edits their file signature
+        version = (registry.generation, tuple(registry.catalog_signature(key) for key in keys))
+        cached = self._documents.get(keys)
+        if cached is not None and cached[0] == version:
+            document = cached[1]
+        else:
+            context = PreEncoded(build_context(keys))
+            document = (context.body(), _etag(context.body()), context)
+            with self._lock:
+                # Drop documents from older registry generations
+                self._documents = {k: v for k, v in self._documents.items() if v[0][0] == registry.generation}
+                self._documents[keys] = (version, document)
+        if selector is None:
+            return document[0], document[1]
+        body = encode_json(document[2], selector)
+        return body, _etag(body)
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Get the process-wide agent context cache (created on first use)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AgentContextCache()
+    return _default_cache
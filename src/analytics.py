@@ -0,0 +1,380 @@
+"""
+Issuer Analytics
+
+Running opt-in, churn and purchase aggregates per issuer, updated as ledger
+events are ingested (src/ingest.py, or apply_transaction for any stream of
+validated transactions) and never recomputed from history.
+
+For each issuer the aggregates are:
+    totals          opt-ins (trustline creates), churn (trustline removals),
+                    purchases and revenue in drops
+    days            the same counters per UTC day
+    products        purchases and revenue per product id, overall and per day
+
+Events may arrive in any order (dumps given newest first, overlapping
+account_tx pages). Each issuer keeps the key of every event counted per event
+stream (ledger, transaction index and holder or transaction hash), so
+replaying a dump or a page is not double counted and an older event is still
+counted the first time it is seen.
+
+/api/issuer-stats reads a saved snapshot (ANALYTICS_PATH), reloaded when the
+file changes; answering costs one dictionary lookup per requested day. The
+event keys are only needed to keep ingesting, so save() writes them to a
+separate keys file named by the snapshot and the served file stays the size
+of the aggregates.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from config import settings
+from src.ledger_events import CONSENT_CREATE, CONSENT_REMOVE, extract_consent_events, extract_purchase_event
+from src.xrpl_client import format_currency_code
+
+
+SECONDS_PER_DAY = 86400
+MAX_STATS_DAYS = 366
+
+# Counter slots in totals and day buckets
+_OPT_INS, _CHURN, _PURCHASES, _DROPS = range(4)
+
+
+def day_number(unix_time):
+    """UTC day number (days since 1970-01-01) of a unix time"""
+    return int(unix_time) // SECONDS_PER_DAY
+
+
+def day_string(day):
+    """ISO date of a day number"""
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def drops_to_xrp_string(drops):
+    """Exact XRP amount for a drop count (e.g., 6500000 -> "6.5")"""
+    whole, fraction = divmod(drops, 1_000_000)
+    return f"{whole}.{fraction:06d}".rstrip("0").rstrip(".")
+
+
+class _IssuerStats:
+    """Materialized aggregates of one issuer"""
+
+    __slots__ = ("totals", "days", "products", "product_days", "seen", "latest", "floors")
+
+    def __init__(self):
+        self.totals = [0, 0, 0, 0]
+        self.days = {}
+        self.products = {}
+        self.product_days = {}
+        # stream ("consent" or "purchase") -> keys (ledger_index, tx_index, ...) of counted events
+        self.seen = {}
+        # stream -> newest ledger counted
+        self.latest = {}
+        # stream -> ledger at and below which events count as seen (snapshots
+        # from before per-event keys only recorded their newest ledger)
+        self.floors = {}
+
+    def accept(self, stream, ledger_index, key):
+        """
+        Check an event against the keys already counted in its stream and record it
+
+        Returns:
+            True if the event is new and should be counted
+        """
+        if ledger_index is None:
+            return True
+        floor = self.floors.get(stream)
+        if floor is not None and ledger_index < floor:
+            return False
+        seen = self.seen.get(stream)
+        if seen is None:
+            seen = self.seen[stream] = set()
+        key = (ledger_index, *key)
+        if key in seen:
+            return False
+        seen.add(key)
+        if ledger_index > self.latest.get(stream, -1):
+            self.latest[stream] = ledger_index
+        return True
+
+    @property
+    def as_of_ledger(self):
+        """Newest ledger applied (None if nothing was)"""
+        return max(self.latest.values(), default=None)
+
+    def bump(self, slot, day, amount=1):
+        self.totals[slot] += amount
+        if day is not None:
+            bucket = self.days.get(day)
+            if bucket is None:
+                bucket = self.days[day] = [0, 0, 0, 0]
+            bucket[slot] += amount
+
+    def add_purchase(self, product_id, drops, day):
+        self.bump(_PURCHASES, day)
+        self.bump(_DROPS, day, drops)
+        product = self.products.get(product_id)
+        if product is None:
+            product = self.products[product_id] = [0, 0]
+        product[0] += 1
+        product[1] += drops
+        if day is not None:
+            bucket = self.product_days.get((product_id, day))
+            if bucket is None:
+                bucket = self.product_days[(product_id, day)] = [0, 0]
+            bucket[0] += 1
+            bucket[1] += drops
+
+
+class IssuerAnalytics:
+    """Incrementally maintained analytics for a set of issuers"""
+
+    def __init__(self, issuers):
+        """
+        Initialize analytics
+
+        Args:
+            issuers: Issuer dictionaries ("address", "currency") to track
+        """
+        self.issuers_by_address = {
+            issuer["address"]: format_currency_code(issuer["currency"]) for issuer in issuers
+        }
+        self._issuer_addresses = set(self.issuers_by_address)
+        self._stats = {address: _IssuerStats() for address in self.issuers_by_address}
+        self._lock = threading.Lock()
+        # snapshot path -> (generation, keys file name) last loaded or saved
+        self._generations = {}
+
+    def _issuer(self, issuer_address):
+        stats = self._stats.get(issuer_address)
+        if stats is None:
+            stats = self._stats[issuer_address] = _IssuerStats()
+        return stats
+
+    def add_consent_event(self, issuer_address, holder, ledger_index, tx_index, kind, close_time=None):
+        """
+        Count one trustline event (modify events do not change the counters)
+
+        Args:
+            issuer_address: Issuer's XRPL address
+            holder: Holder's XRPL address
+            ledger_index: Ledger the transaction validated in
+            tx_index: Transaction's index within that ledger
+            kind: "create", "modify" or "remove"
+            close_time: Unix close time of the ledger (None: totals only)
+
+        Returns:
+            False if the event was already counted
+        """
+        if kind not in (CONSENT_CREATE, CONSENT_REMOVE):
+            return True
+        day = day_number(close_time) if close_time is not None else None
+        with self._lock:
+            stats = self._issuer(issuer_address)
+            if not stats.accept("consent", ledger_index, (tx_index, holder, kind)):
+                return False
+            stats.bump(_OPT_INS if kind == CONSENT_CREATE else _CHURN, day)
+            return True
+
+    def add_purchase(self, issuer_address, buyer, product_id, drops, ledger_index, tx_index,
+                     close_time=None, tx_hash=None):
+        """
+        Count one product purchase (fields as returned by extract_purchase_event)
+
+        Returns:
+            False if the purchase was already counted
+        """
+        day = day_number(close_time) if close_time is not None else None
+        with self._lock:
+            stats = self._issuer(issuer_address)
+            if not stats.accept("purchase", ledger_index, (tx_index, tx_hash or buyer)):
+                return False
+            stats.add_purchase(product_id, drops, day)
+            return True
+
+    def apply_transaction(self, entry):
+        """
+        Count the consent events and purchase in one validated transaction
+
+        Args:
+            entry: Transaction record (account_tx entry or dump line)
+        """
+        for issuer_address, holder, ledger_index, tx_index, kind, _, close_time in \
+                extract_consent_events(entry, self.issuers_by_address):
+            self.add_consent_event(issuer_address, holder, ledger_index, tx_index, kind, close_time)
+        purchase = extract_purchase_event(entry, self._issuer_addresses)
+        if purchase is not None:
+            self.add_purchase(*purchase)
+
+    def get_stats(self, issuer_address, days=30, end_day=None, product_id=None):
+        """
+        Aggregates for one issuer
+
+        Args:
+            issuer_address: Issuer's XRPL address
+            days: Length of the daily series (capped at MAX_STATS_DAYS)
+            end_day: Last day of the series as a day number (default: today, UTC)
+            product_id: Restrict purchases in the daily series to one product (optional)
+
+        Returns:
+            Dictionary with totals, daily (oldest first), products (by revenue)
+            and as_of_ledger (None if nothing was ingested for the issuer)
+        """
+        days = max(1, min(days, MAX_STATS_DAYS))
+        end_day = day_number(time.time()) if end_day is None else end_day
+        with self._lock:
+            stats = self._stats.get(issuer_address) or _IssuerStats()
+            totals = list(stats.totals)
+            daily = []
+            for day in range(end_day - days + 1, end_day + 1):
+                opt_ins, churn, purchases, drops = stats.days.get(day, (0, 0, 0, 0))
+                if product_id is not None:
+                    purchases, drops = stats.product_days.get((product_id, day), (0, 0))
+                daily.append({
+                    "date": day_string(day),
+                    "opt_ins": opt_ins,
+                    "churn": churn,
+                    "purchases": purchases,
+                    "revenue_xrp": drops_to_xrp_string(drops),
+                })
+            products = sorted(stats.products.items(), key=lambda item: (-item[1][1], item[0]))
+            as_of_ledger = stats.as_of_ledger
+
+        return {
+            "totals": {
+                "opt_ins": totals[_OPT_INS],
+                "churn": totals[_CHURN],
+                "net_opt_ins": totals[_OPT_INS] - totals[_CHURN],
+                "purchases": totals[_PURCHASES],
+                "revenue_xrp": drops_to_xrp_string(totals[_DROPS]),
+            },
+            "daily": daily,
+            "products": [
+                {"id": pid, "purchases": count, "revenue_xrp": drops_to_xrp_string(drops)}
+                for pid, (count, drops) in products
+            ],
+            "as_of_ledger": as_of_ledger,
+        }
+
+    def save(self, path):
+        """
+        Atomically write the aggregates to a JSON file
+
+        The keys of counted events go to a keys file next to it
+        (<path>.<generation>.keys) that the snapshot names. The keys file is
+        written first and the previous one removed last, so replacing the
+        snapshot commits both at once.
+        """
+        with self._lock:
+            data = {
+                address: {
+                    "totals": stats.totals,
+                    "days": [[day, *bucket] for day, bucket in stats.days.items()],
+                    "products": [[pid, *bucket] for pid, bucket in stats.products.items()],
+                    "product_days": [[pid, day, *bucket] for (pid, day), bucket in stats.product_days.items()],
+                    "latest": stats.latest,
+                    "floors": stats.floors,
+                }
+                for address, stats in self._stats.items()
+            }
+            seen = {
+                address: {stream: [list(key) for key in keys] for stream, keys in stats.seen.items()}
+                for address, stats in self._stats.items()
+            }
+        previous = self._generations.get(path)
+        generation = previous[0] + 1 if previous is not None else 1
+        keys_name = f"{os.path.basename(path)}.{generation}.keys"
+        keys_path = os.path.join(os.path.dirname(path), keys_name)
+        with open(keys_path, "w") as f:
+            json.dump({"issuers": seen}, f, separators=(",", ":"))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"issuers": data, "generation": generation, "keys": keys_name}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._generations[path] = (generation, keys_name)
+        if previous is not None and previous[1] != keys_name:
+            try:
+                os.remove(os.path.join(os.path.dirname(path), previous[1]))
+            except OSError:
+                pass
+
+    def load(self, path, keys=True):
+        """
+        Load aggregates written by save()
+
+        Args:
+            path: Snapshot file
+            keys: Also load the keys of counted events, which ingestion needs to
+                continue without double counting (serving does not)
+        """
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+        data = snapshot.get("issuers", {})
+        seen = {}
+        if keys and snapshot.get("keys"):
+            with open(os.path.join(os.path.dirname(path), snapshot["keys"]), "r") as f:
+                seen = json.load(f).get("issuers", {})
+        loaded = {}
+        for address, saved in data.items():
+            stats = _IssuerStats()
+            stats.totals = saved["totals"]
+            stats.days = {day: bucket for day, *bucket in saved["days"]}
+            stats.products = {pid: bucket for pid, *bucket in saved["products"]}
+            stats.product_days = {(pid, day): bucket for pid, day, *bucket in saved["product_days"]}
+            # Older snapshots kept the keys inline
+            streams = seen.get(address, saved.get("seen", {}))
+            stats.seen = {stream: {tuple(key) for key in event_keys} for stream, event_keys in streams.items()}
+            stats.floors = dict(saved.get("floors", {}))
+            # Older snapshots kept one watermark per stream: its ledger's event keys
+            for stream, (ledger_index, event_keys) in saved.get("watermarks", {}).items():
+                stats.seen.setdefault(stream, set()).update((ledger_index, *key) for key in event_keys)
+                stats.floors[stream] = ledger_index
+            stats.latest = saved.get("latest") or {
+                stream: max(key[0] for key in event_keys) for stream, event_keys in stats.seen.items() if event_keys
+            }
+            loaded[address] = stats
+        with self._lock:
+            self._stats.update(loaded)
+        if snapshot.get("keys"):
+            self._generations[path] = (snapshot["generation"], snapshot["keys"])
+
+
+class _AnalyticsSnapshot:
+    """IssuerAnalytics loaded from ANALYTICS_PATH, reloaded when the file changes"""
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._analytics = IssuerAnalytics([])
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                self._next_check = now + self.reload_interval
+                try:
+                    stat = os.stat(self.path)
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    signature = None
+                if signature is not None and signature != self._signature:
+                    analytics = IssuerAnalytics([])
+                    analytics.load(self.path, keys=False)
+                    self._analytics = analytics
+                    self._signature = signature
+        return self._analytics
+
+
+_snapshot = None
+
+
+def get_analytics():
+    """Process-wide analytics snapshot (empty until ANALYTICS_PATH exists)"""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = _AnalyticsSnapshot(settings.ANALYTICS_PATH)
+    return _snapshot.get()
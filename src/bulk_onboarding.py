@@ -0,0 +1,232 @@
+"""
+Bulk Onboarding
+
+Runs SetupFlow across a partner's whole client list.
+
+Wallets are streamed from a CSV (header with "address" and/or "seed") or JSON
+Lines file ({"address": ..., "seed": ...}). Each wallet is checked with
+check_setup_status and, when a seed is provided, its missing trustlines are
+created. Work runs on a bounded thread pool.
+
+Every finished wallet is appended to a JSON Lines checkpoint file, so a rerun
+with the same checkpoint skips wallets that already completed and only
+retries failures.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.admission import AdmissionRejected
+from src.setup_flow import SetupFlow
+from src.xrpl_client import AccountNotFoundError, InvalidAddressError
+
+
+# Checkpoint statuses; FINAL_STATUSES are skipped on rerun
+STATUS_COMPLETE = "complete"
+STATUS_ALREADY_COMPLETE = "already_complete"
+STATUS_NEEDS_SEED = "needs_seed"
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+FINAL_STATUSES = (STATUS_COMPLETE, STATUS_ALREADY_COMPLETE)
+
+
+def iter_wallet_rows(path):
+    """
+    Stream wallet rows from a CSV or JSON Lines file
+
+    Args:
+        path: .csv file with a header row, or .jsonl/.json file (one object per line)
+
+    Yields:
+        Dictionaries with "address" and/or "seed"
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def load_checkpoint(path):
+    """
+    Latest checkpoint record per wallet
+
+    Args:
+        path: Checkpoint file (missing file means no progress yet)
+
+    Returns:
+        Dictionary of address -> last record
+    """
+    records = {}
+    if not path or not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves at most one partial line
+                continue
+            records[record["address"]] = record
+    return records
+
+
+class BulkOnboarding:
+    """Resumable, parallel SetupFlow over many wallets"""
+
+    def __init__(self, xrpl_client, checkpoint_path, workers=4, include_optional=False,
+                 check_only=False, max_retries=3):
+        """
+        Initialize bulk onboarding
+
+        Args:
+            xrpl_client: XRPLClient instance
+            checkpoint_path: JSON Lines file recording per-wallet progress
+            workers: Wallets processed in parallel
+            include_optional: Also create optional trustlines (RLUSD)
+            check_only: Only check setup status, never submit transactions
+            max_retries: Retries per wallet when requests are shed (429)
+        """
+        self.client = xrpl_client
+        self.setup_flow = SetupFlow(xrpl_client)
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.include_optional = include_optional
+        self.check_only = check_only
+        self.max_retries = max_retries
+        self.stats = {"processed": 0, "skipped": 0, "trustlines_created": 0,
+                      STATUS_COMPLETE: 0, STATUS_ALREADY_COMPLETE: 0,
+                      STATUS_NEEDS_SEED: 0, STATUS_PENDING: 0, STATUS_FAILED: 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def onboard_wallet(self, row, finished=()):
+        """
+        Check and complete setup for one wallet
+
+        Args:
+            row: Dictionary with "address" and/or "seed"
+            finished: Addresses to skip (rows that only carry a seed are
+                matched after deriving their address)
+
+        Returns:
+            Checkpoint record (address, status, created, error), or None if skipped
+        """
+        seed = row.get("seed") or None
+        address = row.get("address") or None
+        record = {"address": address, "status": STATUS_FAILED, "created": [], "error": None}
+        try:
+            wallet = self.client.import_wallet(seed) if seed else None
+            if wallet is not None:
+                if address and address != wallet.classic_address:
+                    record["error"] = f"seed belongs to {wallet.classic_address}"
+                    return record
+                address = record["address"] = wallet.classic_address
+                if address in finished:
+                    return None
+            if not address:
+                record["error"] = "row has neither address nor seed"
+                return record
+
+            status = self._with_retries(self.setup_flow.check_setup_status, address)
+            missing = [s for s in status["required_issuers"] if not s["has_trustline"]]
+            if self.include_optional:
+                missing += [s for s in status["optional_issuers"] if not s["has_trustline"]]
+            if not missing:
+                record["status"] = STATUS_ALREADY_COMPLETE
+                return record
+            if wallet is None or self.check_only:
+                record["status"] = STATUS_NEEDS_SEED if wallet is None else STATUS_PENDING
+                record["missing"] = [s["issuer"]["key"] for s in missing]
+                return record
+
+            results = self.setup_flow.create_missing_trustlines(wallet, status, self.include_optional)
+            record["created"] = [r["issuer_key"] for r in results if r["success"]]
+            failures = [r for r in results if not r["success"]]
+            if failures:
+                record["error"] = {r["issuer_key"]: r["error"] for r in failures}
+            else:
+                record["status"] = STATUS_COMPLETE
+        except (InvalidAddressError, AccountNotFoundError) as e:
+            record["error"] = str(e)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+    def _with_retries(self, func, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args)
+            except AdmissionRejected as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(e.retry_after)
+
+    def _record(self, checkpoint, record):
+        record["at"] = int(time.time())
+        checkpoint.write(json.dumps(record, separators=(",", ":")) + "\n")
+        checkpoint.flush()
+        with self._lock:
+            self.stats["processed"] += 1
+            self.stats[record["status"]] += 1
+            self.stats["trustlines_created"] += len(record["created"])
+
+    def run(self, rows, progress=None, progress_every=2.0):
+        """
+        Onboard every wallet not already finished in the checkpoint
+
+        Args:
+            rows: Iterable of wallet rows (see iter_wallet_rows)
+            progress: Optional callback(stats, record) after each wallet
+            progress_every: Minimum seconds between progress callbacks
+                (failures are always reported)
+
+        Returns:
+            Stats dictionary
+        """
+        finished = {
+            address for address, record in load_checkpoint(self.checkpoint_path).items()
+            if record.get("status") in FINAL_STATUSES
+        }
+        start = time.perf_counter()
+        last_report = 0.0
+        max_pending = self.workers * 2
+
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+
+            def drain(block_until):
+                nonlocal pending, last_report
+                while len(pending) > block_until:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record = future.result()
+                        if record is None:
+                            self.stats["skipped"] += 1
+                            continue
+                        self._record(checkpoint, record)
+                        self.stats["seconds"] = time.perf_counter() - start
+                        now = time.monotonic()
+                        if progress and (record["status"] == STATUS_FAILED or now - last_report >= progress_every):
+                            last_report = now
+                            progress(self.stats, record)
+
+            for row in rows:
+                address = row.get("address")
+                if address and address in finished:
+                    self.stats["skipped"] += 1
+                    continue
+                pending.add(pool.submit(self.onboard_wallet, row, finished))
+                # Keep the input stream only slightly ahead of the workers
+                drain(max_pending - 1)
+            drain(0)
+
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
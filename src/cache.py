@@ -0,0 +1,686 @@
+"""
+Two-Tier Cache
+
+Trustline snapshots shared across serverless instances.
+
+    L1  small in-process LRU with a short TTL (per instance)
+    L2  shared store behind CacheBackend: Redis (RESP over a plain socket, no
+        client library needed) or a local directory for offline testing
+
+Entries carry the validated ledger index they were read from. After a
+TrustSet validates in ledger L, invalidate() drops the wallet's entries,
+leaves a tombstone in L2 and publishes the key on an invalidation log that
+every instance polls (at most once per CACHE_SYNC_INTERVAL_SECONDS). Each
+instance then keeps a per-key ledger floor, so a snapshot read from a ledger
+before L is never served or stored again, even if a concurrent request writes
+it back.
+
+L2 failures count as misses: the gate falls back to the ledger, never to an
+error.
+
+Expired entries are kept (in L1 until evicted, in L2 for stale_ttl) so
+get_stale() can answer with the last known snapshot when the ledger is too
+slow (see src/latency_budget.py). Invalidated entries are never served stale.
+
+Only existing trustlines are served from the cache: an issuer the snapshot
+records as missing is re-read, so a wallet that just opted in is let through
+on its next check.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import socket
+import ssl
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+from config import settings
+
+
+INVALIDATION_CHANNEL = "cache:invalidations"
+# Invalidation messages kept in the shared log
+_LOG_SIZE = 1000
+# Seconds L2 is skipped after an error
+_L2_RETRY_SECONDS = 5.0
+
+
+class CacheBackendError(Exception):
+    """Raised when the shared store rejects a command"""
+
+
+class CacheBackend:
+    """Interface of a shared (L2) store; values are bytes"""
+
+    def get(self, key):
+        """Value of a key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl_seconds):
+        """Store a value with a time to live"""
+        raise NotImplementedError
+
+    def add(self, key, value, ttl_seconds):
+        """
+        Store a value only if the key is missing (e.g., to take a lock)
+
+        Returns:
+            True if the value was stored
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove a key"""
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        """
+        Append a message to a bounded shared log
+
+        Returns:
+            Sequence number of the message
+        """
+        raise NotImplementedError
+
+    def poll(self, channel, after):
+        """
+        Messages published after a sequence number
+
+        Returns:
+            Tuple of (latest sequence number, list of messages), or
+            (latest, None) if messages after `after` were already trimmed
+        """
+        raise NotImplementedError
+
+
+class RedisBackend(CacheBackend):
+    """Minimal Redis client speaking RESP2 (one connection per thread)"""
+
+    def __init__(self, url, timeout=0.25):
+        """
+        Initialize Redis backend
+
+        Args:
+            url: redis://[:password@]host[:port][/db] (rediss:// for TLS)
+            timeout: Socket timeout in seconds (keeps a slow L2 off the hot path)
+        """
+        parsed = urlparse(url)
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._tls = parsed.scheme == "rediss"
+        self._username = unquote(parsed.username) if parsed.username else None
+        self._password = unquote(parsed.password) if parsed.password else None
+        self._db = int(parsed.path.strip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self._host, self._port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self._host)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self._password:
+            auth = ("AUTH", self._username, self._password) if self._username else ("AUTH", self._password)
+            self._send(*auth)
+        if self._db:
+            self._send("SELECT", self._db)
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    @staticmethod
+    def _encode(args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise CacheBackendError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected Redis reply: {line[:20]!r}")
+
+    def _send(self, *args):
+        self._local.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def command(self, *args):
+        """Run one command, reconnecting once if the connection dropped"""
+        for attempt in (0, 1):
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            try:
+                return self._send(*args)
+            except CacheBackendError:
+                raise
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt:
+                    raise
+
+    def get(self, key):
+        return self.command("GET", key)
+
+    def set(self, key, value, ttl_seconds):
+        self.command("SET", key, value, "PX", int(ttl_seconds * 1000))
+
+    def add(self, key, value, ttl_seconds):
+        return self.command("SET", key, value, "NX", "PX", int(ttl_seconds * 1000)) is not None
+
+    def delete(self, key):
+        self.command("DEL", key)
+
+    def publish(self, channel, message):
+        seq = self.command("INCR", f"{channel}:seq")
+        self.command("ZADD", channel, seq, f"{seq}:{message}")
+        self.command("ZREMRANGEBYSCORE", channel, "-inf", f"({seq - _LOG_SIZE + 1}")
+        return seq
+
+    def poll(self, channel, after):
+        latest = int(self.command("GET", f"{channel}:seq") or 0)
+        if latest <= after:
+            return latest, []
+        entries = self.command("ZRANGEBYSCORE", channel, f"({after}", "+inf")
+        seqs_and_messages = [entry.decode().split(":", 1) for entry in entries]
+        if after and (not seqs_and_messages or int(seqs_and_messages[0][0]) > after + 1):
+            return latest, None
+        return latest, [message for _, message in seqs_and_messages]
+
+
+class FileBackend(CacheBackend):
+    """Shared store in a local directory (for offline tests and single-host setups)"""
+
+    def __init__(self, directory):
+        """
+        Initialize file backend
+
+        Args:
+            directory: Directory holding one file per key plus invalidation logs
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires, _, value = f.read().partition(b"\n")
+        except FileNotFoundError:
+            return None
+        if float(expires) <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl_seconds):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"%f\n" % (time.time() + ttl_seconds) + value)
+        os.replace(tmp, path)
+
+    def add(self, key, value, ttl_seconds):
+        if self.get(key) is not None:
+            return False
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"%f\n" % (time.time() + ttl_seconds) + value)
+        try:
+            # Linking fails if the key exists, so only one writer wins
+            os.link(tmp, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _log_path(self, channel):
+        return self._path(channel) + ".log"
+
+    def publish(self, channel, message):
+        with open(self._log_path(channel), "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            lines = f.read().splitlines()
+            seq = int(lines[-1].split("\t", 1)[0]) + 1 if lines else 1
+            if len(lines) >= 2 * _LOG_SIZE:
+                lines = lines[-_LOG_SIZE:]
+                f.seek(0)
+                f.truncate()
+                f.write("".join(line + "\n" for line in lines))
+            f.write(f"{seq}\t{message}\n")
+            return seq
+
+    def poll(self, channel, after):
+        try:
+            with open(self._log_path(channel), "r", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return 0, []
+        entries = [line.split("\t", 1) for line in lines]
+        latest = int(entries[-1][0]) if entries else 0
+        newer = [(int(seq), message) for seq, message in entries if int(seq) > after]
+        if after and newer and newer[0][0] > after + 1:
+            return latest, None
+        return latest, [message for _, message in newer]
+
+
+def backend_from_url(url):
+    """
+    Shared store for a URL
+
+    Args:
+        url: redis://..., rediss://..., file:///path, or empty for none
+
+    Returns:
+        CacheBackend, or None for an in-process-only cache
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisBackend(url)
+    if parsed.scheme == "file":
+        return FileBackend(parsed.path)
+    raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme!r}")
+
+
+class TwoTierCache:
+    """In-process LRU in front of an optional shared store, versioned by ledger index"""
+
+    def __init__(self, namespace, backend=None, l1_size=None, l1_ttl=None, l2_ttl=None, sync_interval=None,
+                 stale_ttl=None):
+        """
+        Initialize cache
+
+        Args:
+            namespace: Prefix for keys in the shared store
+            backend: CacheBackend (None: L1 only)
+            l1_size: In-process entries (least recently used evicted; default from settings)
+            l1_ttl: Seconds an entry is served from L1 (default from settings)
+            l2_ttl: Seconds an entry lives in L2 (default from settings)
+            sync_interval: Minimum seconds between invalidation log polls (default from settings)
+            stale_ttl: Seconds an expired entry can still be served by get_stale() (default from settings)
+        """
+        self.namespace = namespace
+        self.backend = backend
+        self.l1_size = l1_size or settings.CACHE_L1_SIZE
+        self.l1_ttl = l1_ttl or settings.CACHE_L1_TTL_SECONDS
+        self.l2_ttl = l2_ttl or settings.CACHE_L2_TTL_SECONDS
+        self.sync_interval = settings.CACHE_SYNC_INTERVAL_SECONDS if sync_interval is None else sync_interval
+        self.stale_ttl = settings.GATE_STALE_TTL_SECONDS if stale_ttl is None else stale_ttl
+        # key -> (ledger index, value, monotonic expiry, wall time written)
+        self._l1 = OrderedDict()
+        # key -> (lowest ledger index that may be served, expiry)
+        self._floors = OrderedDict()
+        self._lock = threading.Lock()
+        self._log_seq = None
+        self._next_sync = 0.0
+        self._l2_down_until = 0.0
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "puts": 0, "stale_rejected": 0,
+                      "stale_served": 0, "invalidations": 0, "remote_invalidations": 0, "l2_errors": 0}
+
+    def _l2_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _floor(self, key, now):
+        floor = self._floors.get(key)
+        if floor is None:
+            return None
+        if floor[1] <= now:
+            del self._floors[key]
+            return None
+        return floor[0]
+
+    def _set_floor(self, key, ledger_index, now):
+        """Remember an invalidation (caller holds the lock)"""
+        self._l1.pop(key, None)
+        current = self._floor(key, now)
+        self._floors[key] = (max(ledger_index, current or 0), now + self.l2_ttl)
+        self._floors.move_to_end(key)
+        while len(self._floors) > self.l1_size:
+            self._floors.popitem(last=False)
+
+    def _l2_call(self, func, *args):
+        """Call the shared store; errors count as misses and pause L2 use briefly"""
+        if time.monotonic() < self._l2_down_until:
+            return None
+        try:
+            return func(*args)
+        except (OSError, ConnectionError, CacheBackendError, ValueError):
+            with self._lock:
+                self.stats["l2_errors"] += 1
+            # Don't pay a connect timeout on every request while the store is down
+            self._l2_down_until = time.monotonic() + _L2_RETRY_SECONDS
+            return None
+
+    def _sync(self, now):
+        """Apply invalidations published by other instances"""
+        if self.backend is None or now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+        polled = self._l2_call(self.backend.poll, INVALIDATION_CHANNEL, self._log_seq or 0)
+        if polled is None:
+            return
+        latest, messages = polled
+        with self._lock:
+            if self._log_seq is None:
+                # First poll only establishes where this instance starts reading
+                self._log_seq = latest
+                return
+            if messages is None:
+                # Missed part of the log: nothing in L1 can be trusted
+                self._l1.clear()
+            else:
+                for message in messages:
+                    namespace, _, rest = message.partition(":")
+                    if namespace != self.namespace:
+                        continue
+                    key, _, ledger_index = rest.rpartition("@")
+                    self._set_floor(key, int(ledger_index), now)
+                    self.stats["remote_invalidations"] += 1
+            self._log_seq = latest
+
+    def _get_l2(self, key, floor):
+        """Stored L2 entry ({"l", "v", "w"}) unless missing, a tombstone or below the floor"""
+        raw = self._l2_call(self.backend.get, self._l2_key(key))
+        if raw is None:
+            return None
+        try:
+            stored = json.loads(raw)
+        except ValueError:
+            return None
+        if not stored or stored.get("t") or (floor is not None and stored["l"] < floor):
+            return None
+        return stored
+
+    def get(self, key):
+        """
+        Cached value and its ledger index
+
+        Args:
+            key: Cache key (e.g., a wallet address)
+
+        Returns:
+            Tuple of (value, ledger_index), or None on a miss
+        """
+        now = time.monotonic()
+        self._sync(now)
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None and entry[2] > now:
+                self._l1.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return entry[1], entry[0]
+            floor = self._floor(key, now)
+
+        if self.backend is not None:
+            stored = self._get_l2(key, floor)
+            # Entries older than l2_ttl are only kept for get_stale()
+            if stored is not None and time.time() - stored.get("w", time.time()) <= self.l2_ttl:
+                with self._lock:
+                    self.stats["l2_hits"] += 1
+                    self._store_l1(key, stored["v"], stored["l"], now, stored.get("w"))
+                return stored["v"], stored["l"]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def get_stale(self, key):
+        """
+        Last known value, however old, up to stale_ttl
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, ledger_index, age in seconds), or None if nothing
+            is known or the key was invalidated since
+        """
+        now = time.monotonic()
+        wall_now = time.time()
+        with self._lock:
+            entry = self._l1.get(key)
+            floor = self._floor(key, now)
+        if entry is None and self.backend is not None:
+            stored = self._get_l2(key, floor)
+            if stored is not None and "w" in stored:
+                entry = (stored["l"], stored["v"], 0.0, stored["w"])
+        if entry is None or wall_now - entry[3] > self.stale_ttl:
+            return None
+        with self._lock:
+            self.stats["stale_served"] += 1
+        return entry[1], entry[0], wall_now - entry[3]
+
+    def _store_l1(self, key, value, ledger_index, now, written=None):
+        """Caller holds the lock"""
+        current = self._l1.get(key)
+        if current is not None and current[0] > ledger_index:
+            return
+        self._l1[key] = (ledger_index, value, now + self.l1_ttl, written or time.time())
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def put(self, key, value, ledger_index):
+        """
+        Store a value read from a validated ledger
+
+        Values older than an entry already in L1, or than the key's last
+        invalidation, are ignored.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ledger_index: Validated ledger the value was read from
+        """
+        now = time.monotonic()
+        with self._lock:
+            floor = self._floor(key, now)
+            if floor is not None and ledger_index < floor:
+                self.stats["stale_rejected"] += 1
+                return
+            self.stats["puts"] += 1
+            self._store_l1(key, value, ledger_index, now)
+        if self.backend is not None:
+            raw = json.dumps({"l": ledger_index, "v": value, "w": time.time()}, separators=(",", ":")).encode()
+            self._l2_call(self.backend.set, self._l2_key(key), raw, max(self.l2_ttl, self.stale_ttl))
+
+    def invalidate(self, key, ledger_index=None):
+        """
+        Drop a key everywhere and refuse snapshots older than a ledger
+
+        Args:
+            key: Cache key
+            ledger_index: Ledger in which the change validated (optional;
+                without it the entry is only dropped)
+        """
+        now = time.monotonic()
+        ledger_index = ledger_index or 0
+        with self._lock:
+            self._set_floor(key, ledger_index, now)
+            self.stats["invalidations"] += 1
+        if self.backend is not None:
+            tombstone = json.dumps({"l": ledger_index, "t": 1}, separators=(",", ":")).encode()
+            self._l2_call(self.backend.set, self._l2_key(key), tombstone, self.l2_ttl)
+            self._l2_call(self.backend.publish, INVALIDATION_CHANNEL, f"{self.namespace}:{key}@{ledger_index}")
+
+    def clear(self):
+        """Drop every in-process entry"""
+        with self._lock:
+            self._l1.clear()
+            self._floors.clear()
+
+    def metrics(self):
+        """
+        Hit rates per tier
+
+        Returns:
+            Dictionary with counters, l1_hit_rate (of all lookups),
+            l2_hit_rate (of L1 misses) and entry count
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["l1_entries"] = len(self._l1)
+        lookups = stats["l1_hits"] + stats["l2_hits"] + stats["misses"]
+        l1_misses = stats["l2_hits"] + stats["misses"]
+        stats["l1_hit_rate"] = round(stats["l1_hits"] / lookups, 4) if lookups else None
+        stats["l2_hit_rate"] = round(stats["l2_hits"] / l1_misses, 4) if l1_misses else None
+        stats["l2"] = type(self.backend).__name__ if self.backend is not None else None
+        return stats
+
+
+_trustline_cache = None
+_trustline_cache_lock = threading.Lock()
+_trustline_listeners = []
+
+
+def get_trustline_cache():
+    """Process-wide cache of per-wallet trustline snapshots"""
+    global _trustline_cache
+    if _trustline_cache is None:
+        with _trustline_cache_lock:
+            if _trustline_cache is None:
+                _trustline_cache = TwoTierCache("tl", backend_from_url(settings.CACHE_L2_URL))
+    return _trustline_cache
+
+
+def add_trustline_listener(callback):
+    """
+    Be told about every fresh trustline lookup (e.g., to maintain group access matrices)
+
+    Args:
+        callback: Called as callback(user_address, {issuer_key: has_trustline},
+            ledger_index) after each refresh_trustline_state
+    """
+    _trustline_listeners.append(callback)
+
+
+def _covering(snapshot, issuers):
+    """
+    The issuers' entries of a cached (lines, ledger_index) snapshot, or None
+    if any is missing or negative
+
+    A wallet that has no trustline yet may be opting in right now (the TrustSet
+    is signed in the wallet, so create_trustline never sees it), so only
+    existing trustlines are answered from the cache; a missing one is always
+    re-read from the ledger.
+    """
+    if snapshot is None or not all(snapshot[0].get(issuer["key"]) for issuer in issuers):
+        return None
+    return {issuer["key"]: True for issuer in issuers}
+
+
+def get_cached_trustline_state(user_address, issuers, stale=False):
+    """
+    Which issuers a wallet trusts, from the cache only
+
+    Args:
+        user_address: User's XRPL address
+        issuers: Issuer dictionaries (with "key")
+        stale: Accept the last known snapshot past its TTL
+
+    Returns:
+        Tuple of ({issuer_key: has_trustline}, ledger_index, age in seconds),
+        or None unless the cache holds a trustline to every issuer
+    """
+    cache = get_trustline_cache()
+    if stale:
+        snapshot = cache.get_stale(user_address)
+        lines = _covering(snapshot, issuers)
+        return (lines, snapshot[1], snapshot[2]) if lines is not None else None
+    snapshot = cache.get(user_address)
+    lines = _covering(snapshot, issuers)
+    return (lines, snapshot[1], 0.0) if lines is not None else None
+
+
+def get_trustline_state(xrpl_client, user_address, issuers):
+    """
+    Which issuers a wallet trusts, from the cache or the validated ledger
+
+    Args:
+        xrpl_client: XRPLClient used on a miss
+        user_address: User's XRPL address
+        issuers: Issuer dictionaries (with "key", "address", "currency")
+
+    Returns:
+        Tuple of ({issuer_key: has_trustline}, validated ledger index)
+
+    Raises:
+        AccountNotFoundError: If the account does not exist (not cached here)
+    """
+    cached = get_trustline_cache().get(user_address)
+    lines = _covering(cached, issuers)
+    if lines is not None:
+        return lines, cached[1]
+    return refresh_trustline_state(xrpl_client, user_address, issuers, cached)
+
+
+def refresh_trustline_state(xrpl_client, user_address, issuers, cached=None):
+    """
+    Read a wallet's trustlines from the validated ledger and cache them
+
+    Args:
+        xrpl_client: XRPLClient
+        user_address: User's XRPL address
+        issuers: Issuer dictionaries (with "key", "address", "currency")
+        cached: Current (lines, ledger_index) snapshot to extend, if any
+
+    Returns:
+        Tuple of ({issuer_key: has_trustline}, validated ledger index)
+    """
+    cache = get_trustline_cache()
+    entries, ledger_index = xrpl_client.get_trustline_entries(user_address, issuers)
+    lines = {issuer["key"]: entry is not None for issuer, entry in zip(issuers, entries)}
+    if ledger_index is not None:
+        # Snapshots from the same ledger cover more issuers together
+        snapshot = dict(cached[0], **lines) if cached is not None and cached[1] == ledger_index else lines
+        cache.put(user_address, snapshot, ledger_index)
+    for listener in _trustline_listeners:
+        try:
+            listener(user_address, lines, ledger_index)
+        except Exception as e:
+            # Listeners maintain derived views; the lookup itself succeeded
+            print(f"Trustline listener failed for {user_address}: {e}", file=sys.stderr)
+    return lines, ledger_index
@@ -0,0 +1,312 @@
+"""
+Product Catalog
+
+Per-issuer product indexes, built once each time a catalog file is loaded
+(config/products/<issuer_key>.json) and reused by every request until the file
+changes.
+
+For the whole catalog and for each product type the index keeps:
+    - products ordered by price (with a parallel price array, so a price band
+      is two binary searches)
+    - products ordered by name and in catalog order
+    - an inverted index of name/description tokens for search
+
+A price band listed in catalog or name order is the band's by-price window
+re-sorted by each product's precomputed rank, so its cost depends on the
+band, not the catalog; the last few band orderings are kept for paging.
+
+Pages are addressed by opaque cursors tied to the catalog version, so a
+listing never re-sorts or re-filters the full catalog per request. Products
+are returned as PreEncoded dictionaries, so responses reuse each product's
+JSON encoding (whole, or the fields a client selected).
+"""
+import base64
+import json
+import math
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from config.issuers import get_issuer_products
+from src.guidance_index import tokenize
+from src.response_encoding import PreEncoded
+
+
+SORT_ORDERS = ("catalog", "price", "-price", "name", "-name")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+# Price-band orderings kept per index
+BAND_CACHE_SIZE = 64
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a malformed cursor or one issued for an older catalog version"""
+
+
+def _price(product):
+    """Numeric price in XRP (unparseable prices sort last)"""
+    try:
+        return float(product.get("price_xrp", "0") or 0)
+    except (TypeError, ValueError):
+        return math.inf
+
+
+def encode_cursor(version, sort, offset, seen):
+    """Opaque page cursor (position in the sort order, matches already served)"""
+    raw = json.dumps([version, sort, offset, seen], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor, version, sort):
+    """
+    Position and served-match count stored in a cursor
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed, for another sort order
+            or for an older version of the catalog
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_version, cursor_sort, offset, seen = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Malformed cursor")
+    if cursor_version != version or cursor_sort != sort:
+        raise InvalidCursorError("Cursor expired; the catalog changed or the sort order differs")
+    if not isinstance(offset, int) or not isinstance(seen, int) or offset < 0 or seen < 0:
+        raise InvalidCursorError("Malformed cursor")
+    return offset, seen
+
+
+class _Ordering:
+    """Product positions of one product type (or all products) in every sort order"""
+
+    __slots__ = ("catalog", "by_name", "by_price", "prices")
+
+    def __init__(self, positions, products, prices):
+        self.catalog = array("I", positions)
+        self.by_name = array("I", sorted(
+            positions, key=lambda i: (str(products[i].get("name", "")).lower(), i)
+        ))
+        self.by_price = array("I", sorted(positions, key=lambda i: (prices[i], i)))
+        self.prices = array("d", (prices[i] for i in self.by_price))
+
+    def price_window(self, min_price, max_price):
+        """Slice bounds of by_price within [min_price, max_price]"""
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        return lo, max(lo, hi)
+
+
+class ProductIndex:
+    """Read-only index over one issuer's product list"""
+
+    def __init__(self, issuer_key, products):
+        """
+        Build the index
+
+        Args:
+            issuer_key: Issuer the products belong to
+            products: List of product dictionaries (id, name, type, price_xrp, ...)
+        """
+        self.issuer_key = issuer_key
+        self.products = products
+        self.version = format(zlib.crc32(json.dumps(products, sort_keys=True).encode()), "08x")
+        self._encoded = [PreEncoded(product) for product in products]
+        self.by_id = {product.get("id"): product for product in self._encoded}
+
+        prices = [_price(product) for product in products]
+        positions_by_type = {}
+        for i, product in enumerate(products):
+            positions_by_type.setdefault(product.get("type"), []).append(i)
+        self._orderings = {None: _Ordering(range(len(products)), products, prices)}
+        for product_type, positions in positions_by_type.items():
+            self._orderings[product_type] = _Ordering(positions, products, prices)
+        # Rank of each product in name order (its position is its catalog rank)
+        self._name_rank = array("I", bytes(4 * len(products)))
+        for rank, position in enumerate(self._orderings[None].by_name):
+            self._name_rank[position] = rank
+        # (product type, by name, lo, hi) -> band positions in that order
+        self._bands = OrderedDict()
+        self._bands_lock = threading.Lock()
+
+        self._tokens = {}
+        for i, product in enumerate(products):
+            text = f"{product.get('name', '')} {product.get('description', '')} {product.get('type', '')}"
+            for token in set(tokenize(text)):
+                self._tokens.setdefault(token, []).append(i)
+        self._name_tokens = [set(tokenize(str(product.get("name", "")))) for product in products]
+
+    @property
+    def types(self):
+        """Product types in this catalog"""
+        return sorted(t for t in self._orderings if t is not None)
+
+    def get(self, product_id):
+        """Product by id (None if missing)"""
+        return self.by_id.get(product_id)
+
+    def _band_order(self, product_type, ordering, lo, hi, by_name):
+        """Positions of a by_price window in catalog (or name) order"""
+        key = (product_type, by_name, lo, hi)
+        with self._bands_lock:
+            order = self._bands.get(key)
+            if order is not None:
+                self._bands.move_to_end(key)
+                return order
+        window = ordering.by_price[lo:hi]
+        order = array("I", sorted(window, key=self._name_rank.__getitem__) if by_name else sorted(window))
+        with self._bands_lock:
+            self._bands[key] = order
+            while len(self._bands) > BAND_CACHE_SIZE:
+                self._bands.popitem(last=False)
+        return order
+
+    def query(self, product_type=None, min_price=None, max_price=None, sort="catalog",
+              limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """
+        One page of products
+
+        Args:
+            product_type: Only this type (optional)
+            min_price: Lowest price_xrp to include (optional)
+            max_price: Highest price_xrp to include (optional)
+            sort: One of SORT_ORDERS
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: Cursor from the previous page (optional)
+
+        Returns:
+            Dictionary with products, total (matches across all pages) and
+            next_cursor (None on the last page)
+
+        Raises:
+            ValueError: For an unknown sort order
+            InvalidCursorError: For a bad or stale cursor
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset, seen = decode_cursor(cursor, self.version, sort) if cursor else (0, 0)
+
+        ordering = self._orderings.get(product_type)
+        if ordering is None:
+            return {"products": [], "total": 0, "next_cursor": None}
+
+        lo, hi = ordering.price_window(min_price, max_price)
+        total = hi - lo
+
+        if sort in ("price", "-price"):
+            # The price band is a contiguous window: slice it directly
+            if sort == "price":
+                positions = ordering.by_price[lo + offset:min(hi, lo + offset + limit)]
+            else:
+                start = hi - offset
+                positions = ordering.by_price[max(lo, start - limit):max(lo, start)][::-1]
+            next_offset = offset + len(positions)
+        else:
+            by_name = sort != "catalog"
+            if total == len(ordering.catalog):
+                order = ordering.by_name if by_name else ordering.catalog
+            else:
+                order = self._band_order(product_type, ordering, lo, hi, by_name)
+            if sort == "-name":
+                end = max(0, len(order) - offset)
+                positions = order[max(0, end - limit):end][::-1]
+            else:
+                positions = order[offset:offset + limit]
+            next_offset = offset + len(positions)
+
+        seen += len(positions)
+        return {
+            "products": [self._encoded[position] for position in positions],
+            "total": total,
+            "next_cursor": encode_cursor(self.version, sort, next_offset, seen) if seen < total else None,
+        }
+
+    def search(self, query, product_type=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Products matching every query token in name, description or type
+
+        Args:
+            query: Search text
+            product_type: Only this type (optional)
+            limit: Maximum results
+
+        Returns:
+            List of (score, product) tuples, best first; name matches score higher
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        matches = None
+        for token in set(tokens):
+            positions = self._tokens.get(token)
+            if not positions:
+                return []
+            matches = set(positions) if matches is None else matches & set(positions)
+        results = []
+        for position in matches:
+            product = self._encoded[position]
+            if product_type is not None and product.get("type") != product_type:
+                continue
+            score = len(tokens) + sum(1 for token in tokens if token in self._name_tokens[position])
+            results.append((score, product))
+        results.sort(key=lambda item: (-item[0], _price(item[1]), str(item[1].get("id"))))
+        return results[:limit]
+
+
+class ProductCatalog:
+    """ProductIndex per issuer, rebuilt only when the issuer's catalog file changes"""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, issuer_key):
+        """
+        Index of one issuer's products
+
+        Args:
+            issuer_key: Issuer key
+
+        Returns:
+            ProductIndex (empty if the issuer has no catalog)
+        """
+        products = get_issuer_products(issuer_key)
+        cached = self._indexes.get(issuer_key)
+        # The registry returns the same list object until the file changes
+        if cached is not None and cached.products is products:
+            return cached
+        index = ProductIndex(issuer_key, products)
+        with self._lock:
+            self._indexes[issuer_key] = index
+        return index
+
+    def search(self, query, issuer_keys, product_type=None, limit=20):
+        """
+        Search the catalogs of several issuers
+
+        Args:
+            query: Search text
+            issuer_keys: Issuers to search (e.g., those the wallet opted into)
+            product_type: Only this type (optional)
+            limit: Maximum results
+
+        Returns:
+            List of dictionaries with issuer, score and product, best first
+        """
+        results = []
+        for issuer_key in issuer_keys:
+            for score, product in self.get_index(issuer_key).search(query, product_type, limit):
+                results.append({"issuer": issuer_key, "score": score, "product": product})
+        results.sort(key=lambda item: (-item["score"], _price(item["product"]), item["issuer"]))
+        return results[:limit]
+
+
+_catalog = ProductCatalog()
+
+
+def get_catalog():
+    """Process-wide product catalog"""
+    return _catalog
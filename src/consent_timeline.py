@@ -0,0 +1,259 @@
+"""
+Consent Timeline
+
+Audit index of trustline (consent) history per (issuer, holder).
+
+Every trustline create, modify and remove event is stored in a sorted array of
+ledger positions (ledger_index << 20 | transaction index), so "was this
+wallet opted in when transaction X validated?" is a binary search with no
+ledger queries. The timeline is built by streaming an issuer's transaction
+history (or offline dumps, see src/ingest.py) and can export every consent
+interval for an issuer.
+"""
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from xrpl.clients import XRPLRequestFailureException
+
+from src.ledger_events import (
+    CONSENT_CREATE,
+    CONSENT_MODIFY,
+    CONSENT_REMOVE,
+    extract_consent_events,
+)
+from src.xrpl_client import format_currency_code
+
+
+_TX_INDEX_BITS = 20
+_TX_INDEX_MASK = (1 << _TX_INDEX_BITS) - 1
+_KIND_CODES = {CONSENT_CREATE: 0, CONSENT_MODIFY: 1, CONSENT_REMOVE: 2}
+_KIND_NAMES = {code: kind for kind, code in _KIND_CODES.items()}
+
+
+def ledger_position(ledger_index, tx_index):
+    """Pack a ledger index and transaction index into one sortable integer"""
+    return (ledger_index << _TX_INDEX_BITS) | (tx_index & _TX_INDEX_MASK)
+
+
+class _HolderHistory:
+    """Sorted consent events of one holder with one issuer"""
+
+    __slots__ = ("positions", "kinds")
+
+    def __init__(self):
+        self.positions = array("Q")
+        self.kinds = array("B")
+
+    def add(self, position, kind_code):
+        # Histories are streamed oldest first, so appending is the common case
+        if not self.positions or position > self.positions[-1]:
+            self.positions.append(position)
+            self.kinds.append(kind_code)
+            return
+        i = bisect_left(self.positions, position)
+        if i < len(self.positions) and self.positions[i] == position:
+            self.kinds[i] = kind_code
+            return
+        self.positions.insert(i, position)
+        self.kinds.insert(i, kind_code)
+
+    def state_before(self, i):
+        """Opt-in state just before event i"""
+        if i > 0:
+            return self.kinds[i - 1] != _KIND_CODES[CONSENT_REMOVE]
+        # Before the first recorded event the line existed unless that event created it
+        return bool(self.kinds) and self.kinds[0] != _KIND_CODES[CONSENT_CREATE]
+
+
+class ConsentTimeline:
+    """Point-in-time consent queries over trustline history"""
+
+    def __init__(self, issuers):
+        """
+        Initialize consent timeline
+
+        Args:
+            issuers: Issuer dictionaries ("address", "currency") to track
+        """
+        self.issuers_by_address = {
+            issuer["address"]: format_currency_code(issuer["currency"]) for issuer in issuers
+        }
+        self._histories = {}
+        self.synced_ledger = {}
+
+    def add_event(self, issuer_address, holder, ledger_index, tx_index, kind):
+        """
+        Record one consent event
+
+        Args:
+            issuer_address: Issuer's XRPL address
+            holder: Holder's XRPL address
+            ledger_index: Ledger the transaction validated in
+            tx_index: Transaction's index within that ledger
+            kind: "create", "modify" or "remove"
+        """
+        history = self._histories.get((issuer_address, holder))
+        if history is None:
+            history = self._histories[(issuer_address, holder)] = _HolderHistory()
+        history.add(ledger_position(ledger_index, tx_index), _KIND_CODES[kind])
+
+    def apply_transaction(self, entry):
+        """
+        Record the consent events of one validated transaction
+
+        Args:
+            entry: Transaction record (account_tx entry or dump line)
+
+        Returns:
+            List of consent events found (see extract_consent_events)
+        """
+        events = extract_consent_events(entry, self.issuers_by_address)
+        for issuer_address, holder, ledger_index, tx_index, kind, _, _ in events:
+            self.add_event(issuer_address, holder, ledger_index, tx_index, kind)
+        return events
+
+    def ingest_issuer_history(self, xrpl_client, issuer_address, page_size=400, analytics=None):
+        """
+        Stream an issuer's transaction history into the timeline
+
+        Continues from the last synced ledger on repeat calls.
+
+        Args:
+            xrpl_client: XRPLClient instance
+            issuer_address: Issuer's XRPL address
+            page_size: Transactions per account_tx page
+            analytics: IssuerAnalytics to count the same transactions into (optional)
+
+        Returns:
+            Number of transactions processed
+        """
+        ledger_index_min = self.synced_ledger.get(issuer_address, -2) + 1
+        marker = None
+        processed = 0
+        while True:
+            try:
+                result = xrpl_client.get_account_transactions(
+                    issuer_address,
+                    ledger_index_min=ledger_index_min,
+                    limit=page_size,
+                    marker=marker,
+                    forward=True
+                )
+            except XRPLRequestFailureException as e:
+                # Already synced to the latest validated ledger
+                if e.error == "lgrIdxsInvalid":
+                    return processed
+                raise
+            for entry in result.get("transactions", []):
+                self.apply_transaction(entry)
+                if analytics is not None:
+                    analytics.apply_transaction(entry)
+                processed += 1
+            marker = result.get("marker")
+            if not marker:
+                if result.get("ledger_index_max") is not None:
+                    self.synced_ledger[issuer_address] = result["ledger_index_max"]
+                return processed
+
+    def was_opted_in(self, issuer_address, holder, ledger_index, tx_index=None):
+        """
+        Whether a holder had a trustline to an issuer at a point in ledger history
+
+        Args:
+            issuer_address: Issuer's XRPL address
+            holder: Holder's XRPL address
+            ledger_index: Ledger to ask about
+            tx_index: Transaction index within that ledger; the answer then
+                reflects consent just before that transaction applied. If None,
+                the state at the end of the ledger.
+
+        Returns:
+            True if opted in at that point, False otherwise
+        """
+        history = self._histories.get((issuer_address, holder))
+        if history is None:
+            return False
+        if tx_index is None:
+            i = bisect_right(history.positions, ledger_position(ledger_index, _TX_INDEX_MASK))
+        else:
+            i = bisect_left(history.positions, ledger_position(ledger_index, tx_index))
+        return history.state_before(i)
+
+    def get_events(self, issuer_address, holder):
+        """
+        Full consent history of one holder
+
+        Returns:
+            List of dictionaries with ledger_index, tx_index and kind, oldest first
+        """
+        history = self._histories.get((issuer_address, holder))
+        if history is None:
+            return []
+        return [
+            {
+                "ledger_index": position >> _TX_INDEX_BITS,
+                "tx_index": position & _TX_INDEX_MASK,
+                "kind": _KIND_NAMES[kind],
+            }
+            for position, kind in zip(history.positions, history.kinds)
+        ]
+
+    def iter_intervals(self, issuer_address):
+        """
+        Every consent interval for an issuer
+
+        Yields:
+            Dictionaries with holder, start_ledger (None if consent predates
+            the recorded history) and end_ledger (None if still opted in)
+        """
+        for (issuer, holder), history in self._histories.items():
+            if issuer != issuer_address:
+                continue
+            start = None
+            opted_in = history.state_before(0)
+            for position, kind in zip(history.positions, history.kinds):
+                ledger_index = position >> _TX_INDEX_BITS
+                if kind == _KIND_CODES[CONSENT_REMOVE]:
+                    if opted_in:
+                        yield {"holder": holder, "start_ledger": start, "end_ledger": ledger_index}
+                    opted_in = False
+                elif not opted_in:
+                    start = ledger_index
+                    opted_in = True
+            if opted_in:
+                yield {"holder": holder, "start_ledger": start, "end_ledger": None}
+
+    def current_holders(self, issuer_address):
+        """Holders whose latest recorded event leaves them opted in"""
+        return [
+            holder for (issuer, holder), history in self._histories.items()
+            if issuer == issuer_address and history.state_before(len(history.kinds))
+        ]
+
+    def save(self, path):
+        """Atomically write the timeline to a JSON file"""
+        data = {
+            "synced_ledger": self.synced_ledger,
+            "histories": [
+                [issuer, holder, list(history.positions), list(history.kinds)]
+                for (issuer, holder), history in self._histories.items()
+            ],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Load a timeline written by save()"""
+        with open(path, "r") as f:
+            data = json.load(f)
+        self.synced_ledger = data.get("synced_ledger", {})
+        self._histories = {}
+        for issuer, holder, positions, kinds in data.get("histories", []):
+            history = _HolderHistory()
+            history.positions = array("Q", positions)
+            history.kinds = array("B", kinds)
+            self._histories[(issuer, holder)] = history
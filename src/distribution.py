@@ -0,0 +1,407 @@
+"""
+Token Distribution
+
+Sends an issuer's IOU (programme-completion credentials, vouchers) to the
+wallets that trust it.
+
+    plan       the issuer's current holder set from the validated ledger
+               (optionally restricted to a given address list), minus holders
+               already delivered to and holders whose limit can't take the amount
+    sign       Payments get consecutive Sequence numbers from the issuer's
+               current Sequence, and are signed in chunks on the SigningService
+               process pool; each chunk's LastLedgerSequence is set from the
+               validated ledger when it is signed
+    submit     blobs are submitted on a thread pool without waiting for
+               validation; rippled holds ones that arrive ahead of their
+               Sequence (terPRE_SEQ) until the gap fills
+    track      once the issuer's validated Sequence passes a chunk (or its
+               LastLedgerSequence passes), each transaction's final result is
+               looked up; ones whose Sequence was never used expired and go
+               back into the next round (the rest of the round is not sent, as
+               its Sequences can no longer apply)
+
+A transaction whose Sequence was used but whose result can't be looked up is
+journaled as unknown: it may have paid the holder, so it is never resent.
+Every run retries the lookup of unknown records first.
+
+Every submission is written to a JSON Lines journal before it is sent, and
+every final result after it is known. Rerunning with the same journal first
+resolves transactions still in flight, so a holder is never paid twice, then
+continues with whoever is left. A dry run plans and reports without signing or
+submitting anything.
+
+Requests go through admission control without a per-wallet key, so a
+distribution is bounded by the global upstream rate (ADMISSION_GLOBAL_RATE).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.admission import AdmissionRejected
+from src.tx_signing import get_signing_service
+from src.xrpl_client import format_currency_code
+
+
+# Journal statuses; delivered and unknown holders are not planned again
+STATUS_SUBMITTED = "submitted"
+STATUS_DELIVERED = "delivered"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+STATUS_UNKNOWN = "unknown"
+
+DEFAULT_FEE_DROPS = 12
+# Ledgers a Payment stays valid for after the ledger it was signed in
+DEFAULT_LEDGER_WINDOW = 20
+# Failed lookups of a transaction whose Sequence was used before it is journaled as unknown
+LOOKUP_ATTEMPTS = 5
+
+
+def load_journal(path):
+    """
+    Latest journal record per holder
+
+    Args:
+        path: Journal file (missing file means nothing was sent yet)
+
+    Returns:
+        Tuple of (plan record or None, {holder: last record})
+    """
+    plan = None
+    records = {}
+    if not path or not os.path.exists(path):
+        return plan, records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves at most one partial line
+                continue
+            if record.get("type") == "plan":
+                plan = record
+            else:
+                records[record["holder"]] = record
+    return plan, records
+
+
+class DistributionEngine:
+    """Resumable, pipelined Payments from an issuer to its holders"""
+
+    def __init__(self, xrpl_client, issuer, amount, journal_path, seed=None, memo=None,
+                 chunk_size=200, submit_workers=8, fee_drops=DEFAULT_FEE_DROPS,
+                 ledger_window=DEFAULT_LEDGER_WINDOW, max_rounds=5, poll_interval=1.0,
+                 signing_service=None, dry_run=False):
+        """
+        Initialize distribution
+
+        Args:
+            xrpl_client: XRPLClient instance
+            issuer: Issuer dictionary ("address", "currency")
+            amount: Amount of the issuer's currency per holder (string or number)
+            journal_path: JSON Lines file recording every submission and result
+            seed: Issuer's seed (not needed for a dry run)
+            memo: Text attached to every Payment (e.g., "Credential: foundations")
+            chunk_size: Payments signed and tracked together
+            submit_workers: Concurrent submit and lookup requests
+            fee_drops: Fee per Payment
+            ledger_window: Ledgers each Payment stays valid for after signing
+            max_rounds: Rounds of retrying expired Payments
+            poll_interval: Seconds between validation checks
+            signing_service: SigningService (default: the process-wide one)
+            dry_run: Plan and report only
+        """
+        if not dry_run and not seed:
+            raise ValueError("The issuer's seed is required unless dry_run is set")
+        self.client = xrpl_client
+        self.issuer_address = issuer["address"]
+        self.currency = format_currency_code(issuer["currency"])
+        self.amount = str(amount)
+        self.journal_path = journal_path
+        self.seed = seed
+        self.memo = memo
+        self.chunk_size = chunk_size
+        self.submit_workers = submit_workers
+        self.fee = str(fee_drops)
+        self.ledger_window = ledger_window
+        self.max_rounds = max_rounds
+        self.poll_interval = poll_interval
+        self.signing = signing_service
+        self.dry_run = dry_run
+        self.stats = {"holders": 0, "planned": 0, "skipped": 0, "no_trustline": 0, "over_limit": 0,
+                      "submitted": 0, "delivered": 0, "failed": 0, "expired": 0, "unknown": 0,
+                      "rounds": 0, "seconds": 0.0}
+        self._journal = None
+        self._lock = threading.Lock()
+
+    # Planning
+
+    def holder_set(self):
+        """
+        Current holders of the issuer's currency and how much more each can receive
+
+        Returns:
+            Tuple of ({holder: remaining capacity}, validated ledger index)
+        """
+        lines, ledger_index = self.client.get_all_trustlines(self.issuer_address)
+        holders = {}
+        for line in lines:
+            if line.get("currency") != self.currency:
+                continue
+            # From the issuer's side the holder's balance is negative
+            capacity = float(line.get("limit_peer", 0)) + float(line.get("balance", 0))
+            holders[line["account"]] = capacity
+        return holders, ledger_index
+
+    def plan(self, addresses=None):
+        """
+        Holders to pay in this run
+
+        Args:
+            addresses: Restrict to these addresses (default: every holder)
+
+        Returns:
+            List of holder addresses
+        """
+        holders, _ = self.holder_set()
+        _, journal = load_journal(self.journal_path)
+        amount = float(self.amount)
+        candidates = holders if addresses is None else addresses
+        planned = []
+        seen = set()
+        for address in candidates:
+            if address in seen:
+                continue
+            seen.add(address)
+            self.stats["holders"] += 1
+            status = journal.get(address, {}).get("status")
+            if status == STATUS_DELIVERED:
+                self.stats["skipped"] += 1
+            elif status == STATUS_UNKNOWN:
+                # May have been paid; resolved by a later lookup, never resent
+                self.stats["unknown"] += 1
+            elif address not in holders:
+                self.stats["no_trustline"] += 1
+            elif holders[address] < amount:
+                self.stats["over_limit"] += 1
+            else:
+                planned.append(address)
+        self.stats["planned"] = len(planned)
+        return planned
+
+    # Journal
+
+    def _check_journal_plan(self):
+        """Refuse to continue a journal written for another distribution"""
+        plan, _ = load_journal(self.journal_path)
+        current = {"issuer": self.issuer_address, "currency": self.currency, "amount": self.amount,
+                   "memo": self.memo}
+        if plan is None:
+            self._write(dict(current, type="plan"))
+        elif {key: plan.get(key) for key in current} != current:
+            raise ValueError(f"{self.journal_path} belongs to another distribution "
+                             f"({plan.get('amount')} {plan.get('currency')} from {plan.get('issuer')})")
+
+    def _write(self, record):
+        record["at"] = int(time.time())
+        with self._lock:
+            self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._journal.flush()
+
+    def _finish(self, record, result, status=None):
+        """Journal a transaction's final result (or status, if given)"""
+        if status is None:
+            if result.startswith("tes"):
+                status = STATUS_DELIVERED
+            elif result.startswith("tec"):
+                status = STATUS_FAILED
+            else:
+                status = STATUS_EXPIRED
+        self._write({"holder": record["holder"], "status": status, "hash": record["hash"],
+                     "sequence": record["sequence"], "last_ledger": record["last_ledger"],
+                     "result": result})
+        with self._lock:
+            self.stats[status] += 1
+        return status
+
+    # Submission
+
+    def _payment(self, holder, sequence, last_ledger):
+        tx = {
+            "TransactionType": "Payment",
+            "Account": self.issuer_address,
+            "Destination": holder,
+            "Amount": {"currency": self.currency, "issuer": self.issuer_address, "value": self.amount},
+            "Fee": self.fee,
+            "Sequence": sequence,
+            "LastLedgerSequence": last_ledger,
+            "Flags": 0,
+        }
+        if self.memo:
+            tx["Memos"] = [{"Memo": {"MemoData": self.memo.encode("utf-8").hex().upper()}}]
+        return tx
+
+    def _with_retries(self, func, *args, attempts=5):
+        for attempt in range(attempts):
+            try:
+                return func(*args)
+            except AdmissionRejected as e:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(e.retry_after)
+
+    def _submit(self, record):
+        """Submit one signed Payment; returns the preliminary engine result"""
+        try:
+            response = self._with_retries(self.client.submit_blob, record["tx_blob"])
+            return response.result.get("engine_result", response.result.get("error", "unknown"))
+        except Exception as e:
+            # Unknown outcome: tracking decides once the transaction can no longer validate
+            return f"error:{type(e).__name__}"
+
+    def _send_chunk(self, pool, holders, sequence, last_ledger):
+        """Sign, journal and submit one chunk; returns its in-flight records"""
+        signed = self.signing.sign_batch([
+            (self._payment(holder, sequence + i, last_ledger), self.seed)
+            for i, holder in enumerate(holders)
+        ])
+        records = []
+        for i, (holder, result) in enumerate(zip(holders, signed)):
+            if "error" in result:
+                raise ValueError(f"Could not sign the Payment to {holder}: {result['error']}")
+            record = {"holder": holder, "status": STATUS_SUBMITTED, "hash": result["hash"],
+                      "sequence": sequence + i, "last_ledger": last_ledger}
+            self._write(dict(record))
+            record["tx_blob"] = result["tx_blob"]
+            records.append(record)
+        # Preliminary results are not final; tracking settles every record
+        list(pool.map(self._submit, records))
+        with self._lock:
+            self.stats["submitted"] += len(records)
+        return records
+
+    # Tracking
+
+    def _resolve(self, pool, records):
+        """
+        Wait until every record has a final outcome and journal it
+
+        A record is settled once its result is looked up after the issuer's
+        validated Sequence passed it, or as expired once the validated ledger
+        passed its LastLedgerSequence with its Sequence still unused (it can
+        no longer apply). A record whose Sequence was used but whose lookup
+        keeps failing is journaled as unknown and never retried.
+
+        Returns:
+            Expired records (their holders were not paid)
+        """
+        unsettled = list(records)
+        retry = []
+        failed_lookups = {}
+        while unsettled:
+            account, ledger_index = self._with_retries(self.client.get_account_root, self.issuer_address)
+            next_sequence = account["Sequence"]
+            ready = [r for r in unsettled if r["sequence"] < next_sequence or ledger_index > r["last_ledger"]]
+            unsettled = [r for r in unsettled if r["sequence"] >= next_sequence and ledger_index <= r["last_ledger"]]
+            for record, found in zip(ready, pool.map(self._lookup, ready)):
+                if found is not None and found.get("validated"):
+                    result = found.get("meta", {}).get("TransactionResult", "unknown")
+                elif record["sequence"] >= next_sequence:
+                    result = "expired"
+                elif ledger_index <= record["last_ledger"]:
+                    # The Sequence is used but this transaction isn't visible as validated yet
+                    unsettled.append(record)
+                    continue
+                else:
+                    # The Sequence is used and the lookup failed: the holder may have been paid
+                    failed_lookups[record["hash"]] = failed_lookups.get(record["hash"], 0) + 1
+                    if failed_lookups[record["hash"]] < LOOKUP_ATTEMPTS:
+                        unsettled.append(record)
+                    elif record.get("status") != STATUS_UNKNOWN:
+                        self._finish(record, "unknown", status=STATUS_UNKNOWN)
+                    continue
+                if self._finish(record, result) == STATUS_EXPIRED:
+                    retry.append(record)
+            if unsettled:
+                time.sleep(self.poll_interval)
+        return retry
+
+    def _lookup(self, record):
+        """The validated transaction of a record (None if it can't be looked up)"""
+        try:
+            return self._with_retries(self.client.get_transaction, record["hash"])
+        except Exception as e:
+            print(f"Lookup of {record['hash']} for {record['holder']} failed: {e}", file=sys.stderr)
+            return None
+
+    def recover(self, pool):
+        """Settle Payments a previous run left in flight or unknown"""
+        _, journal = load_journal(self.journal_path)
+        in_flight = [record for record in journal.values()
+                     if record.get("status") in (STATUS_SUBMITTED, STATUS_UNKNOWN)]
+        if in_flight:
+            self._resolve(pool, in_flight)
+        return len(in_flight)
+
+    # Run
+
+    def run(self, addresses=None, progress=None):
+        """
+        Distribute to every planned holder
+
+        Args:
+            addresses: Restrict to these addresses (default: every holder)
+            progress: Optional callback(stats) after each chunk
+
+        Returns:
+            Stats dictionary
+        """
+        start = time.perf_counter()
+        if self.dry_run:
+            self.plan(addresses)
+            self.stats["fee_xrp"] = self.stats["planned"] * int(self.fee) / 1_000_000
+            self.stats["chunks"] = -(-self.stats["planned"] // self.chunk_size)
+            self.stats["seconds"] = time.perf_counter() - start
+            return self.stats
+
+        self.signing = self.signing or get_signing_service()
+        os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as journal, \
+                ThreadPoolExecutor(max_workers=self.submit_workers) as pool:
+            self._journal = journal
+            self._check_journal_plan()
+            self.stats["recovered"] = self.recover(pool)
+            pending = self.plan(addresses)
+
+            while pending and self.stats["rounds"] < self.max_rounds:
+                self.stats["rounds"] += 1
+                account, _ = self.client.get_account_root(self.issuer_address, ledger_index="current")
+                sequence = account["Sequence"]
+                retry = []
+                in_flight = []
+                offset = 0
+                while offset < len(pending) and not retry:
+                    chunk = pending[offset:offset + self.chunk_size]
+                    # Each chunk gets the full window from the ledger it is signed in
+                    _, validated = self._with_retries(self.client.get_account_root, self.issuer_address)
+                    in_flight.append(self._send_chunk(pool, chunk, sequence + offset,
+                                                      validated + self.ledger_window))
+                    offset += len(chunk)
+                    # Track the previous chunk while this one is being validated
+                    if len(in_flight) > 1:
+                        retry.extend(self._resolve(pool, in_flight.pop(0)))
+                    self.stats["seconds"] = time.perf_counter() - start
+                    if progress:
+                        progress(self.stats)
+                # After an expiry the later Sequences can't apply until it is resent
+                for records in in_flight:
+                    retry.extend(self._resolve(pool, records))
+                pending = [record["holder"] for record in retry] + pending[offset:]
+
+            self._journal = None
+
+        self.stats["pending"] = len(pending)
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
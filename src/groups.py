@@ -0,0 +1,923 @@
+"""
+Wallet Groups
+
+Named groups of wallets (e.g., a caregiver's dependents) with a precomputed
+wallet x issuer access matrix, so viewing a group is one read instead of one
+/api/check-trustline call per member.
+
+Each group keeps one bit per (member, issuer in VERIFIED_ISSUERS), packed
+row-major with stride = ceil(issuers / 8) bytes per member: member r has
+opted into issuer c when byte r * stride + c // 8 has bit c % 8 set (least
+significant bit first). The matrix is built when members join, from each
+issuer's trustline list (one account_lines walk per issuer, whatever the
+group size), and then maintained incrementally:
+
+    - sync() pages each issuer's transaction history from the last synced
+      ledger, so catching up costs one account_tx walk per issuer however
+      many members the groups have
+    - every fresh trustline lookup (src/cache.refresh_trustline_state) is
+      applied to the groups its wallet belongs to
+
+Every cell remembers the ledger position of its last update (see
+src/consent_timeline.ledger_position), so an older event or snapshot never
+overwrites a newer one whatever order they arrive in.
+
+Groups are kept in the shared store (GROUPS_URL, by default CACHE_L2_URL;
+without either they live in the memory of one instance): one key per group
+plus an index of names and synced ledgers. Writers take a
+store-wide lock key, and every write is announced on a change log that
+instances poll to reload the groups others changed. Creating or changing a
+group is written before the request answers. Lookups and synced events are
+applied in memory and written by a background thread, so the gate never waits
+on the store (on serverless platforms a write still pending when the response
+is sent may be frozen with the instance; it finishes on its next request).
+
+Creating a group returns a manage token that reading or changing the group
+requires; only its SHA-256 is stored.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import re
+import secrets
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from xrpl.clients import XRPLRequestFailureException
+
+from config import settings
+from config.issuers import VERIFIED_ISSUERS
+from src.cache import add_trustline_listener, backend_from_url
+from src.consent_timeline import ledger_position
+from src.ledger_events import CONSENT_REMOVE, extract_consent_events
+from src.response_encoding import PreEncoded, encode_json, parse_fields
+from src.xrpl_client import AccountNotFoundError, format_currency_code, validate_address
+
+
+_GROUP_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+# Transaction index bits of ledger_position set: the state at the end of a ledger
+_END_OF_LEDGER = (1 << 20) - 1
+
+# Keys in the shared store
+_INDEX_KEY = "groups:index"
+_GROUP_KEY = "groups:group:"
+_LOCK_KEY = "groups:lock"
+# Change log: the name of each group written ("" for the index)
+_CHANGES_CHANNEL = "groups:changes"
+# Groups don't expire; the store only takes values with a time to live
+_STORE_TTL_SECONDS = 10 * 365 * 86400
+# A lock outlives a crashed writer by at most this long
+_LOCK_TTL_SECONDS = 30
+_LOCK_WAIT_SECONDS = 10
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def validate_group_name(name):
+    """
+    Check a group name (letters, digits, "_", "-" and ".", at most 64)
+
+    Raises:
+        ValueError: If the name is missing or malformed
+    """
+    if not isinstance(name, str) or not _GROUP_NAME.match(name):
+        raise ValueError("group must be 1-64 letters, digits, '_', '-' or '.'")
+
+
+class AccessMatrix:
+    """Packed wallet x issuer opt-in bits of one group"""
+
+    __slots__ = ("issuer_keys", "members", "bits", "positions", "_rows", "_columns")
+
+    def __init__(self, issuer_keys):
+        """
+        Initialize an empty matrix
+
+        Args:
+            issuer_keys: Issuer keys, one column each
+        """
+        self.issuer_keys = list(issuer_keys)
+        self._columns = {key: column for column, key in enumerate(self.issuer_keys)}
+        self.members = []
+        self._rows = {}
+        self.bits = bytearray()
+        # Ledger position of each cell's last update, row-major
+        self.positions = array("Q")
+
+    @property
+    def stride(self):
+        """Bytes per member row"""
+        return (len(self.issuer_keys) + 7) // 8
+
+    def __contains__(self, wallet):
+        return wallet in self._rows
+
+    def __len__(self):
+        return len(self.members)
+
+    def add_member(self, wallet):
+        """
+        Append an all-zero row for a wallet
+
+        Returns:
+            True if the wallet was not a member yet
+        """
+        if wallet in self._rows:
+            return False
+        self._rows[wallet] = len(self.members)
+        self.members.append(wallet)
+        self.bits.extend(bytes(self.stride))
+        self.positions.extend([0] * len(self.issuer_keys))
+        return True
+
+    def remove_member(self, wallet):
+        """
+        Remove a wallet's row (the last row moves into its place)
+
+        Returns:
+            True if the wallet was a member
+        """
+        row = self._rows.pop(wallet, None)
+        if row is None:
+            return False
+        last = len(self.members) - 1
+        stride, width = self.stride, len(self.issuer_keys)
+        if row != last:
+            moved = self.members[last]
+            self.members[row] = moved
+            self._rows[moved] = row
+            self.bits[row * stride:(row + 1) * stride] = self.bits[last * stride:]
+            self.positions[row * width:(row + 1) * width] = self.positions[last * width:]
+        self.members.pop()
+        del self.bits[last * stride:]
+        del self.positions[last * width:]
+        return True
+
+    def set(self, wallet, issuer_key, opted_in, position):
+        """
+        Record one cell unless the matrix already holds a newer state
+
+        Args:
+            wallet: Member address
+            issuer_key: Issuer column
+            opted_in: Whether the wallet trusts the issuer
+            position: Ledger position the state was read at
+
+        Returns:
+            True if the bit changed
+        """
+        row = self._rows.get(wallet)
+        column = self._columns.get(issuer_key)
+        if row is None or column is None:
+            return False
+        cell = row * len(self.issuer_keys) + column
+        if position < self.positions[cell]:
+            return False
+        self.positions[cell] = position
+        i = row * self.stride + (column >> 3)
+        mask = 1 << (column & 7)
+        was = bool(self.bits[i] & mask)
+        if opted_in:
+            self.bits[i] |= mask
+        else:
+            self.bits[i] &= ~mask & 0xFF
+        return was != bool(opted_in)
+
+    def get(self, wallet, issuer_key):
+        """Whether a member has opted into an issuer"""
+        row = self._rows.get(wallet)
+        column = self._columns.get(issuer_key)
+        if row is None or column is None:
+            return False
+        return bool(self.bits[row * self.stride + (column >> 3)] & (1 << (column & 7)))
+
+    def opted_in_counts(self):
+        """{issuer_key: members opted in}"""
+        stride = self.stride
+        counts = {}
+        for column, key in enumerate(self.issuer_keys):
+            mask = 1 << (column & 7)
+            column_bytes = self.bits[column >> 3::stride]
+            counts[key] = sum(1 for byte in column_bytes if byte & mask)
+        return counts
+
+    def ledger_index(self):
+        """Newest ledger any cell reflects (None before the first snapshot)"""
+        newest = max(self.positions, default=0)
+        return newest >> 20 if newest else None
+
+    def with_columns(self, issuer_keys):
+        """
+        Copy of the matrix with other issuer columns
+
+        Columns of issuers in both keep their bits; new columns start at zero
+        with no position, so the first snapshot or event fills them.
+        """
+        matrix = AccessMatrix(issuer_keys)
+        for wallet in self.members:
+            matrix.add_member(wallet)
+            for key in issuer_keys:
+                if key in self._columns:
+                    cell = self._rows[wallet] * len(self.issuer_keys) + self._columns[key]
+                    matrix.set(wallet, key, self.get(wallet, key), self.positions[cell])
+        return matrix
+
+    def merge(self, other):
+        """Take every cell another copy of the group holds a newer state of"""
+        width = len(other.issuer_keys)
+        for wallet, row in other._rows.items():
+            if wallet not in self._rows:
+                continue
+            for column, key in enumerate(other.issuer_keys):
+                position = other.positions[row * width + column]
+                if position:
+                    self.set(wallet, key, other.get(wallet, key), position)
+
+    def to_dict(self):
+        return {
+            "issuer_keys": self.issuer_keys,
+            "members": self.members,
+            "bits": base64.b64encode(bytes(self.bits)).decode(),
+            "positions": list(self.positions),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        matrix = cls(data["issuer_keys"])
+        matrix.members = list(data["members"])
+        matrix._rows = {wallet: row for row, wallet in enumerate(matrix.members)}
+        matrix.bits = bytearray(base64.b64decode(data["bits"]))
+        matrix.positions = array("Q", data["positions"])
+        return matrix
+
+
+class WalletGroup:
+    """A named access matrix and the hash of its manage token"""
+
+    def __init__(self, name, token_sha256, matrix, created_at=None):
+        self.name = name
+        self.token_sha256 = token_sha256
+        self.matrix = matrix
+        self.created_at = created_at or int(time.time())
+        # (synced_ledger, encoded view), rebuilt after the matrix or synced ledger changes
+        self._view = None
+
+    def changed(self):
+        self._view = None
+
+    def to_json(self):
+        return json.dumps({"token_sha256": self.token_sha256, "created_at": self.created_at,
+                           "matrix": self.matrix.to_dict()}, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_json(cls, name, raw):
+        data = json.loads(raw)
+        return cls(name, data["token_sha256"], AccessMatrix.from_dict(data["matrix"]), data.get("created_at"))
+
+    def view(self, synced_ledger):
+        """
+        The group as a compact response document
+
+        Returns:
+            Tuple of (PreEncoded document, body bytes, ETag)
+        """
+        if self._view is None or self._view[0] != synced_ledger:
+            matrix = self.matrix
+            document = PreEncoded({
+                "group": self.name,
+                "issuers": matrix.issuer_keys,
+                "members": matrix.members,
+                "member_count": len(matrix),
+                "stride": matrix.stride,
+                "bits": base64.b64encode(bytes(matrix.bits)).decode(),
+                "opted_in_counts": matrix.opted_in_counts(),
+                "ledger_index": matrix.ledger_index(),
+                "synced_ledger": synced_ledger,
+            })
+            self._view = (synced_ledger, (document, document.body(), _etag(document.body())))
+        return self._view[1]
+
+
+class GroupStore:
+    """Wallet groups with incrementally maintained access matrices"""
+
+    def __init__(self, backend=None, max_members=None, build_workers=None, reload_interval=5.0):
+        """
+        Initialize group store
+
+        Args:
+            backend: Shared CacheBackend holding the groups (default: GROUPS_URL)
+            max_members: Largest allowed group (default: GROUP_MAX_MEMBERS)
+            build_workers: Concurrent lookups when members join (default: GROUP_BUILD_WORKERS)
+            reload_interval: Seconds between checks for changes by other instances
+        """
+        self.backend = backend or backend_from_url(settings.GROUPS_URL)
+        self.max_members = max_members or settings.GROUP_MAX_MEMBERS
+        self.build_workers = build_workers or settings.GROUP_BUILD_WORKERS
+        self.reload_interval = reload_interval
+        self.groups = {}
+        # Issuer address -> last ledger whose transactions were applied
+        self.synced_ledger = {}
+        # Wallet -> names of the groups it belongs to
+        self._by_wallet = {}
+        self._lock = threading.RLock()
+        self._log_seq = None
+        self._next_check = 0.0
+        self._last_sync = 0.0
+        # Changes not written to the shared store yet
+        self._dirty = set()
+        self._index_dirty = False
+        # (wallet, lines, ledger_index) from trustline lookups, applied in the background
+        self._queued = deque()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="group-store")
+        self._scheduled = False
+        self._schedule_lock = threading.Lock()
+        self.stats = {"snapshots_applied": 0, "events_applied": 0, "bits_changed": 0, "syncs": 0,
+                      "writes": 0, "write_errors": 0}
+
+    # Persistence
+
+    def refresh(self, force=False):
+        """Reload the groups other instances changed since the last check"""
+        now = time.monotonic()
+        if self.backend is None or (not force and now < self._next_check):
+            return
+        with self._lock:
+            self._next_check = now + self.reload_interval
+            latest, messages = self.backend.poll(_CHANGES_CHANNEL, self._log_seq or 0)
+            if self._log_seq is not None and latest == self._log_seq:
+                return
+            # First load, or part of the log was trimmed: reload every group
+            names = None if self._log_seq is None or messages is None else set(messages)
+            self._load(names)
+            self._log_seq = latest
+
+    def _load(self, names):
+        """Read the index and the given groups (None: all) from the store (caller holds the lock)"""
+        raw = self.backend.get(_INDEX_KEY)
+        index = json.loads(raw) if raw else {}
+        for address, ledger_index in index.get("synced_ledger", {}).items():
+            self.synced_ledger[address] = max(self.synced_ledger.get(address, ledger_index), ledger_index)
+        stored = set(index.get("names", []))
+        for name in list(self.groups):
+            if name not in stored:
+                del self.groups[name]
+                self._dirty.discard(name)
+        for name in stored:
+            if names is not None and name not in names and name in self.groups:
+                continue
+            raw = self.backend.get(_GROUP_KEY + name)
+            if raw is None:
+                self.groups.pop(name, None)
+                continue
+            loaded = WalletGroup.from_json(name, raw)
+            current = self.groups.get(name)
+            if current is not None and name in self._dirty:
+                # Keep this instance's unwritten cells where they are newer
+                loaded.matrix.merge(current.matrix)
+            self.groups[name] = loaded
+        self._reindex()
+
+    def _reindex(self):
+        by_wallet = {}
+        for name, group in self.groups.items():
+            for wallet in group.matrix.members:
+                by_wallet.setdefault(wallet, set()).add(name)
+        self._by_wallet = by_wallet
+
+    @contextmanager
+    def _store_lock(self):
+        """Hold the store-wide lock, so instances don't overwrite each other's changes"""
+        if self.backend is None:
+            yield
+            return
+        token = secrets.token_hex(16).encode()
+        deadline = time.monotonic() + _LOCK_WAIT_SECONDS
+        while not self.backend.add(_LOCK_KEY, token, _LOCK_TTL_SECONDS):
+            if time.monotonic() >= deadline:
+                raise TimeoutError("The group store is locked by another instance")
+            time.sleep(0.02)
+        try:
+            yield
+        finally:
+            if self.backend.get(_LOCK_KEY) == token:
+                self.backend.delete(_LOCK_KEY)
+
+    def _write(self):
+        """Write changed groups and the index, and announce them (caller holds both locks)"""
+        if self.backend is not None:
+            for name in sorted(self._dirty):
+                group = self.groups.get(name)
+                if group is None:
+                    self.backend.delete(_GROUP_KEY + name)
+                else:
+                    self.backend.set(_GROUP_KEY + name, group.to_json(), _STORE_TTL_SECONDS)
+                self._log_seq = self.backend.publish(_CHANGES_CHANNEL, name)
+            if self._index_dirty:
+                index = {"names": sorted(self.groups), "synced_ledger": self.synced_ledger}
+                self.backend.set(_INDEX_KEY, json.dumps(index, separators=(",", ":")).encode(),
+                                 _STORE_TTL_SECONDS)
+                self._log_seq = self.backend.publish(_CHANGES_CHANNEL, "")
+            self.stats["writes"] += 1
+        self._dirty.clear()
+        self._index_dirty = False
+
+    def _update(self, change):
+        """
+        Apply a change to the latest stored groups and write them
+
+        Args:
+            change: Callable run with the store locked and freshly loaded; it
+                marks what it changed in _dirty and _index_dirty
+
+        Returns:
+            Whatever change returns
+        """
+        with self._lock, self._store_lock():
+            self.refresh(force=True)
+            result = change()
+            self._write()
+            return result
+
+    def flush(self):
+        """Apply queued lookups and write in-memory changes to the shared store"""
+        with self._lock:
+            while self._queued:
+                self._apply_snapshot(*self._queued.popleft())
+            if not self._dirty and not self._index_dirty:
+                self.refresh()
+                return
+            self._update(lambda: None)
+
+    def _schedule(self):
+        """Run flush() on the background thread unless a run is already queued"""
+        with self._schedule_lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor.submit(self._background)
+
+    def _background(self):
+        with self._schedule_lock:
+            self._scheduled = False
+        try:
+            self.flush()
+        except Exception as e:
+            # Changes stay in memory and are written with the next flush
+            with self._lock:
+                self.stats["write_errors"] += 1
+            print(f"Group store write failed: {e}", file=sys.stderr)
+
+    # Building rows
+
+    def _issuers(self):
+        return [VERIFIED_ISSUERS[key] for key in VERIFIED_ISSUERS]
+
+    def _ensure_watermarks(self, xrpl_client, issuers):
+        """Start syncing new issuers from the current validated ledger"""
+        missing = [issuer for issuer in issuers if issuer["address"] not in self.synced_ledger]
+        started = {}
+        for issuer in missing:
+            try:
+                _, ledger_index = xrpl_client.get_account_root(issuer["address"])
+            except AccountNotFoundError:
+                continue
+            if ledger_index is not None:
+                started[issuer["address"]] = int(ledger_index)
+        return started
+
+    def _lookup_columns(self, xrpl_client, wallets, issuers):
+        """
+        Which wallets trust each issuer, read from the issuers' side
+
+        Each issuer's trustlines are paged once (concurrently across issuers)
+        and intersected with the wallets, so the cost follows the number of
+        issuers, not members, and nothing is charged to the members' admission
+        buckets. Wallets without a line (including unfunded ones) don't trust
+        the issuer as of its listing's ledger.
+
+        Returns:
+            List of (issuer_key, set of wallets trusting it, ledger_index or None)
+        """
+        members = set(wallets)
+
+        def lookup(issuer):
+            currency = format_currency_code(issuer["currency"])
+            try:
+                lines, ledger_index = xrpl_client.get_all_trustlines(issuer["address"])
+            except AccountNotFoundError:
+                # No issuer account, no trustlines; any later event overrides this
+                return issuer["key"], set(), None
+            holders = {line["account"] for line in lines
+                       if line["currency"] == currency and line["account"] in members}
+            return issuer["key"], holders, ledger_index
+
+        if len(issuers) <= 1:
+            return [lookup(issuer) for issuer in issuers]
+        with ThreadPoolExecutor(max_workers=self.build_workers) as pool:
+            return list(pool.map(lookup, issuers))
+
+    def _apply_columns(self, group, wallets, columns):
+        """Record the lookups of some members (see _lookup_columns) in a group"""
+        for issuer_key, holders, ledger_index in columns:
+            position = ledger_position(ledger_index, _END_OF_LEDGER) if ledger_index is not None else 0
+            for wallet in wallets:
+                if group.matrix.set(wallet, issuer_key, wallet in holders, position):
+                    self.stats["bits_changed"] += 1
+            self.stats["snapshots_applied"] += 1
+        group.changed()
+        self._dirty.add(group.name)
+
+    def _prepare_members(self, xrpl_client, wallets):
+        """Validate wallets and look up their state before taking any lock"""
+        wallets = list(dict.fromkeys(wallets))
+        for wallet in wallets:
+            validate_address(wallet)
+        issuers = self._issuers()
+        # Watermarks first: events after them are synced, state before them is in the lookups
+        watermarks = self._ensure_watermarks(xrpl_client, issuers)
+        return wallets, self._lookup_columns(xrpl_client, wallets, issuers), watermarks
+
+    def _check_size(self, count):
+        if count > self.max_members:
+            raise ValueError(f"A group holds at most {self.max_members} wallets")
+
+    # Group management
+
+    def create_group(self, name, wallets, xrpl_client):
+        """
+        Create a group and build its access matrix
+
+        Args:
+            name: Group name (see validate_group_name)
+            wallets: Member addresses
+            xrpl_client: XRPLClient used for the initial lookups
+
+        Returns:
+            Manage token for the group (shown once; only its hash is stored)
+
+        Raises:
+            ValueError: For a bad name, too many wallets or an existing group
+            InvalidAddressError: For a malformed wallet address
+        """
+        validate_group_name(name)
+        self._check_size(len(set(wallets)))
+        self.refresh()
+        if name in self.groups:
+            raise ValueError(f"Group already exists: {name}")
+        wallets, columns, watermarks = self._prepare_members(xrpl_client, wallets)
+        token = secrets.token_urlsafe(24)
+
+        def change():
+            if name in self.groups:
+                raise ValueError(f"Group already exists: {name}")
+            self._set_watermarks(watermarks)
+            matrix = AccessMatrix(list(VERIFIED_ISSUERS))
+            for wallet in wallets:
+                matrix.add_member(wallet)
+                self._by_wallet.setdefault(wallet, set()).add(name)
+            group = self.groups[name] = WalletGroup(name, _token_hash(token), matrix)
+            self._apply_columns(group, wallets, columns)
+            self._index_dirty = True
+
+        self._update(change)
+        return token
+
+    def add_members(self, group, wallets, xrpl_client):
+        """
+        Add wallets to a group (existing members are skipped)
+
+        Returns:
+            Number of wallets added
+
+        Raises:
+            ValueError: If the group would exceed the size limit
+            InvalidAddressError: For a malformed wallet address
+        """
+        wallets = [wallet for wallet in dict.fromkeys(wallets) if wallet not in group.matrix]
+        self._check_size(len(group.matrix) + len(wallets))
+        wallets, columns, watermarks = self._prepare_members(xrpl_client, wallets)
+
+        def change():
+            current = self.groups.get(group.name)
+            if current is None:
+                raise KeyError(group.name)
+            added = sum(1 for wallet in wallets if wallet not in current.matrix)
+            self._check_size(len(current.matrix) + added)
+            self._set_watermarks(watermarks)
+            for wallet in wallets:
+                current.matrix.add_member(wallet)
+                self._by_wallet.setdefault(wallet, set()).add(current.name)
+            self._apply_columns(current, wallets, columns)
+            return added
+
+        return self._update(change)
+
+    def remove_members(self, group, wallets):
+        """
+        Remove wallets from a group
+
+        Returns:
+            Number of wallets removed
+        """
+        def change():
+            current = self.groups.get(group.name)
+            if current is None:
+                raise KeyError(group.name)
+            removed = 0
+            for wallet in wallets:
+                if current.matrix.remove_member(wallet):
+                    removed += 1
+                    names = self._by_wallet.get(wallet, set())
+                    names.discard(current.name)
+                    if not names:
+                        self._by_wallet.pop(wallet, None)
+            current.changed()
+            self._dirty.add(current.name)
+            return removed
+
+        return self._update(change)
+
+    def delete_group(self, group):
+        """Delete a group"""
+        def change():
+            self.groups.pop(group.name, None)
+            self._reindex()
+            self._dirty.add(group.name)
+            self._index_dirty = True
+
+        self._update(change)
+
+    def authorize(self, name, token):
+        """
+        The group a manage token opens
+
+        Args:
+            name: Group name
+            token: Manage token from create_group
+
+        Returns:
+            WalletGroup, or None if the group doesn't exist or the token is wrong
+        """
+        self.refresh()
+        group = self.groups.get(name)
+        if group is None or not token:
+            return None
+        if not hmac.compare_digest(_token_hash(token), group.token_sha256):
+            return None
+        return group
+
+    def get_view(self, group, xrpl_client=None, fields=None):
+        """
+        A group's access matrix as a response body
+
+        Brings the matrix up to date first: catches up on ledger history when
+        the last sync is older than GROUP_SYNC_INTERVAL_SECONDS (a failed sync
+        serves the matrix as it is, with its synced_ledger), and fills columns
+        of issuers added to the registry since the group was built.
+
+        Args:
+            group: WalletGroup from authorize()
+            xrpl_client: XRPLClient for syncing (None: serve as stored)
+            fields: fields= selector value (optional)
+
+        Returns:
+            Tuple of (body bytes, ETag)
+        """
+        if xrpl_client is not None:
+            if group.matrix.issuer_keys != list(VERIFIED_ISSUERS):
+                self._rebuild_columns(group.name, xrpl_client)
+            if time.monotonic() - self._last_sync >= settings.GROUP_SYNC_INTERVAL_SECONDS:
+                try:
+                    self.sync(xrpl_client)
+                except (XRPLRequestFailureException, OSError) as e:
+                    print(f"Group sync failed: {e}", file=sys.stderr)
+            group = self.groups.get(group.name, group)
+        with self._lock:
+            synced = [self.synced_ledger[issuer["address"]] for issuer in self._issuers()
+                      if issuer["address"] in self.synced_ledger]
+            document, body, etag = group.view(min(synced) if synced else None)
+        if fields is None:
+            return body, etag
+        body = encode_json(document, parse_fields(fields))
+        return body, _etag(body)
+
+    def _rebuild_columns(self, name, xrpl_client):
+        """Match a group's columns to the registry, looking up the new issuers"""
+        group = self.groups[name]
+        issuer_keys = list(VERIFIED_ISSUERS)
+        new_issuers = [VERIFIED_ISSUERS[key] for key in issuer_keys if key not in group.matrix.issuer_keys]
+        watermarks = self._ensure_watermarks(xrpl_client, new_issuers)
+        members = list(group.matrix.members)
+        columns = self._lookup_columns(xrpl_client, members, new_issuers) if new_issuers else []
+
+        def change():
+            current = self.groups.get(name)
+            if current is None:
+                return
+            self._set_watermarks(watermarks)
+            current.matrix = current.matrix.with_columns(issuer_keys)
+            self._apply_columns(current, members, columns)
+
+        self._update(change)
+
+    def _set_watermarks(self, watermarks):
+        for address, ledger_index in watermarks.items():
+            if address not in self.synced_ledger:
+                self.synced_ledger[address] = ledger_index
+                self._index_dirty = True
+
+    # Incremental maintenance
+
+    def update_wallet(self, wallet, lines, ledger_index):
+        """
+        Queue a fresh lookup of a wallet for every group it belongs to
+
+        Registered as a trustline listener (see get_group_store), so the
+        gate's own ledger reads keep the matrices current. Nothing is read or
+        written here: the lookup is applied and stored by the background
+        thread, which also picks up groups changed by other instances.
+
+        Args:
+            wallet: Wallet address
+            lines: {issuer_key: has_trustline} (any subset of the issuers)
+            ledger_index: Validated ledger the lookup read
+        """
+        if ledger_index is not None and wallet in self._by_wallet:
+            self._queued.append((wallet, lines, ledger_index))
+        if self._queued or time.monotonic() >= self._next_check:
+            self._schedule()
+
+    def _apply_snapshot(self, wallet, lines, ledger_index):
+        """Apply one lookup to the wallet's groups (caller holds the lock)"""
+        position = ledger_position(ledger_index, _END_OF_LEDGER)
+        changed = 0
+        for name in self._by_wallet.get(wallet, ()):
+            group = self.groups[name]
+            group_changed = sum(group.matrix.set(wallet, issuer_key, opted_in, position)
+                                for issuer_key, opted_in in lines.items())
+            if group_changed:
+                group.changed()
+                self._dirty.add(name)
+            changed += group_changed
+        self.stats["snapshots_applied"] += 1
+        self.stats["bits_changed"] += changed
+        return changed
+
+    def apply_transaction(self, entry):
+        """
+        Apply the consent events of one validated transaction
+
+        Args:
+            entry: Transaction record (account_tx entry or dump line)
+
+        Returns:
+            Number of bits changed
+        """
+        issuers = self._issuers()
+        issuers_by_address = {issuer["address"]: format_currency_code(issuer["currency"]) for issuer in issuers}
+        keys_by_address = {issuer["address"]: issuer["key"] for issuer in issuers}
+        with self._lock:
+            return self._apply_events(extract_consent_events(entry, issuers_by_address), keys_by_address)
+
+    def _apply_events(self, events, keys_by_address):
+        changed = 0
+        for issuer_address, holder, ledger_index, tx_index, kind, _, _ in events:
+            names = self._by_wallet.get(holder)
+            if not names or ledger_index is None:
+                continue
+            position = ledger_position(ledger_index, tx_index)
+            issuer_key = keys_by_address[issuer_address]
+            for name in names:
+                group = self.groups[name]
+                if group.matrix.set(holder, issuer_key, kind != CONSENT_REMOVE, position):
+                    changed += 1
+                    group.changed()
+                    self._dirty.add(name)
+            self.stats["events_applied"] += 1
+        self.stats["bits_changed"] += changed
+        return changed
+
+    def sync(self, xrpl_client, page_size=400):
+        """
+        Apply every issuer's transactions since the last synced ledger
+
+        Costs one account_tx walk per issuer, independent of group sizes.
+        Pages are fetched without holding the store lock; the changes are
+        applied in memory and written by the background thread.
+
+        Args:
+            xrpl_client: XRPLClient instance
+            page_size: Transactions per account_tx page
+
+        Returns:
+            Number of bits changed
+        """
+        self.refresh()
+        self._last_sync = time.monotonic()
+        issuers = self._issuers()
+        issuers_by_address = {issuer["address"]: format_currency_code(issuer["currency"]) for issuer in issuers}
+        keys_by_address = {issuer["address"]: issuer["key"] for issuer in issuers}
+        events = []
+        synced = self._ensure_watermarks(xrpl_client, issuers)
+        for issuer in issuers:
+            address = issuer["address"]
+            if address in synced or address not in self.synced_ledger:
+                continue
+            ledger_index_min = self.synced_ledger[address] + 1
+            marker = None
+            while True:
+                try:
+                    result = xrpl_client.get_account_transactions(
+                        address,
+                        ledger_index_min=ledger_index_min,
+                        limit=page_size,
+                        marker=marker,
+                        forward=True
+                    )
+                except XRPLRequestFailureException as e:
+                    # Already synced to the latest validated ledger
+                    if e.error == "lgrIdxsInvalid":
+                        break
+                    raise
+                for entry in result.get("transactions", []):
+                    events.extend(extract_consent_events(entry, {address: issuers_by_address[address]}))
+                marker = result.get("marker")
+                if not marker:
+                    if result.get("ledger_index_max") is not None:
+                        synced[address] = result["ledger_index_max"]
+                    break
+
+        with self._lock:
+            changed = self._apply_events(events, keys_by_address)
+            for address, ledger_index in synced.items():
+                if ledger_index > self.synced_ledger.get(address, -1):
+                    self.synced_ledger[address] = ledger_index
+                    self._index_dirty = True
+            self.stats["syncs"] += 1
+            if self._dirty or self._index_dirty:
+                self._schedule()
+        return changed
+
+    def metrics(self):
+        """Group counters of this instance"""
+        with self._lock:
+            return dict(
+                self.stats,
+                groups=len(self.groups),
+                grouped_wallets=len(self._by_wallet),
+                queued_lookups=len(self._queued),
+                unwritten_groups=len(self._dirty),
+                synced_ledger=min(self.synced_ledger.values()) if self.synced_ledger else None
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+_gate_listener_started = False
+
+
+def get_group_store():
+    """Process-wide group store (also kept current by the gate's trustline lookups)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = GroupStore()
+                add_trustline_listener(store.update_wallet)
+                # Loaded in the background; group requests load it themselves
+                store._schedule()
+                _store = store
+    return _store
+
+
+def watch_gate_lookups():
+    """
+    Keep shared groups current from the gate's trustline lookups
+
+    Called by /api/check-trustline. Only when a shared store is configured
+    (GROUPS_URL or CACHE_L2_URL): without one, groups live in the instance
+    serving /api/group-access, which registers its own listener. The store is
+    set up once per process and a failure is only logged, so the group store
+    can never fail a gate check.
+    """
+    global _gate_listener_started
+    if _gate_listener_started or not settings.GROUPS_URL:
+        return
+    _gate_listener_started = True
+    try:
+        get_group_store()
+    except Exception as e:
+        print(f"Group store unavailable, gate lookups won't update groups: {e}", file=sys.stderr)
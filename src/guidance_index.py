@@ -0,0 +1,261 @@
+"""
+Guidance Index
+
+Inverted index over the issuer guidance documents in knowledgedocs/,
+partitioned by issuer key so a search only touches the issuers a user has
+opted into.
+
+The index is built once (demo/build_guidance_index.py) by streaming each .docx
+through an XML pull parser, and read at request time through a memory map.
+No docx parsing happens while serving.
+
+File layout (little-endian):
+    magic      8 bytes  b"GGIDX001"
+    header_len uint32
+    header     JSON: {"partitions": {issuer_key: {...term table, offsets...}}}
+    data       postings (uint32 passage, uint16 tf) pairs per term,
+               per-partition passage offsets (uint32), lengths (uint16)
+               and UTF-8 passage text
+"""
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+
+MAGIC = b"GGIDX001"
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "knowledgedocs", "guidance.idx"
+)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_POSTING = struct.Struct("<IH")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how in is it its may not of on or "
+    "that the their this to was were what which who will with without you your".split()
+)
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def iter_docx_paragraphs(path):
+    """
+    Stream paragraph text out of a .docx without loading the whole document tree
+
+    Args:
+        path: Path to the .docx file
+
+    Yields:
+        Paragraph text (may be empty for blank paragraphs)
+    """
+    with zipfile.ZipFile(path) as archive:
+        with archive.open("word/document.xml") as xml_stream:
+            parts = []
+            for event, elem in ET.iterparse(xml_stream, events=("end",)):
+                tag = elem.tag
+                if tag == _W + "t":
+                    parts.append(elem.text or "")
+                elif tag in (_W + "tab", _W + "br"):
+                    parts.append(" ")
+                elif tag == _W + "p":
+                    yield "".join(parts).strip()
+                    parts = []
+                    elem.clear()
+
+
+def iter_passages(paragraphs, max_words=80):
+    """
+    Group paragraphs into passages
+
+    A passage ends at a blank paragraph or once it reaches max_words.
+
+    Args:
+        paragraphs: Iterable of paragraph strings
+        max_words: Soft upper bound on passage length
+
+    Yields:
+        Passage text
+    """
+    current = []
+    words = 0
+    for paragraph in paragraphs:
+        if not paragraph:
+            if current:
+                yield "\n".join(current)
+                current, words = [], 0
+            continue
+        current.append(paragraph)
+        words += len(paragraph.split())
+        if words >= max_words:
+            yield "\n".join(current)
+            current, words = [], 0
+    if current:
+        yield "\n".join(current)
+
+
+def build_index(documents, output_path=None):
+    """
+    Build the index file from issuer documents
+
+    Args:
+        documents: Dict of issuer_key -> path to .docx
+        output_path: Where to write the index (default knowledgedocs/guidance.idx)
+
+    Returns:
+        Dict of issuer_key -> number of passages indexed
+    """
+    output_path = output_path or DEFAULT_INDEX_PATH
+    header = {"partitions": {}}
+    data = bytearray()
+
+    for issuer_key in sorted(documents):
+        path = documents[issuer_key]
+        texts = []
+        lengths = []
+        postings = {}
+        for passage_id, passage in enumerate(iter_passages(iter_docx_paragraphs(path))):
+            tokens = tokenize(passage)
+            texts.append(passage.encode("utf-8"))
+            lengths.append(min(len(tokens), 0xFFFF))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((passage_id, min(tf, 0xFFFF)))
+
+        terms = {}
+        for term in sorted(postings):
+            entries = postings[term]
+            terms[term] = [len(data), len(entries)]
+            for passage_id, tf in entries:
+                data += _POSTING.pack(passage_id, tf)
+
+        offsets_at = len(data)
+        position = 0
+        for text in texts:
+            data += struct.pack("<I", position)
+            position += len(text)
+        data += struct.pack("<I", position)
+        lengths_at = len(data)
+        data += struct.pack(f"<{len(lengths)}H", *lengths)
+        text_at = len(data)
+        for text in texts:
+            data += text
+
+        header["partitions"][issuer_key] = {
+            "document": os.path.basename(path),
+            "passages": len(texts),
+            "avg_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+            "terms": terms,
+            "offsets_at": offsets_at,
+            "lengths_at": lengths_at,
+            "text_at": text_at,
+        }
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(data)
+    os.replace(tmp_path, output_path)
+
+    return {key: part["passages"] for key, part in header["partitions"].items()}
+
+
+class GuidanceIndex:
+    """Read-only, memory-mapped view of a built guidance index"""
+
+    def __init__(self, path=None):
+        """
+        Open an index file
+
+        Args:
+            path: Path to the index (default knowledgedocs/guidance.idx)
+        """
+        self.path = path or os.environ.get("GUIDANCE_INDEX_PATH") or DEFAULT_INDEX_PATH
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != MAGIC:
+            raise ValueError(f"{self.path} is not a guidance index")
+        (header_len,) = struct.unpack_from("<I", self._map, 8)
+        self._data_start = 12 + header_len
+        self.partitions = json.loads(self._map[12:self._data_start])["partitions"]
+
+    def _passage_text(self, part, passage_id):
+        base = self._data_start
+        start, end = struct.unpack_from("<II", self._map, base + part["offsets_at"] + 4 * passage_id)
+        text_at = base + part["text_at"]
+        return self._map[text_at + start:text_at + end].decode("utf-8")
+
+    def search(self, query, issuer_keys, limit=5):
+        """
+        Rank passages for a query within the given issuers' partitions
+
+        Args:
+            query: Free-text query
+            issuer_keys: Issuer keys the caller may search (others are never read)
+            limit: Maximum number of results
+
+        Returns:
+            List of result dictionaries, best first
+        """
+        terms = set(tokenize(query))
+        base = self._data_start
+        scored = []
+
+        for issuer_key in issuer_keys:
+            part = self.partitions.get(issuer_key)
+            if not part or not terms:
+                continue
+            n = part["passages"]
+            avg_length = part["avg_length"] or 1.0
+            lengths_at = base + part["lengths_at"]
+            scores = {}
+            for term in terms:
+                entry = part["terms"].get(term)
+                if not entry:
+                    continue
+                offset, df = entry
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for passage_id, tf in _POSTING.iter_unpack(
+                    self._map[base + offset:base + offset + df * _POSTING.size]
+                ):
+                    (length,) = struct.unpack_from("<H", self._map, lengths_at + 2 * passage_id)
+                    norm = _K1 * (1 - _B + _B * length / avg_length)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+            for passage_id, score in scores.items():
+                scored.append((score, issuer_key, passage_id))
+
+        results = []
+        for score, issuer_key, passage_id in heapq.nlargest(limit, scored):
+            results.append({
+                "issuer": issuer_key,
+                "passage": passage_id,
+                "score": round(score, 4),
+                "text": self._passage_text(self.partitions[issuer_key], passage_id),
+            })
+        return results
+
+
+_default_index = None
+
+
+def get_index():
+    """Get the process-wide index (opened on first use)"""
+    global _default_index
+    if _default_index is None:
+        _default_index = GuidanceIndex()
+    return _default_index
@@ -0,0 +1,125 @@
+"""
+HTTP Helpers
+
+Response helpers shared by the serverless handlers in api/, so every endpoint
+answers bad input with the same 4xx statuses and error shape, and supports
+fields= selection and compressed responses.
+"""
+import math
+from urllib.parse import parse_qs, urlparse
+
+from xrpl.clients import XRPLRequestFailureException
+
+from src.admission import AdmissionRejected
+from src.latency_budget import LatencyBudgetExceeded
+from src.response_encoding import encode_for_client, encode_json, parse_fields
+from src.xrpl_client import AccountNotFoundError, InvalidAddressError
+
+
+def send_json(handler, payload, status=200, methods="GET, OPTIONS", headers=None, fields=None):
+    """
+    Write a complete JSON response
+    
+    Successful responses keep only the fields the client selected (fields=
+    query parameter) and are compressed when the client accepts it (see
+    src/response_encoding.py).
+    
+    Args:
+        handler: BaseHTTPRequestHandler instance
+        payload: JSON-serializable response body
+        status: HTTP status code
+        methods: Value for Access-Control-Allow-Methods
+        headers: Extra response headers (optional)
+        fields: Field selector overriding the query parameter (optional)
+    
+    Raises:
+        ValueError: For a malformed field selector
+    """
+    selector = None
+    if 200 <= status < 300:
+        selector = parse_fields(fields if fields is not None else requested_fields(handler))
+    body = encode_json(payload, selector)
+    send_body(handler, body, status=status, headers=dict(
+        headers or {},
+        **{'Access-Control-Allow-Methods': methods,
+           'Access-Control-Allow-Headers': 'Content-Type, Authorization'}
+    ))
+
+
+def requested_fields(handler):
+    """The request's fields= query parameter (None if absent)"""
+    return parse_qs(urlparse(handler.path).query).get('fields', [None])[0]
+
+
+def send_body(handler, body, status=200, headers=None, content_type='application/json'):
+    """
+    Write encoded response bytes, compressed if the client accepts it
+    
+    Args:
+        handler: BaseHTTPRequestHandler instance
+        body: Response bytes
+        status: HTTP status code
+        headers: Extra response headers (optional)
+        content_type: Content-Type of the body
+    """
+    accept_encoding = handler.headers.get('Accept-Encoding') if handler.headers else None
+    body, encoding = encode_for_client(body, accept_encoding)
+    handler.send_response(status)
+    handler.send_header('Content-type', content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    headers = dict(headers or {})
+    vary = headers.pop('Vary', None)
+    handler.send_header('Vary', f'Accept-Encoding, {vary}' if vary else 'Accept-Encoding')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def error_response(error):
+    """
+    Map an exception to an HTTP status and error body
+    
+    Args:
+        error: Exception raised while handling a request
+        
+    Returns:
+        Tuple of (status code, payload dictionary, extra headers)
+    """
+    if isinstance(error, InvalidAddressError):
+        return 400, {'error': 'Invalid wallet_address', 'message': str(error)}, {}
+    if isinstance(error, AccountNotFoundError):
+        return 404, {
+            'error': 'Account not found',
+            'message': str(error),
+            'wallet_address': error.address
+        }, {}
+    if isinstance(error, AdmissionRejected):
+        retry_after = max(1, math.ceil(error.retry_after))
+        return 429, {
+            'error': 'Too many requests',
+            'message': str(error),
+            'retry_after': retry_after
+        }, {'Retry-After': str(retry_after)}
+    if isinstance(error, LatencyBudgetExceeded):
+        retry_after = max(1, math.ceil(error.retry_after))
+        return 503, {
+            'error': 'Ledger lookup timed out',
+            'message': str(error),
+            'retry_after': retry_after
+        }, {'Retry-After': str(retry_after)}
+    if isinstance(error, ValueError):
+        # Malformed JSON bodies and query parameters
+        return 400, {'error': str(error)}, {}
+    if isinstance(error, XRPLRequestFailureException):
+        return 502, {'error': str(error)}, {}
+    return 500, {'error': str(error)}, {}
+
+
+def send_error(handler, error, methods="GET, OPTIONS"):
+    """Write the JSON error response for an exception (see error_response)"""
+    status, payload, headers = error_response(error)
+    send_json(handler, payload, status=status, methods=methods, headers=headers)
@@ -0,0 +1,261 @@
+"""
+Offline Ingestion
+
+Builds our indexes from exported transaction or ledger dumps instead of
+paging public RPC.
+
+Dumps are JSON Lines files (optionally .gz). Each line is either one
+transaction record (any shape accepted by src/ledger_events.py) or a ledger
+with a "transactions" array. Lines are streamed, so memory stays bounded
+regardless of dump size:
+
+    1. A raw-bytes prefilter drops every line that does not mention a watched
+       issuer address, before any JSON parsing.
+    2. Surviving lines are parsed in batches across a process pool, with a
+       bounded number of batches in flight.
+    3. Workers return compact consent and purchase events, which the parent
+       applies to a ConsentTimeline (same file format as the online path), a
+       purchases list and the running issuer analytics (src/analytics.py).
+"""
+import gzip
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+
+from src.analytics import IssuerAnalytics
+from src.consent_timeline import ConsentTimeline
+from src.ledger_events import extract_consent_events, extract_purchase_event
+from src.xrpl_client import format_currency_code
+
+
+PURCHASE_FIELDS = (
+    "issuer", "buyer", "product_id", "drops", "ledger_index", "tx_index", "close_time", "hash"
+)
+
+# Per-worker state, set once by _init_worker instead of shipped with every batch
+_issuers_by_address = None
+_issuer_addresses = None
+
+
+def iter_dump_lines(path):
+    """
+    Stream raw lines from a dump file
+
+    Args:
+        path: JSON Lines file, gzip-compressed if it ends in .gz
+
+    Yields:
+        Lines as bytes
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def _init_worker(issuers_by_address):
+    global _issuers_by_address, _issuer_addresses
+    _issuers_by_address = issuers_by_address
+    _issuer_addresses = frozenset(issuers_by_address)
+
+
+def _iter_transactions(record):
+    """Yield transaction records from a dump line (a transaction or a whole ledger)"""
+    transactions = record.get("transactions")
+    if isinstance(transactions, list):
+        ledger_index = record.get("ledger_index")
+        if isinstance(ledger_index, str) and ledger_index.isdigit():
+            ledger_index = int(ledger_index)
+        for tx in transactions:
+            if isinstance(tx, dict):
+                if ledger_index is not None and "ledger_index" not in tx:
+                    tx = dict(tx, ledger_index=ledger_index)
+                yield tx
+    else:
+        yield record
+
+
+def parse_batch(lines):
+    """
+    Parse one batch of prefiltered lines into events (runs in a worker)
+
+    Args:
+        lines: List of raw JSON lines
+
+    Returns:
+        Tuple of (consent events, purchase events, transactions seen)
+    """
+    consent_events = []
+    purchase_events = []
+    seen = 0
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        for entry in _iter_transactions(record):
+            seen += 1
+            consent_events.extend(extract_consent_events(entry, _issuers_by_address))
+            purchase = extract_purchase_event(entry, _issuer_addresses)
+            if purchase is not None:
+                purchase_events.append(purchase)
+    return consent_events, purchase_events, seen
+
+
+class DumpIngestor:
+    """Streams dumps through a process pool into consent and purchase indexes"""
+
+    def __init__(self, issuers, workers=None, batch_size=2000, max_pending=None):
+        """
+        Initialize ingestor
+
+        Args:
+            issuers: Issuer dictionaries ("address", "currency") to keep
+            workers: Worker processes (default: CPU count; 0 parses in-process)
+            batch_size: Lines per batch sent to a worker
+            max_pending: Batches in flight at once (bounds memory; default 2 per worker)
+        """
+        issuers = list(issuers)
+        self.issuers_by_address = {
+            issuer["address"]: format_currency_code(issuer["currency"]) for issuer in issuers
+        }
+        self.workers = os.cpu_count() if workers is None else workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending or max(2, 2 * (self.workers or 1))
+        self._prefilter = re.compile(
+            b"|".join(re.escape(address.encode("ascii")) for address in self.issuers_by_address)
+        )
+        self.timeline = ConsentTimeline(issuers)
+        self.analytics = IssuerAnalytics(issuers)
+        self.purchases = []
+        # Issuer address -> highest ledger with one of its transactions applied
+        self.max_ledger = {}
+        self._append_purchases = False
+        self.stats = {"lines": 0, "matched_lines": 0, "transactions": 0, "consent_events": 0,
+                      "purchases": 0, "seconds": 0.0}
+
+    def _batches(self, paths):
+        search = self._prefilter.search
+        batch = []
+        for path in paths:
+            for line in iter_dump_lines(path):
+                self.stats["lines"] += 1
+                if not search(line):
+                    continue
+                self.stats["matched_lines"] += 1
+                batch.append(line)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _apply(self, result):
+        consent_events, purchase_events, seen = result
+        for issuer_address, holder, ledger_index, tx_index, kind, _, close_time in consent_events:
+            self.timeline.add_event(issuer_address, holder, ledger_index, tx_index, kind)
+            self.analytics.add_consent_event(issuer_address, holder, ledger_index, tx_index, kind, close_time)
+            self._note_ledger(issuer_address, ledger_index)
+        for purchase in purchase_events:
+            self._note_ledger(purchase[0], purchase[4])
+            # Purchases already counted by a previous run (see resume) are skipped
+            if self.analytics.add_purchase(*purchase):
+                self.purchases.append(purchase)
+        self.stats["transactions"] += seen
+        self.stats["consent_events"] += len(consent_events)
+        self.stats["purchases"] += len(purchase_events)
+
+    def _note_ledger(self, issuer_address, ledger_index):
+        if isinstance(ledger_index, int) and ledger_index > self.max_ledger.get(issuer_address, -1):
+            self.max_ledger[issuer_address] = ledger_index
+
+    def ingest(self, paths, progress=None):
+        """
+        Ingest one or more dump files
+
+        Args:
+            paths: Dump file paths
+            progress: Optional callback(stats) called after each batch
+
+        Returns:
+            Stats dictionary (lines, matched_lines, transactions, consent_events,
+            purchases, seconds)
+        """
+        start = time.perf_counter()
+        if not self.workers:
+            _init_worker(self.issuers_by_address)
+            for batch in self._batches(paths):
+                self._apply(parse_batch(batch))
+                if progress:
+                    progress(self.stats)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.issuers_by_address,)
+            ) as pool:
+                pending = deque()
+                for batch in self._batches(paths):
+                    pending.append(pool.submit(parse_batch, batch))
+                    # Wait for the oldest batch before reading further ahead
+                    while len(pending) >= self.max_pending:
+                        self._apply(pending.popleft().result())
+                        if progress:
+                            progress(self.stats)
+                while pending:
+                    self._apply(pending.popleft().result())
+                    if progress:
+                        progress(self.stats)
+        self.stats["seconds"] += time.perf_counter() - start
+        return self.stats
+
+    def resume(self, output_dir):
+        """
+        Continue from indexes written by a previous save()
+
+        The consent timeline and analytics are loaded; events the analytics
+        already counted are not counted again (dumps may be older or newer),
+        and save() appends only new purchases to purchases.jsonl.
+
+        Args:
+            output_dir: Directory a previous run saved into
+        """
+        timeline_path = os.path.join(output_dir, "consent_timeline.json")
+        analytics_path = os.path.join(output_dir, "analytics.json")
+        if os.path.exists(timeline_path):
+            self.timeline.load(timeline_path)
+        if os.path.exists(analytics_path):
+            self.analytics.load(analytics_path)
+        self._append_purchases = True
+
+    def save(self, output_dir):
+        """
+        Write the indexes
+
+        The timeline records the highest ingested ledger of each issuer as its
+        synced ledger, so online syncing (ConsentTimeline.ingest_issuer_history)
+        continues after the dump instead of paging the history again.
+
+        Files:
+            consent_timeline.json  ConsentTimeline.save() format
+            purchases.jsonl        one purchase per line
+            analytics.json         IssuerAnalytics.save() format (served by /api/issuer-stats)
+            analytics.json.N.keys  keys of the events counted into it (read by resume())
+
+        Args:
+            output_dir: Directory to write into (created if missing)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        for issuer_address, ledger_index in self.max_ledger.items():
+            synced = self.timeline.synced_ledger.get(issuer_address, -1)
+            self.timeline.synced_ledger[issuer_address] = max(synced, ledger_index)
+        self.timeline.save(os.path.join(output_dir, "consent_timeline.json"))
+        self.analytics.save(os.path.join(output_dir, "analytics.json"))
+        mode = "a" if self._append_purchases else "w"
+        with open(os.path.join(output_dir, "purchases.jsonl"), mode) as f:
+            for purchase in self.purchases:
+                f.write(json.dumps(dict(zip(PURCHASE_FIELDS, purchase))) + "\n")
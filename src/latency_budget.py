@@ -0,0 +1,103 @@
+"""
+Latency Budget
+
+Gate checks (/api/check-trustline, /api/issuer-products) answer within
+GATE_DEADLINE_SECONDS even while rippled is slow:
+
+    1. A fresh cached snapshot answers immediately.
+    2. Otherwise the ledger lookup runs on a refresh thread and the request
+       waits for it up to the deadline.
+    3. If the deadline passes, the request gets the last known decision
+       (marked stale, with its ledger index and age) and the lookup keeps
+       running; when it completes it refreshes the cache for the next request.
+       Concurrent requests for the same wallet share one lookup. Only
+       existing trustlines are answered from the cache, fresh or stale; a
+       wallet missing one is always read from the ledger (it may have just
+       opted in).
+    4. With nothing known about the wallet the request fails fast with
+       LatencyBudgetExceeded (503 with Retry-After).
+
+On serverless platforms a lookup still running when the response is sent may
+be frozen with the instance; it completes or times out on the next request.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from config import settings
+from src.cache import get_cached_trustline_state, refresh_trustline_state
+
+
+class LatencyBudgetExceeded(Exception):
+    """Raised when the ledger is too slow and no earlier decision is known"""
+
+    def __init__(self, budget, retry_after=1.0):
+        super().__init__(f"Ledger lookup did not finish within {budget:g}s; please retry")
+        self.retry_after = retry_after
+
+
+_executor = None
+_executor_lock = threading.Lock()
+# (wallet, issuer keys) -> Future of the running lookup
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.GATE_REFRESH_WORKERS,
+                                               thread_name_prefix="gate-refresh")
+    return _executor
+
+
+def _refresh(xrpl_client, user_address, issuers):
+    """Start (or join) the ledger lookup for a wallet and set of issuers"""
+    key = (user_address, tuple(issuer["key"] for issuer in issuers))
+    with _lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        future = _get_executor().submit(refresh_trustline_state, xrpl_client, user_address, issuers)
+        _in_flight[key] = future
+    future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return future
+
+
+def get_trustline_decision(xrpl_client, user_address, issuers, budget=None):
+    """
+    Which issuers a wallet trusts, within a latency budget
+
+    Args:
+        xrpl_client: XRPLClient used for the lookup
+        user_address: User's XRPL address
+        issuers: Issuer dictionaries (with "key", "address", "currency")
+        budget: Seconds to wait for the ledger (default: GATE_DEADLINE_SECONDS;
+            0 waits as long as the lookup takes)
+
+    Returns:
+        Dictionary with lines ({issuer_key: has_trustline}), ledger_index,
+        stale (True for a last known decision) and age_seconds
+
+    Raises:
+        LatencyBudgetExceeded: If the deadline passed with no earlier decision
+        AccountNotFoundError, XRPLRequestFailureException: From the lookup
+    """
+    budget = settings.GATE_DEADLINE_SECONDS if budget is None else budget
+    cached = get_cached_trustline_state(user_address, issuers)
+    if cached is not None:
+        return {"lines": cached[0], "ledger_index": cached[1], "stale": False, "age_seconds": 0.0}
+
+    future = _refresh(xrpl_client, user_address, issuers)
+    try:
+        lines, ledger_index = future.result(timeout=budget if budget > 0 else None)
+        return {"lines": lines, "ledger_index": ledger_index, "stale": False, "age_seconds": 0.0}
+    except FutureTimeoutError:
+        pass
+
+    last_known = get_cached_trustline_state(user_address, issuers, stale=True)
+    if last_known is None:
+        raise LatencyBudgetExceeded(budget)
+    lines, ledger_index, age = last_known
+    return {"lines": lines, "ledger_index": ledger_index, "stale": True, "age_seconds": round(age, 1)}
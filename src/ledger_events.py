@@ -0,0 +1,134 @@
+"""
+Ledger Events
+
+Turns validated transactions into the small events our indexes are built
+from. Shared by the online paths (account_tx paging) and offline ingestion of
+ledger dumps, so both produce identical indexes.
+
+Accepted transaction shapes:
+    account_tx (API v2)  {"tx_json": {...}, "meta": {...}, "ledger_index": N, ...}
+    account_tx (API v1)  {"tx": {..., "ledger_index": N}, "meta": {...}}
+    flat dumps           {..., "meta" or "metaData": {...}, "ledger_index": N}
+"""
+from src.ripple_state import iter_ripple_state_changes
+
+
+# Seconds between the Unix epoch and the XRPL epoch (2000-01-01T00:00:00Z)
+RIPPLE_EPOCH_OFFSET = 946684800
+
+# Consent event kinds
+CONSENT_CREATE = "create"
+CONSENT_MODIFY = "modify"
+CONSENT_REMOVE = "remove"
+
+_CONSENT_KINDS = {"created": CONSENT_CREATE, "modified": CONSENT_MODIFY, "deleted": CONSENT_REMOVE}
+
+
+def normalize_transaction(entry):
+    """
+    Split a transaction record into its parts
+
+    Args:
+        entry: Transaction record in any accepted shape
+
+    Returns:
+        Tuple of (tx fields, meta, ledger_index, transaction index, unix close time or None)
+    """
+    tx = entry.get("tx_json") or entry.get("tx") or entry
+    meta = entry.get("meta") or entry.get("metaData") or tx.get("meta") or tx.get("metaData") or {}
+    ledger_index = entry.get("ledger_index") or tx.get("ledger_index")
+    tx_index = meta.get("TransactionIndex", 0) if isinstance(meta, dict) else 0
+    date = tx.get("date", entry.get("date"))
+    close_time = date + RIPPLE_EPOCH_OFFSET if isinstance(date, int) else None
+    return tx, meta, ledger_index, tx_index, close_time
+
+
+def extract_consent_events(entry, issuers_by_address):
+    """
+    Trustline create/modify/remove events between holders and watched issuers
+
+    Args:
+        entry: Transaction record
+        issuers_by_address: Dict of issuer address -> formatted currency code
+
+    Returns:
+        List of tuples (issuer_address, holder, ledger_index, tx_index, kind,
+        holder_limit, unix close time)
+    """
+    tx, meta, ledger_index, tx_index, close_time = normalize_transaction(entry)
+    events = []
+    for change, fields, _ in iter_ripple_state_changes(meta):
+        low = fields.get("LowLimit", {})
+        high = fields.get("HighLimit", {})
+        currency = fields.get("Balance", {}).get("currency") or low.get("currency")
+        for issuer_side, holder_side in ((low, high), (high, low)):
+            issuer = issuer_side.get("issuer")
+            if issuers_by_address.get(issuer) == currency:
+                events.append((
+                    issuer,
+                    holder_side.get("issuer"),
+                    ledger_index,
+                    tx_index,
+                    _CONSENT_KINDS[change],
+                    holder_side.get("value", "0"),
+                    close_time,
+                ))
+    return events
+
+
+def is_successful(meta):
+    """True if the transaction applied (tesSUCCESS)"""
+    return isinstance(meta, dict) and meta.get("TransactionResult") == "tesSUCCESS"
+
+
+def decode_memo_text(memo_hex):
+    """Decode hex MemoData to text (empty string if it is not valid UTF-8)"""
+    try:
+        return bytes.fromhex(memo_hex).decode("utf-8")
+    except (ValueError, TypeError):
+        return ""
+
+
+def extract_purchase_event(entry, issuer_addresses):
+    """
+    Product purchase made by an XRP Payment to a watched issuer
+
+    Purchases carry a "Product: <id>" memo (see ui/products.html).
+
+    Args:
+        entry: Transaction record
+        issuer_addresses: Set of watched issuer addresses
+
+    Returns:
+        Tuple (issuer_address, buyer, product_id, drops, ledger_index, tx_index,
+        unix close time, tx hash) or None if the transaction is not a purchase
+    """
+    tx, meta, ledger_index, tx_index, close_time = normalize_transaction(entry)
+    if tx.get("TransactionType") != "Payment" or tx.get("Destination") not in issuer_addresses:
+        return None
+    if not is_successful(meta):
+        return None
+    delivered = meta.get("delivered_amount", tx.get("DeliverMax", tx.get("Amount")))
+    if not isinstance(delivered, str):
+        # Issued-currency payments are not product purchases
+        return None
+
+    product_id = None
+    for memo in tx.get("Memos", []):
+        text = decode_memo_text(memo.get("Memo", {}).get("MemoData", ""))
+        if text.startswith("Product: "):
+            product_id = text[len("Product: "):].strip()
+            break
+    if product_id is None:
+        return None
+
+    return (
+        tx["Destination"],
+        tx.get("Account"),
+        product_id,
+        int(delivered),
+        ledger_index,
+        tx_index,
+        close_time,
+        tx.get("hash") or entry.get("hash"),
+    )
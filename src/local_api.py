@@ -0,0 +1,97 @@
+"""
+Local API
+
+Calls the serverless handlers in api/ in-process, without a socket or HTTP
+server, for load tests and benchmarks. Each call builds a fresh handler
+instance the way the runtime does per request and returns the status, headers
+and body it wrote.
+
+Usage:
+    status, headers, body = call("check-trustline", "POST", "/api/check-trustline",
+                                 body={"wallet_address": "r..."})
+"""
+import email.message
+import importlib.util
+import io
+import json
+import os
+import threading
+
+
+_API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+
+_HANDLERS = {}
+_HANDLERS_LOCK = threading.Lock()
+
+
+def load_handler(name):
+    """
+    Handler class of api/<name>.py (loaded once)
+
+    Args:
+        name: Endpoint file name without .py (e.g., "check-trustline")
+
+    Returns:
+        The module's handler class
+    """
+    with _HANDLERS_LOCK:
+        handler = _HANDLERS.get(name)
+        if handler is None:
+            # File names contain dashes, so they can't be imported by name
+            spec = importlib.util.spec_from_file_location(f"api_{name.replace('-', '_')}",
+                                                          os.path.join(_API_DIR, f"{name}.py"))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            handler = _HANDLERS[name] = module.handler
+        return handler
+
+
+def _parse_response(raw):
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+
+def call(name, method, path, body=None, headers=None):
+    """
+    Run one request through a handler
+
+    Args:
+        name: Endpoint file name without .py
+        method: "GET", "POST" or "OPTIONS"
+        path: Request path with query string (e.g., "/api/issuer-products?issuer=...")
+        body: Request body (bytes, or a JSON-serializable object)
+        headers: Request headers (optional)
+
+    Returns:
+        Tuple of (status code, headers with lowercase names, body bytes)
+    """
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    body = body or b""
+
+    request_headers = email.message.Message()
+    for key, value in (headers or {}).items():
+        request_headers[key] = value
+    if body:
+        request_headers["Content-Length"] = str(len(body))
+
+    handler = load_handler(name).__new__(load_handler(name))
+    handler.command = method
+    handler.path = path
+    handler.request_version = "HTTP/1.1"
+    handler.requestline = f"{method} {path} HTTP/1.1"
+    handler.client_address = ("127.0.0.1", 0)
+    handler.headers = request_headers
+    handler.rfile = io.BytesIO(body)
+    handler.wfile = io.BytesIO()
+    handler.close_connection = True
+    handler.log_message = lambda *args: None
+
+    getattr(handler, f"do_{method}")()
+    return _parse_response(handler.wfile.getvalue())
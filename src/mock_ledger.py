@@ -0,0 +1,537 @@
+"""
+Mock Ledger
+
+Small in-memory stand-in for a rippled JSON-RPC server, for benchmarks and
+offline demos. It answers the read-only queries the gate uses
+(account_info, account_lines with pagination, ledger_entry by RippleState ID)
+with rippled-shaped results and errors.
+
+It also accepts signed TrustSet and Payment transactions (submit), so
+xrpl-py's submit_and_wait works against it (fee, ledger, server_info/state,
+tx). Signatures are not verified. Every submitted transaction is treated as
+validated straight away with its engine result, so clients never wait on a
+transaction that will not be included. Like rippled, a transaction whose
+Sequence is ahead of its account (terPRE_SEQ) is held and applied once the
+gap is filled, so pipelined submissions may arrive out of order, and one past
+its LastLedgerSequence is rejected (tefMAX_LEDGER) or, if held, dropped when
+the ledger closes. Ledgers close on close_ledger() or, with
+start(close_interval=...), on a timer like a live network.
+
+Trustline changes (add_trustline, remove_trustline, submitted TrustSets) are
+also recorded as account_tx history of both accounts, with RippleState
+metadata. They are recorded in the open ledger, so account_tx returns them
+once close_ledger() validates it.
+
+Usage:
+    ledger = MockLedger()
+    ledger.fund(address)
+    ledger.add_trustline(holder, issuer, "GID")
+    url = ledger.start()          # background thread on 127.0.0.1 (close_interval=3.5 to close ledgers)
+    ...
+    ledger.stop()
+
+Or as a separate process: python -m src.mock_ledger --port 5005 --wallets 1000
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from xrpl.core.addresscodec import decode_classic_address, encode_classic_address
+from xrpl.core.binarycodec import decode
+
+from src.ripple_state import LSF_HIGH_NO_RIPPLE, LSF_LOW_NO_RIPPLE, line_from_ripple_state, ripple_state_index
+from src.tx_signing import transaction_hash
+from src.xrpl_client import format_currency_code
+
+
+# Issuer placeholder rippled uses for the Balance of a RippleState
+_NO_ACCOUNT = "rrrrrrrrrrrrrrrrrrrrBZbvji"
+
+# Reserves in drops (current mainnet values) and the open ledger base fee
+_BASE_RESERVE = 1_000_000
+_OWNER_RESERVE = 200_000
+_BASE_FEE = 10
+
+
+def _ledger_currency(currency):
+    """Currency code as stored on the ledger (40-char hex passes through)"""
+    return currency if len(currency) == 40 else format_currency_code(currency)
+
+
+class MockLedger:
+    """In-memory accounts and trustlines served over JSON-RPC"""
+
+    def __init__(self, ledger_index=1000):
+        """
+        Initialize mock ledger
+
+        Args:
+            ledger_index: Validated ledger index reported in results
+        """
+        self.ledger_index = ledger_index
+        self.accounts = {}
+        self.ripple_states = {}
+        self._account_lines = {}
+        self.transactions = {}
+        # address -> account_tx entries touching its trustlines, oldest first
+        self._history = {}
+        self._tx_index = 0
+        # (account, sequence) -> (tx_blob, decoded tx) held until the account reaches the sequence
+        self._held = {}
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._server = None
+        self._closing = None
+
+    METHODS = ("account_info", "account_lines", "account_tx", "ledger_entry", "fee", "ledger",
+               "server_info", "server_state", "submit", "tx")
+
+    def fund(self, address, drops=100_000_000):
+        """Create (or top up) an account"""
+        with self._lock:
+            account = self.accounts.setdefault(address, {
+                "Account": address,
+                "Balance": "0",
+                "Flags": 0,
+                "LedgerEntryType": "AccountRoot",
+                "OwnerCount": 0,
+                "Sequence": self.ledger_index,
+            })
+            account["Balance"] = str(int(account["Balance"]) + drops)
+
+    def add_trustline(self, holder, issuer, currency, limit="1000000000", balance="0"):
+        """
+        Create a trustline from holder to issuer
+
+        Args:
+            holder: Holder address (funded automatically)
+            issuer: Issuer address (funded automatically)
+            currency: Currency code (e.g., "GID", "RLUSD") or 40-char hex
+            limit: Holder's trust limit
+            balance: Holder's balance
+        """
+        for address in (holder, issuer):
+            if address not in self.accounts:
+                self.fund(address)
+        currency = _ledger_currency(currency)
+        holder_is_low = decode_classic_address(holder) < decode_classic_address(issuer)
+        low, high = (holder, issuer) if holder_is_low else (issuer, holder)
+        low_limit, high_limit = (limit, "0") if holder_is_low else ("0", limit)
+        # Balance is stored from the low account's point of view
+        if not holder_is_low and balance != "0":
+            balance = balance[1:] if balance.startswith("-") else "-" + balance
+        index = ripple_state_index(holder, issuer, currency)
+        node = {
+            "Balance": {"currency": currency, "issuer": _NO_ACCOUNT, "value": balance},
+            "Flags": LSF_HIGH_NO_RIPPLE if holder_is_low else LSF_LOW_NO_RIPPLE,
+            "HighLimit": {"currency": currency, "issuer": high, "value": high_limit},
+            "HighNode": "0",
+            "LedgerEntryType": "RippleState",
+            "LowLimit": {"currency": currency, "issuer": low, "value": low_limit},
+            "LowNode": "0",
+            "index": index,
+        }
+        with self._lock:
+            created = index not in self.ripple_states
+            if created:
+                self._account_lines.setdefault(holder, []).append(index)
+                self._account_lines.setdefault(issuer, []).append(index)
+                self.accounts[holder]["OwnerCount"] += 1
+            self.ripple_states[index] = node
+            self._log_trustline_change("CreatedNode" if created else "ModifiedNode", holder, node)
+
+    def remove_trustline(self, holder, issuer, currency):
+        """Delete a trustline (e.g., to reuse a wallet in a load test)"""
+        index = ripple_state_index(holder, issuer, _ledger_currency(currency))
+        with self._lock:
+            node = self.ripple_states.pop(index, None)
+            if node is not None:
+                self._account_lines[holder].remove(index)
+                self._account_lines[issuer].remove(index)
+                self.accounts[holder]["OwnerCount"] -= 1
+                self._log_trustline_change("DeletedNode", holder, node)
+
+    def close_ledger(self):
+        """Validate the open ledger (its trustline changes show up in account_tx)"""
+        with self._submit_lock, self._lock:
+            self.ledger_index += 1
+            self._tx_index = 0
+            # Held transactions past their LastLedgerSequence can never apply
+            for key, (_, tx) in list(self._held.items()):
+                if tx.get("LastLedgerSequence", self.ledger_index) < self.ledger_index:
+                    del self._held[key]
+
+    def _log_trustline_change(self, node_type, holder, node):
+        """Record a RippleState change as a TrustSet in both accounts' history (caller holds the lock)"""
+        fields = {key: node[key] for key in ("Balance", "Flags", "HighLimit", "LowLimit")}
+        issuer = node["HighLimit"]["issuer"] if node["LowLimit"]["issuer"] == holder else node["LowLimit"]["issuer"]
+        holder_limit = node["LowLimit"] if node["LowLimit"]["issuer"] == holder else node["HighLimit"]
+        entry = {
+            "ledger_index": self.ledger_index + 1,
+            "meta": {
+                "AffectedNodes": [{node_type: {
+                    "LedgerEntryType": "RippleState",
+                    "LedgerIndex": node["index"],
+                    "NewFields" if node_type == "CreatedNode" else "FinalFields": fields,
+                }}],
+                "TransactionIndex": self._tx_index,
+                "TransactionResult": "tesSUCCESS",
+            },
+            "tx_json": {
+                "Account": holder,
+                "LimitAmount": dict(holder_limit, issuer=issuer,
+                                    value="0" if node_type == "DeletedNode" else holder_limit["value"]),
+                "TransactionType": "TrustSet",
+            },
+            "validated": True,
+        }
+        self._tx_index += 1
+        self._history.setdefault(holder, []).append(entry)
+        self._history.setdefault(issuer, []).append(entry)
+
+    def _apply_payment(self, tx):
+        """Move XRP or an issued currency (caller holds the lock)"""
+        sender = self.accounts[tx["Account"]]
+        destination = tx["Destination"]
+        amount = tx["Amount"]
+        if isinstance(amount, str):
+            drops = int(amount)
+            reserve = _BASE_RESERVE + _OWNER_RESERVE * sender["OwnerCount"]
+            if int(sender["Balance"]) - drops < reserve:
+                return "tecUNFUNDED_PAYMENT"
+            if destination not in self.accounts:
+                if drops < _BASE_RESERVE:
+                    return "tecNO_DST_INSUF_XRP"
+                self.accounts[destination] = {"Account": destination, "Balance": "0", "Flags": 0,
+                                              "LedgerEntryType": "AccountRoot", "OwnerCount": 0,
+                                              "Sequence": self.ledger_index}
+            sender["Balance"] = str(int(sender["Balance"]) - drops)
+            receiver = self.accounts[destination]
+            receiver["Balance"] = str(int(receiver["Balance"]) + drops)
+            return "tesSUCCESS"
+
+        # Issued currency: only direct issuer <-> holder payments (no rippling)
+        issuer = amount["issuer"]
+        if destination == issuer:
+            holder, delta = tx["Account"], -float(amount["value"])
+        elif tx["Account"] == issuer:
+            holder, delta = destination, float(amount["value"])
+        else:
+            return "tecPATH_DRY"
+        node = self.ripple_states.get(ripple_state_index(holder, issuer, amount["currency"]))
+        if node is None:
+            return "tecNO_LINE" if holder == destination else "tecPATH_DRY"
+        holder_is_low = node["LowLimit"]["issuer"] == holder
+        balance = float(node["Balance"]["value"]) * (1 if holder_is_low else -1)
+        limit = float(node["LowLimit" if holder_is_low else "HighLimit"]["value"])
+        if balance + delta < 0 or balance + delta > limit:
+            return "tecPATH_PARTIAL"
+        balance += delta
+        node["Balance"]["value"] = "%.15g" % (balance if holder_is_low else -balance)
+        return "tesSUCCESS"
+
+    def _apply(self, tx):
+        """
+        Apply one decoded transaction
+
+        Returns:
+            Engine result code
+        """
+        with self._lock:
+            account = self.accounts.get(tx["Account"])
+            if account is None:
+                return "terNO_ACCOUNT"
+            if tx.get("LastLedgerSequence", self.ledger_index) < self.ledger_index:
+                return "tefMAX_LEDGER"
+            if tx["Sequence"] < account["Sequence"]:
+                return "tefPAST_SEQ"
+            if tx["Sequence"] > account["Sequence"]:
+                return "terPRE_SEQ"
+            fee = int(tx["Fee"])
+            if int(account["Balance"]) < fee:
+                return "terINSUF_FEE_B"
+            account["Balance"] = str(int(account["Balance"]) - fee)
+            account["Sequence"] += 1
+            if tx["TransactionType"] == "Payment":
+                return self._apply_payment(tx)
+            if tx["TransactionType"] != "TrustSet":
+                return "temUNKNOWN"
+        limit = tx["LimitAmount"]
+        if limit["issuer"] not in self.accounts:
+            return "tecNO_ISSUER"
+        currency = limit["currency"]
+        holder, issuer = tx["Account"], limit["issuer"]
+        node = self.ripple_states.get(ripple_state_index(holder, issuer, currency))
+        if node is not None and float(limit["value"]) == 0 and float(node["Balance"]["value"]) == 0:
+            # Like rippled, a line back in its default state is deleted
+            self.remove_trustline(holder, issuer, currency)
+            return "tesSUCCESS"
+        if node is None:
+            reserve = _BASE_RESERVE + _OWNER_RESERVE * (account["OwnerCount"] + 1)
+            if int(account["Balance"]) < reserve:
+                return "tecNO_LINE_INSUF_RESERVE"
+        self.add_trustline(holder, issuer, currency, limit=limit["value"])
+        return "tesSUCCESS"
+
+    # JSON-RPC methods
+
+    def _error(self, error, request):
+        return {"error": error, "ledger_index": self.ledger_index, "request": request,
+                "status": "error", "validated": True}
+
+    def account_info(self, params):
+        account = self.accounts.get(params.get("account"))
+        if account is None:
+            return self._error("actNotFound", params)
+        return {"account_data": dict(account), "ledger_index": self.ledger_index,
+                "status": "success", "validated": True}
+
+    def account_lines(self, params):
+        address = params.get("account")
+        if address not in self.accounts:
+            return self._error("actNotFound", params)
+        limit = int(params.get("limit") or 200)
+        start = int(params.get("marker") or 0)
+        indexes = self._account_lines.get(address, [])
+        lines = []
+        for index in indexes[start:start + limit]:
+            line = line_from_ripple_state(self.ripple_states[index], address)
+            line["quality_in"] = 0
+            line["quality_out"] = 0
+            lines.append(line)
+        result = {"account": address, "ledger_index": self.ledger_index, "lines": lines,
+                  "status": "success", "validated": True}
+        if start + limit < len(indexes):
+            result["marker"] = str(start + limit)
+        return result
+
+    def account_tx(self, params):
+        address = params.get("account")
+        if address not in self.accounts:
+            return self._error("actNotFound", params)
+        ledger_min = int(params.get("ledger_index_min", -1))
+        ledger_max = int(params.get("ledger_index_max", -1))
+        ledger_min = 0 if ledger_min == -1 else ledger_min
+        ledger_max = self.ledger_index if ledger_max == -1 else min(ledger_max, self.ledger_index)
+        if ledger_min > ledger_max:
+            return self._error("lgrIdxsInvalid", params)
+        with self._lock:
+            entries = [entry for entry in self._history.get(address, [])
+                       if ledger_min <= entry["ledger_index"] <= ledger_max]
+        if params.get("forward") is False:
+            entries.reverse()
+        limit = int(params.get("limit") or 200)
+        start = int(params.get("marker") or 0)
+        result = {"account": address, "ledger_index_min": ledger_min, "ledger_index_max": ledger_max,
+                  "limit": limit, "transactions": entries[start:start + limit],
+                  "status": "success", "validated": True}
+        if start + limit < len(entries):
+            result["marker"] = str(start + limit)
+        return result
+
+    def ledger_entry(self, params):
+        node = self.ripple_states.get(params.get("index"))
+        if node is None:
+            return self._error("entryNotFound", params)
+        return {"index": node["index"], "ledger_index": self.ledger_index, "node": dict(node),
+                "status": "success", "validated": True}
+
+    def fee(self, params):
+        drops = str(_BASE_FEE)
+        return {"current_ledger_size": "0", "current_queue_size": "0", "expected_ledger_size": "1000",
+                "ledger_current_index": self.ledger_index + 1, "max_queue_size": "2000",
+                "drops": {"base_fee": drops, "median_fee": "5000", "minimum_fee": drops,
+                          "open_ledger_fee": drops},
+                "levels": {"median_level": "128000", "minimum_level": "256",
+                           "open_ledger_level": "256", "reference_level": "256"},
+                "status": "success"}
+
+    def ledger(self, params):
+        return {"ledger": {"ledger_index": str(self.ledger_index), "closed": True},
+                "ledger_hash": "0" * 64, "ledger_index": self.ledger_index,
+                "status": "success", "validated": True}
+
+    def _server_info(self):
+        return {"build_version": "2.0.0", "complete_ledgers": f"1-{self.ledger_index}",
+                "network_id": 1, "server_state": "full",
+                "validated_ledger": {"base_fee_xrp": _BASE_FEE / 1e6, "reserve_base_xrp": _BASE_RESERVE / 1e6,
+                                     "reserve_inc_xrp": _OWNER_RESERVE / 1e6, "seq": self.ledger_index}}
+
+    def server_info(self, params):
+        return {"info": self._server_info(), "status": "success"}
+
+    def server_state(self, params):
+        state = self._server_info()
+        state["validated_ledger"] = {"base_fee": _BASE_FEE, "reserve_base": _BASE_RESERVE,
+                                     "reserve_inc": _OWNER_RESERVE, "seq": self.ledger_index}
+        return {"state": state, "status": "success"}
+
+    def submit(self, params):
+        tx_blob = params.get("tx_blob")
+        try:
+            tx = decode(tx_blob)
+        except Exception:
+            return self._error("invalidTransaction", params)
+        tx_hash = transaction_hash(tx_blob)
+        with self._submit_lock:
+            record = self.transactions.get(tx_hash)
+            if record is None:
+                result = self._apply(tx)
+                if result == "terPRE_SEQ":
+                    self._held[(tx["Account"], tx["Sequence"])] = (tx_blob, tx)
+                elif result != "tefMAX_LEDGER":
+                    record = self._record(tx_blob, tx, result)
+                    self._release_held(tx["Account"])
+            else:
+                result = record["meta"]["TransactionResult"]
+        return {"accepted": True, "applied": result == "tesSUCCESS", "engine_result": result,
+                "engine_result_code": 0 if result == "tesSUCCESS" else -1,
+                "engine_result_message": result, "status": "success", "tx_blob": tx_blob,
+                "tx_json": dict(tx, hash=tx_hash)}
+
+    def _record(self, tx_blob, tx, result):
+        """Store an applied transaction as validated (caller holds the submit lock)"""
+        tx_hash = transaction_hash(tx_blob)
+        record = dict(tx, hash=tx_hash, ledger_index=self.ledger_index, validated=True,
+                      meta={"TransactionResult": result})
+        self.transactions[tx_hash] = record
+        return record
+
+    def _release_held(self, address):
+        """Apply held transactions that are now next in sequence (caller holds the submit lock)"""
+        account = self.accounts.get(address)
+        while account is not None:
+            held = self._held.pop((address, account["Sequence"]), None)
+            if held is None:
+                return
+            tx_blob, tx = held
+            result = self._apply(tx)
+            if result != "tefMAX_LEDGER":
+                self._record(tx_blob, tx, result)
+
+    def tx(self, params):
+        record = self.transactions.get(params.get("transaction"))
+        if record is None:
+            return self._error("txnNotFound", params)
+        return dict(record, status="success")
+
+    def handle(self, payload):
+        """
+        Answer one JSON-RPC request
+
+        Args:
+            payload: Decoded request {"method": ..., "params": [{...}]}
+
+        Returns:
+            Decoded reply {"result": {...}}
+        """
+        method = payload.get("method")
+        params = (payload.get("params") or [{}])[0]
+        if method not in self.METHODS:
+            return {"result": self._error("unknownCmd", params)}
+        return {"result": getattr(self, method)(params)}
+
+    # Server
+
+    def start(self, host="127.0.0.1", port=0, close_interval=None):
+        """
+        Serve in a background thread
+
+        Args:
+            host: Interface to listen on
+            port: Port (0 picks a free one)
+            close_interval: Seconds between ledger closes (default: only on close_ledger())
+
+        Returns:
+            JSON-RPC URL
+        """
+        ledger = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; don't let Nagle delay the body
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                reply = json.dumps(ledger.handle(json.loads(self.rfile.read(length)))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if close_interval:
+            self._closing = threading.Event()
+            threading.Thread(target=self._close_periodically, args=(close_interval, self._closing),
+                             daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/"
+
+    def _close_periodically(self, interval, stopped):
+        while not stopped.wait(interval):
+            self.close_ledger()
+
+    def stop(self):
+        """Stop the background server"""
+        if self._closing is not None:
+            self._closing.set()
+            self._closing = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def populate(ledger, issuers, wallets, seed=7):
+    """
+    Fill a ledger with funded wallets, about half opted in to each issuer
+
+    Args:
+        ledger: MockLedger to fill
+        issuers: Issuer dictionaries ("address", "currency")
+        wallets: Number of wallets to create
+        seed: Random seed
+
+    Returns:
+        List of wallet addresses
+    """
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(wallets):
+        address = encode_classic_address(rng.randbytes(20))
+        ledger.fund(address)
+        for issuer in issuers:
+            if rng.random() < 0.5:
+                ledger.add_trustline(address, issuer["address"], issuer["currency"])
+        addresses.append(address)
+    return addresses
+
+
+def main():
+    """Run a mock ledger server in the foreground"""
+    parser = argparse.ArgumentParser(description="Mock rippled JSON-RPC server")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--wallets", type=int, default=1000, help="Funded wallets to create")
+    parser.add_argument("--close-interval", type=float, default=None,
+                        help="Seconds between ledger closes (default: never)")
+    args = parser.parse_args()
+
+    from config.issuers import VERIFIED_ISSUERS
+
+    ledger = MockLedger()
+    populate(ledger, list(VERIFIED_ISSUERS.values()), args.wallets)
+    url = ledger.start(port=args.port, close_interval=args.close_interval)
+    print(f"Mock ledger serving {args.wallets} wallets at {url}")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
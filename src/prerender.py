@@ -0,0 +1,223 @@
+"""
+UI Prerendering
+
+Build step that turns the static issuer data in config/ into static pages, so
+a page view no longer needs /api/issuer-info or /api/issuer-products:
+
+    ui/issuers/<issuer_key>/opt-in.html     opt-in page with the issuer descriptor inlined
+    ui/issuers/<issuer_key>/products.html   products page with the issuer and catalog inlined
+    ui/assets/issuer-<key>.<hash>.json      issuer descriptor (content-hashed, immutable)
+    ui/assets/catalog-<key>.<hash>.json     public catalog (content-hashed, immutable)
+    ui/issuers/manifest.json                issuer key -> page and asset URLs
+
+The pages are ui/opt-in.html and ui/products.html with a window.GG_PRERENDERED
+object injected; both still work unbuilt (?issuer=KEY) by calling the API.
+The only dynamic call left on a prerendered page is the wallet's trustline
+check. Product access URLs are gated content, so they stay out of the static
+output and are fetched from /api/issuer-products when a product is bought.
+
+Re-run after editing config/issuers.json or config/products/:
+    python demo/prerender_ui.py
+"""
+import hashlib
+import html
+import json
+import os
+
+from config.issuers import VERIFIED_ISSUERS, get_issuer_products
+
+
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ui")
+UI_URL = "/ui"
+
+# Product fields that are only served to wallets with a trustline
+GATED_PRODUCT_FIELDS = ("access_url",)
+
+_ISSUER_FIELDS = ("key", "name", "address", "currency", "description")
+
+
+def content_hash(data):
+    """Short content hash used in asset file names"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def issuer_descriptor(issuer):
+    """Public issuer fields (as returned by /api/issuer-info, plus the key)"""
+    return {field: issuer[field] for field in _ISSUER_FIELDS}
+
+
+def public_catalog(issuer):
+    """Issuer's catalog in catalog order, without gated fields"""
+    products = [
+        {name: value for name, value in product.items() if name not in GATED_PRODUCT_FIELDS}
+        for product in get_issuer_products(issuer["key"])
+    ]
+    return {
+        "issuer": issuer["name"],
+        "issuer_address": issuer["address"],
+        "products": products,
+        "total": len(products),
+    }
+
+
+def _json_bytes(payload):
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _inline_script(payload):
+    # "<" is escaped so catalog text can never close the script element
+    data = json.dumps(payload, separators=(",", ":")).replace("<", "\\u003c")
+    return f"<script>window.GG_PRERENDERED = {data};</script>\n"
+
+
+def render_page(template, issuer, payload, title):
+    """
+    Inline prerendered data into a UI page
+
+    Args:
+        template: Page HTML (ui/opt-in.html or ui/products.html)
+        issuer: Issuer dictionary
+        payload: Object exposed to the page as window.GG_PRERENDERED
+        title: Page title
+
+    Returns:
+        Page HTML
+    """
+    page = template.replace("</head>", _inline_script(payload) + "</head>", 1)
+    page = page.replace("<title>", f"<title>{html.escape(title)} - ", 1)
+    page = page.replace("<h2 id=\"issuer-name\"></h2>",
+                        f"<h2 id=\"issuer-name\">{html.escape(issuer['name'])}</h2>", 1)
+    page = page.replace("<p id=\"issuer-description\"></p>",
+                        f"<p id=\"issuer-description\">{html.escape(issuer['description'])}</p>", 1)
+    return page
+
+
+class Prerenderer:
+    """Writes prerendered issuer pages and hashed assets"""
+
+    def __init__(self, ui_dir=UI_DIR, ui_url=UI_URL):
+        """
+        Initialize prerenderer
+
+        Args:
+            ui_dir: Directory holding the page templates; output goes below it
+            ui_url: URL the directory is served at
+        """
+        self.ui_dir = ui_dir
+        self.ui_url = ui_url.rstrip("/")
+        self.assets_dir = os.path.join(ui_dir, "assets")
+        self.pages_dir = os.path.join(ui_dir, "issuers")
+        self._written = set()
+
+    def _write(self, path, data):
+        """Write a file unless it already has this content (returns True if written)"""
+        self._written.add(os.path.abspath(path))
+        try:
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return True
+
+    def write_asset(self, name, payload):
+        """
+        Write a content-hashed JSON asset
+
+        Args:
+            name: Asset name without hash or extension (e.g., "catalog-community_aid")
+            payload: JSON-serializable content
+
+        Returns:
+            URL of the asset
+        """
+        data = _json_bytes(payload)
+        filename = f"{name}.{content_hash(data)}.json"
+        self._write(os.path.join(self.assets_dir, filename), data)
+        return f"{self.ui_url}/assets/{filename}"
+
+    def build_issuer(self, issuer, templates):
+        """
+        Prerender one issuer's pages and assets
+
+        Args:
+            issuer: Issuer dictionary
+            templates: {"opt-in": html, "products": html}
+
+        Returns:
+            Manifest entry with page and asset URLs
+        """
+        key = issuer["key"]
+        descriptor = issuer_descriptor(issuer)
+        catalog = public_catalog(issuer)
+        page_url = f"{self.ui_url}/issuers/{key}"
+        entry = {
+            "opt_in": f"{page_url}/opt-in.html",
+            "products": f"{page_url}/products.html",
+            "issuer": self.write_asset(f"issuer-{key}", descriptor),
+            "catalog": self.write_asset(f"catalog-{key}", catalog),
+        }
+        pages = {"opt_in": entry["opt_in"], "products": entry["products"]}
+
+        opt_in = render_page(templates["opt-in"], issuer,
+                             {"issuer": descriptor, "pages": pages}, issuer["name"])
+        products = render_page(templates["products"], issuer,
+                               {"issuer": descriptor, "catalog": catalog, "pages": pages},
+                               issuer["name"])
+        self._write(os.path.join(self.pages_dir, key, "opt-in.html"), opt_in.encode("utf-8"))
+        self._write(os.path.join(self.pages_dir, key, "products.html"), products.encode("utf-8"))
+        return entry
+
+    def _prune(self):
+        """Remove outputs of earlier builds that this build did not produce"""
+        removed = 0
+        for directory in (self.assets_dir, self.pages_dir):
+            for root, _, files in os.walk(directory, topdown=False):
+                for filename in files:
+                    path = os.path.abspath(os.path.join(root, filename))
+                    if path not in self._written:
+                        os.remove(path)
+                        removed += 1
+                if root != directory and not os.listdir(root):
+                    os.rmdir(root)
+        return removed
+
+    def build(self, issuer_keys=None):
+        """
+        Prerender every issuer (or the given ones) and write the manifest
+
+        Args:
+            issuer_keys: Issuer keys to build (default: all verified issuers)
+
+        Returns:
+            Dictionary with the manifest and the number of stale files removed
+            (full builds only)
+        """
+        templates = {}
+        for name in ("opt-in", "products"):
+            with open(os.path.join(self.ui_dir, f"{name}.html"), "r", encoding="utf-8") as f:
+                templates[name] = f.read()
+
+        self._written = set()
+        manifest_path = os.path.join(self.pages_dir, "manifest.json")
+        manifest = {}
+        if issuer_keys is not None:
+            # A partial build keeps the other issuers' entries and outputs
+            try:
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                pass
+        for key in issuer_keys or list(VERIFIED_ISSUERS.keys()):
+            issuer = VERIFIED_ISSUERS.get(key)
+            if issuer is None:
+                raise ValueError(f"Unknown issuer: {key}")
+            manifest[key] = self.build_issuer(issuer, templates)
+        self._write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+        removed = self._prune() if issuer_keys is None else 0
+        return {"manifest": manifest, "removed": removed}
@@ -0,0 +1,336 @@
+"""
+Request Profiling
+
+Opt-in profiling of single handler invocations, for finding out why a
+production request was slow. A profiled request runs with:
+
+    - a sampling CPU profiler: a background thread records the stack of the
+      handler thread (and of any thread inside an XRPLClient call) every
+      PROFILE_INTERVAL_MS, aggregated as folded stacks ("a;b;c 12" lines, the
+      input format of flamegraph.pl, speedscope and inferno)
+    - tracemalloc: the top allocation sites of the request and its peak
+    - XRPLClient call spans: method and wall time of every rippled request
+
+A request is profiled when it carries "X-Profile-Token: <PROFILE_TOKEN>" (the
+profile is also returned in the response, as a "_profile" key of JSON object
+bodies) or is picked by PROFILE_SAMPLE_RATE. Every profile is written to
+PROFILE_DIR as <id>.folded and <id>.json, and the response carries its id in
+X-Profile-Id.
+
+Disabled (no token header, sample rate 0), @profiled adds one settings lookup
+to a request and span() returns a shared no-op context manager.
+
+Usage:
+    class handler(BaseHTTPRequestHandler):
+        @profiled
+        def do_POST(self):
+            ...
+
+    with span("xrpl:account_lines"):
+        ...
+"""
+import contextlib
+import functools
+import hmac
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+from config import settings
+
+
+PROFILE_HEADER = "X-Profile-Token"
+TOP_ALLOCATIONS = 25
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_NULL_SPAN = contextlib.nullcontext()
+
+# Profiles currently running in this process (spans are recorded into all of
+# them, since XRPLClient calls may run on pool threads)
+_active = []
+_active_lock = threading.Lock()
+
+# tracemalloc is process-wide: started by the first profile (unless something
+# else is already tracing) and stopped after the last
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+_LABELS = {}
+
+
+def _short_path(path):
+    """Project-relative or package-relative path of a source file"""
+    if path.startswith(_PROJECT_DIR):
+        return os.path.relpath(path, _PROJECT_DIR)
+    if "site-packages" in path:
+        return path.split("site-packages" + os.sep, 1)[1]
+    return os.path.basename(path)
+
+
+def _frame_label(code):
+    """Folded-stack label of a code object ("function (path:line)")"""
+    label = _LABELS.get(code)
+    if label is None:
+        label = _LABELS[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+class _Sampler(threading.Thread):
+    """Samples the stacks of a profile's threads at a fixed interval"""
+
+    def __init__(self, profile, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        stacks = self.profile.stacks
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.profile.threads):
+                frame = frames.get(thread_id)
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    key = ";".join(reversed(labels))
+                    stacks[key] = stacks.get(key, 0) + 1
+            self.profile.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfile:
+    """CPU samples, allocations and XRPLClient spans of one request"""
+
+    def __init__(self, name, interval_ms=None):
+        """
+        Initialize profile
+
+        Args:
+            name: What is being profiled (e.g., "POST /api/check-trustline")
+            interval_ms: Sampling interval (default: PROFILE_INTERVAL_MS)
+        """
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.interval = (interval_ms or settings.PROFILE_INTERVAL_MS) / 1000
+        self.stacks = {}
+        self.samples = 0
+        self.spans = []
+        # thread id -> number of open spans (the profiled thread itself stays at 1)
+        self.threads = {}
+        self.result = None
+        self._sampler = None
+
+    def __enter__(self):
+        global _tracemalloc_users, _tracemalloc_started
+        self._started_at = time.time()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self.threads[threading.get_ident()] = 1
+        # Started before the baseline snapshot so its own allocations aren't counted
+        self._sampler = _Sampler(self, self.interval)
+        self._sampler.start()
+        with _active_lock:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracemalloc_started = True
+            _tracemalloc_users += 1
+            tracemalloc.reset_peak()
+            self._memory_start = tracemalloc.get_traced_memory()[0]
+            self._snapshot_start = tracemalloc.take_snapshot()
+            _active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _tracemalloc_users, _tracemalloc_started
+        wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        cpu_ms = (time.thread_time() - self._cpu_start) * 1000
+        self._sampler.stop()
+        self.threads.pop(threading.get_ident(), None)
+        with _active_lock:
+            _active.remove(self)
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_started:
+                tracemalloc.stop()
+                _tracemalloc_started = False
+        self.result = self._build(wall_ms, cpu_ms, snapshot, peak - self._memory_start)
+        return False
+
+    def _build(self, wall_ms, cpu_ms, snapshot, peak_bytes):
+        own_files = (tracemalloc.Filter(False, tracemalloc.__file__),
+                     tracemalloc.Filter(False, __file__))
+        snapshot = snapshot.filter_traces(own_files)
+        start = self._snapshot_start.filter_traces(own_files)
+        allocations = []
+        for stat in snapshot.compare_to(start, "lineno"):
+            if len(allocations) == TOP_ALLOCATIONS:
+                break
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            allocations.append({
+                "site": f"{_short_path(frame.filename)}:{frame.lineno}",
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff,
+            })
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self._started_at,
+            "wall_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "folded": "".join(f"{stack} {count}\n" for stack, count in
+                              sorted(self.stacks.items(), key=lambda item: -item[1])),
+            "xrpl_calls": self.spans,
+            "allocations": allocations,
+            "peak_kb": round(max(peak_bytes, 0) / 1024, 1),
+        }
+
+    def save(self, directory=None):
+        """
+        Write the profile as <id>.folded and <id>.json
+
+        Args:
+            directory: Output directory (default: PROFILE_DIR, or the temp dir)
+
+        Returns:
+            Path of the JSON file
+        """
+        directory = directory or settings.PROFILE_DIR or os.path.join(tempfile.gettempdir(), "guidancegate-profiles")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.id}.folded"), "w") as f:
+            f.write(self.result["folded"])
+        path = os.path.join(directory, f"{self.id}.json")
+        with open(path, "w") as f:
+            json.dump(self.result, f, indent=2)
+        return path
+
+
+class _Span:
+    """Times one call for every running profile"""
+
+    __slots__ = ("name", "start", "thread_id")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        for profile in list(_active):
+            profile.threads[self.thread_id] = profile.threads.get(self.thread_id, 0) + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        for profile in list(_active):
+            profile.spans.append({
+                "name": self.name,
+                "ms": round(elapsed_ms, 3),
+                "error": exc_type.__name__ if exc_type else None,
+            })
+            count = profile.threads.get(self.thread_id, 0) - 1
+            if count > 0:
+                profile.threads[self.thread_id] = count
+            else:
+                profile.threads.pop(self.thread_id, None)
+        return False
+
+
+def span(name):
+    """
+    Context manager recording a timed call into running profiles
+
+    Args:
+        name: Span name (e.g., "xrpl:account_lines")
+
+    Returns:
+        A no-op context manager when nothing is being profiled
+    """
+    if not _active:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def _profile_mode(handler):
+    """'inline' for an authenticated profile header, 'store' if sampled, else None"""
+    token = settings.PROFILE_TOKEN
+    if token:
+        supplied = handler.headers.get(PROFILE_HEADER) if handler.headers else None
+        if supplied and hmac.compare_digest(supplied.encode(), token.encode()):
+            return "inline"
+    rate = settings.PROFILE_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return "store"
+    return None
+
+
+def _rewrite_response(raw, profile, inline):
+    """Add X-Profile-Id (and the inline profile for JSON object bodies) to a buffered response"""
+    head, separator, body = raw.partition(b"\r\n\r\n")
+    if not separator:
+        return raw
+    lines = head.split(b"\r\n")
+    is_json = any(line.lower().startswith(b"content-type: application/json") for line in lines)
+    if inline and is_json:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            payload["_profile"] = profile.result
+            body = json.dumps(payload).encode()
+            lines = [line for line in lines if not line.lower().startswith(b"content-length:")]
+            lines.append(f"Content-Length: {len(body)}".encode())
+    lines.append(f"X-Profile-Id: {profile.id}".encode())
+    return b"\r\n".join(lines) + b"\r\n\r\n" + body
+
+
+def profiled(method):
+    """
+    Decorator profiling a handler method (do_GET, do_POST) when requested
+
+    The response is buffered while profiling, so don't use it on streaming
+    endpoints.
+    """
+    @functools.wraps(method)
+    def wrapper(handler):
+        mode = _profile_mode(handler)
+        if mode is None:
+            return method(handler)
+
+        profile = RequestProfile(f"{handler.command} {handler.path.split('?', 1)[0]}")
+        if mode == "inline":
+            # The profile is added to the JSON body, so it must not be compressed
+            del handler.headers["Accept-Encoding"]
+        wfile = handler.wfile
+        handler.wfile = io.BytesIO()
+        try:
+            with profile:
+                method(handler)
+            try:
+                profile.save()
+            except OSError as e:
+                print(f"Could not save profile {profile.id}: {e}", file=sys.stderr)
+        finally:
+            raw, handler.wfile = handler.wfile.getvalue(), wfile
+            if profile.result is not None:
+                raw = _rewrite_response(raw, profile, mode == "inline")
+            wfile.write(raw)
+    return wrapper
@@ -0,0 +1,297 @@
+"""
+Response Encoding
+
+Sparse fieldsets and compression for the JSON API (applied by
+src/http_utils.send_json).
+
+    fields=     comma-separated dotted paths selecting the parts of a
+                response a client needs, e.g.
+                fields=products.id,products.price_xrp,next_cursor
+                A path into a list applies to every element; unknown names are
+                left out. Objects wrapped in PreEncoded (catalog products,
+                agent context documents) keep the JSON encoding of each field,
+                so a selection joins stored fragments instead of re-encoding.
+
+    Accept-Encoding
+                bodies of at least COMPRESSION_MIN_BYTES are sent as br (when
+                the brotli package is installed) or gzip, whichever the client
+                prefers. Compressed bodies are kept in a small LRU, so repeated
+                responses (catalog pages, agent context) are compressed once.
+"""
+import gzip
+import json
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from config import settings
+
+
+GZIP_LEVEL = 6
+# Comparable speed to gzip 6 with smaller output
+BROTLI_QUALITY = 5
+MAX_FIELD_PATHS = 50
+# Uncompressed bytes of bodies whose compressed form is kept
+COMPRESSED_CACHE_BYTES = 8 * 1024 * 1024
+
+_FIELD_PATH = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+_SEPARATORS = (",", ":")
+_dumps = json.JSONEncoder(separators=_SEPARATORS).encode
+
+
+def parse_fields(value):
+    """
+    Parse a fields= selector
+
+    Args:
+        value: Comma-separated dotted paths (e.g., "products.id,total")
+
+    Returns:
+        Nested selector ({"products": {"id": True}, "total": True}), or None
+        to select everything
+
+    Raises:
+        ValueError: For a malformed path or too many paths
+    """
+    if value is None or not value.strip():
+        return None
+    paths = [path.strip() for path in value.split(",") if path.strip()]
+    if len(paths) > MAX_FIELD_PATHS:
+        raise ValueError(f"fields accepts at most {MAX_FIELD_PATHS} paths")
+    selector = {}
+    for path in paths:
+        if not _FIELD_PATH.match(path):
+            raise ValueError(f"Invalid field path: {path}")
+        node = selector
+        names = path.split(".")
+        for name in names[:-1]:
+            child = node.get(name)
+            if child is True:
+                # Already selected whole
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = True
+    return selector
+
+
+class PreEncoded(dict):
+    """
+    Read-only dictionary that remembers its JSON encoding per field
+
+    Fragments are encoded on first use and reused by every later response;
+    don't modify the dictionary after wrapping it.
+    """
+
+    __slots__ = ("_fragments", "_body", "_selections")
+
+    # Encoded field subsets remembered per object (clients reuse a few fieldsets)
+    MAX_SELECTIONS = 8
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fragments = None
+        self._body = None
+        self._selections = {}
+
+    def fragments(self):
+        """{key: b'"key":<value>'} in key order"""
+        if self._fragments is None:
+            self._fragments = {key: _dumps(key).encode() + b":" + _dumps(value).encode()
+                               for key, value in self.items()}
+        return self._fragments
+
+    def body(self):
+        """The whole object as JSON bytes"""
+        if self._body is None:
+            self._body = b"{" + b",".join(self.fragments().values()) + b"}"
+        return self._body
+
+    def select(self, names):
+        """
+        The object with only the given top-level fields, as JSON bytes
+
+        Args:
+            names: Field names (a frozenset, as the cache key)
+        """
+        body = self._selections.get(names)
+        if body is None:
+            fragments = self.fragments()
+            body = b"{" + b",".join(fragment for key, fragment in fragments.items() if key in names) + b"}"
+            if len(self._selections) < self.MAX_SELECTIONS:
+                self._selections[names] = body
+        return body
+
+
+def _has_pre_encoded(value, depth=3):
+    """Whether PreEncoded objects sit near the top of a payload (lists are assumed uniform)"""
+    if isinstance(value, PreEncoded):
+        return True
+    if depth == 0:
+        return False
+    if isinstance(value, dict):
+        return any(_has_pre_encoded(item, depth - 1) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return bool(value) and _has_pre_encoded(value[0], depth - 1)
+    return False
+
+
+def encode_json(payload, selector=None):
+    """
+    Encode a response body, keeping only the selected fields
+
+    Args:
+        payload: JSON-serializable value (may contain PreEncoded objects)
+        selector: Result of parse_fields (None: everything)
+
+    Returns:
+        Compact JSON bytes
+    """
+    if isinstance(payload, PreEncoded):
+        if selector is None:
+            return payload.body()
+        if all(sub is True for sub in selector.values()):
+            return payload.select(frozenset(selector))
+        fragments = payload.fragments()
+        parts = []
+        for key, value in payload.items():
+            sub = selector.get(key)
+            if sub is True:
+                parts.append(fragments[key])
+            elif sub is not None:
+                parts.append(_dumps(key).encode() + b":" + encode_json(value, sub))
+        return b"{" + b",".join(parts) + b"}"
+    if isinstance(payload, dict):
+        if selector is None and not _has_pre_encoded(payload):
+            return _dumps(payload).encode()
+        parts = []
+        for key, value in payload.items():
+            sub = None if selector is None else selector.get(key)
+            if selector is None or sub is True:
+                parts.append(_dumps(key).encode() + b":" + encode_json(value))
+            elif sub is not None:
+                parts.append(_dumps(key).encode() + b":" + encode_json(value, sub))
+        return b"{" + b",".join(parts) + b"}"
+    if isinstance(payload, (list, tuple)):
+        if selector is None and not _has_pre_encoded(payload):
+            return _dumps(payload).encode()
+        if selector is not None and all(sub is True for sub in selector.values()):
+            # Same flat fieldset for every element: build its cache key once
+            names = frozenset(selector)
+            return b"[" + b",".join(item.select(names) if isinstance(item, PreEncoded)
+                                    else encode_json(item, selector) for item in payload) + b"]"
+        return b"[" + b",".join(encode_json(item, selector) for item in payload) + b"]"
+    # Scalars have no fields to select
+    return _dumps(payload).encode()
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Preferred supported content coding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value (None or empty: identity)
+
+    Returns:
+        "br", "gzip" or None
+    """
+    if not accept_encoding:
+        return None
+    offered = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        offered[name.strip().lower()] = q
+    wildcard = offered.get("*", 0.0)
+    candidates = [("br", 0)] if brotli is not None else []
+    candidates.append(("gzip", 1))
+    best = None
+    for name, rank in candidates:
+        q = offered.get(name, wildcard)
+        if q > 0 and (best is None or (q, -rank) > best[0]):
+            best = ((q, -rank), name)
+    return best[1] if best else None
+
+
+_compressed = OrderedDict()
+_compressed_bytes = 0
+_compressed_lock = threading.Lock()
+_stats = {"compressed": 0, "reused": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def compress(body, encoding):
+    """
+    Compress a body (reusing the result for a recently seen identical body)
+
+    Args:
+        body: Bytes to compress
+        encoding: "br" or "gzip"
+
+    Returns:
+        Compressed bytes
+    """
+    global _compressed_bytes
+    key = (encoding, body)
+    with _compressed_lock:
+        cached = _compressed.get(key)
+        if cached is not None:
+            _compressed.move_to_end(key)
+            _stats["reused"] += 1
+            return cached
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        # mtime=0 keeps the output identical for identical bodies
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    with _compressed_lock:
+        if key not in _compressed:
+            _compressed[key] = compressed
+            _compressed_bytes += len(body)
+            while _compressed_bytes > COMPRESSED_CACHE_BYTES:
+                (_, evicted), _ = _compressed.popitem(last=False)
+                _compressed_bytes -= len(evicted)
+        _stats["compressed"] += 1
+        _stats["bytes_in"] += len(body)
+        _stats["bytes_out"] += len(compressed)
+    return compressed
+
+
+def encode_for_client(body, accept_encoding):
+    """
+    Compress a body if the client accepts it and it is large enough
+
+    Args:
+        body: Response bytes
+        accept_encoding: Request's Accept-Encoding header
+
+    Returns:
+        Tuple of (bytes to send, Content-Encoding or None)
+    """
+    if len(body) < settings.COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def metrics():
+    """Compression counters of this instance"""
+    with _compressed_lock:
+        stats = dict(_stats)
+        stats["cached_bodies"] = len(_compressed)
+    stats["ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None
+    stats["brotli"] = brotli is not None
+    return stats
@@ -0,0 +1,134 @@
+"""
+RippleState Helpers
+
+Trustlines live on the ledger as RippleState objects shared by two accounts.
+This module computes their deterministic ledger object IDs, so a single
+trustline can be fetched with ledger_entry instead of scanning account_lines.
+"""
+import hashlib
+
+from xrpl.core.addresscodec import decode_classic_address
+
+
+# Ledger space key for RippleState objects ('r')
+_RIPPLE_STATE_SPACE = b"\x00\x72"
+
+
+def currency_to_bytes(currency):
+    """
+    Encode a currency code as the 160-bit value used on the ledger
+
+    Args:
+        currency: Currency code (e.g., "USD", "GID", "RLUSD") or 40-char hex
+
+    Returns:
+        20 bytes
+    """
+    # Imported here because xrpl_client itself depends on this module
+    from src.xrpl_client import format_currency_code
+    
+    if len(currency) == 40:
+        return bytes.fromhex(currency)
+    formatted = format_currency_code(currency)
+    if len(formatted) == 3:
+        # Standard codes: 12 zero bytes, 3 ASCII bytes, 5 zero bytes
+        return bytes(12) + formatted.encode("ascii") + bytes(5)
+    return bytes.fromhex(formatted)
+
+
+def ripple_state_index(account_a, account_b, currency):
+    """
+    Compute the ledger object ID of the trustline between two accounts
+
+    The ID is SHA-512Half(space key || low account ID || high account ID || currency),
+    where low/high order the two 20-byte account IDs numerically.
+
+    Args:
+        account_a: One side of the trustline (classic address)
+        account_b: The other side (classic address)
+        currency: Currency code (e.g., "USD", "GID", "RLUSD")
+
+    Returns:
+        64-character uppercase hex ledger object ID
+    """
+    low, high = sorted((decode_classic_address(account_a), decode_classic_address(account_b)))
+    digest = hashlib.sha512(_RIPPLE_STATE_SPACE + low + high + currency_to_bytes(currency)).digest()
+    return digest[:32].hex().upper()
+
+
+# RippleState flags
+LSF_LOW_NO_RIPPLE = 0x00020000
+LSF_HIGH_NO_RIPPLE = 0x00040000
+
+
+def iter_ripple_state_changes(meta):
+    """
+    Iterate over the RippleState objects a transaction created, modified or deleted
+    
+    Args:
+        meta: Transaction metadata ("meta" from tx or account_tx)
+        
+    Yields:
+        Tuple of (change, fields, previous_fields) where change is "created",
+        "modified" or "deleted", fields are the object's new/final fields and
+        previous_fields holds changed values before the transaction (may be empty)
+    """
+    if not isinstance(meta, dict):
+        return
+    for node in meta.get("AffectedNodes", []):
+        if "CreatedNode" in node:
+            change, entry = "created", node["CreatedNode"]
+            fields = entry.get("NewFields", {})
+        elif "ModifiedNode" in node:
+            change, entry = "modified", node["ModifiedNode"]
+            fields = entry.get("FinalFields", {})
+        elif "DeletedNode" in node:
+            change, entry = "deleted", node["DeletedNode"]
+            fields = entry.get("FinalFields", {})
+        else:
+            continue
+        if entry.get("LedgerEntryType") == "RippleState":
+            yield change, fields, entry.get("PreviousFields", {})
+
+
+def line_from_ripple_state(fields, account):
+    """
+    Convert RippleState fields into an account_lines-style entry for one side
+    
+    Args:
+        fields: RippleState fields (Balance, HighLimit, LowLimit, Flags)
+        account: The account whose view of the trustline to build
+        
+    Returns:
+        Dictionary with account (peer), currency, balance, limit, limit_peer,
+        no_ripple and no_ripple_peer, or None if account is not a party
+    """
+    high = fields.get("HighLimit", {})
+    low = fields.get("LowLimit", {})
+    balance = fields.get("Balance", {})
+    flags = fields.get("Flags", 0)
+    value = balance.get("value", "0")
+
+    if low.get("issuer") == account:
+        mine, peer = low, high
+        my_flag, peer_flag = LSF_LOW_NO_RIPPLE, LSF_HIGH_NO_RIPPLE
+    elif high.get("issuer") == account:
+        mine, peer = high, low
+        my_flag, peer_flag = LSF_HIGH_NO_RIPPLE, LSF_LOW_NO_RIPPLE
+        # Balance is stored from the low account's point of view
+        if value.startswith("-"):
+            value = value[1:]
+        elif value != "0":
+            value = "-" + value
+    else:
+        return None
+
+    return {
+        "account": peer.get("issuer"),
+        "currency": balance.get("currency") or mine.get("currency"),
+        "balance": value,
+        "limit": mine.get("value", "0"),
+        "limit_peer": peer.get("value", "0"),
+        "no_ripple": bool(flags & my_flag),
+        "no_ripple_peer": bool(flags & peer_flag),
+    }
@@ -0,0 +1,159 @@
+"""
+Raw JSON-RPC Transport
+
+Lean read-only path to rippled for the gate's hot queries (account_lines,
+ledger_entry, account_info, tx, account_tx pages), also used to submit
+already-signed blobs.
+
+xrpl-py builds and validates a request model, opens a new HTTP client (and
+event loop) for every call and wraps the reply in a Response model. This
+transport instead:
+    - fills pre-encoded request templates with the already-validated address
+      or ledger object ID
+    - reuses one keep-alive HTTP connection per thread
+    - parses the reply straight into the result dictionary
+
+Replies are returned as RawResponse objects with the same .result and
+.is_successful() interface as xrpl-py's Response, so callers behave the same
+on either path.
+"""
+import http.client
+import json
+import threading
+from urllib.parse import urlparse
+
+from xrpl.clients import XRPLRequestFailureException
+
+
+# Request templates for the common "validated ledger" shapes. Values are
+# addresses (base58) or ledger object IDs (hex), so they need no JSON escaping.
+_TEMPLATES = {
+    ("ledger_entry", ("index", "ledger_index")):
+        b'{"method":"ledger_entry","params":[{"index":"%s","ledger_index":"%s"}]}',
+    ("account_info", ("account", "ledger_index")):
+        b'{"method":"account_info","params":[{"account":"%s","ledger_index":"%s"}]}',
+    ("account_lines", ("account", "ledger_index")):
+        b'{"method":"account_lines","params":[{"account":"%s","ledger_index":"%s"}]}',
+}
+
+_HEADERS = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+
+class RawResponse:
+    """Minimal stand-in for xrpl.models.response.Response"""
+
+    __slots__ = ("result",)
+
+    def __init__(self, result):
+        self.result = result
+
+    def is_successful(self):
+        """True if rippled reported success"""
+        return "error" not in self.result
+
+
+def encode_request(method, params):
+    """
+    Encode a JSON-RPC request body
+
+    Args:
+        method: rippled method name
+        params: Parameter dictionary (None values are left out)
+
+    Returns:
+        Request body as bytes
+    """
+    params = {key: value for key, value in params.items() if value is not None}
+    template = _TEMPLATES.get((method, tuple(params)))
+    if template is not None and all(isinstance(value, str) for value in params.values()):
+        return template % tuple(value.encode("ascii") for value in params.values())
+    return json.dumps({"method": method, "params": [params]}, separators=(",", ":")).encode()
+
+
+def decode_response(body, http_status=200):
+    """
+    Parse a JSON-RPC reply into a RawResponse
+
+    Raises:
+        XRPLRequestFailureException: If the body is not a JSON-RPC reply
+    """
+    try:
+        result = json.loads(body)["result"]
+    except (ValueError, KeyError, TypeError):
+        raise XRPLRequestFailureException({
+            "error": http_status,
+            "error_message": body[:200].decode("utf-8", "replace"),
+        })
+    # Same shape as xrpl-py: "status" is folded into is_successful()
+    status = result.pop("status", None)
+    if status not in (None, "success") and "error" not in result:
+        result["error"] = status
+    return RawResponse(result)
+
+
+class RawRpcTransport:
+    """Keep-alive JSON-RPC client for read-only rippled queries"""
+
+    def __init__(self, url, timeout=10.0):
+        """
+        Initialize transport
+
+        Args:
+            url: rippled JSON-RPC URL (http or https)
+            timeout: Socket timeout in seconds
+        """
+        parsed = urlparse(url)
+        self.url = url
+        self.timeout = timeout
+        self._secure = parsed.scheme == "https"
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path = parsed.path or "/"
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._secure:
+                connection = http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def request(self, method, **params):
+        """
+        Send one read-only request
+
+        Args:
+            method: rippled method ("account_lines", "ledger_entry", "account_info", ...)
+            **params: Request parameters, named as in the rippled API
+
+        Returns:
+            RawResponse
+        """
+        body = encode_request(method, params)
+        # A kept-alive connection may have been closed by the server: retry once
+        for attempt in (0, 1):
+            connection = self._connection()
+            try:
+                connection.request("POST", self._path, body, _HEADERS)
+                reply = connection.getresponse()
+                data = reply.read()
+            except TimeoutError:
+                self._close()
+                raise
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+                continue
+            if reply.will_close:
+                self._close()
+            return decode_response(data, reply.status)
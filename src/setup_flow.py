@@ -33,37 +33,32 @@ class SetupFlow:
         Returns:
             Dictionary with setup status
         """
-        trustlines = self.client.get_user_trustlines(user_address)
-        
-        # Check required issuers (guidance issuer only)
         required_issuers = get_required_issuers()
-        required_status = []
+        optional_issuers = get_optional_issuers()
         
-        for issuer in required_issuers:
-            has_tl = self.client.has_trustline(
-                user_address,
-                issuer["address"],
-                issuer["currency"]
-            )
-            required_status.append({
+        # Look up every issuer's trustline in one concurrent batch
+        entries, _ = self.client.get_trustline_entries(
+            user_address,
+            required_issuers + optional_issuers
+        )
+        
+        # Check required issuers (guidance issuer only)
+        required_status = [
+            {
                 "issuer": issuer,
-                "has_trustline": has_tl
-            })
+                "has_trustline": entry is not None
+            }
+            for issuer, entry in zip(required_issuers, entries[:len(required_issuers)])
+        ]
         
         # Check optional issuers (RLUSD)
-        optional_issuers = get_optional_issuers()
-        optional_status = []
-        
-        for issuer in optional_issuers:
-            has_tl = self.client.has_trustline(
-                user_address,
-                issuer["address"],
-                issuer["currency"]
-            )
-            optional_status.append({
+        optional_status = [
+            {
                 "issuer": issuer,
-                "has_trustline": has_tl
-            })
+                "has_trustline": entry is not None
+            }
+            for issuer, entry in zip(optional_issuers, entries[len(required_issuers):])
+        ]
         
         # Setup is complete if all required trustlines exist
         has_all_required = all(status["has_trustline"] for status in required_status)
@@ -146,6 +141,52 @@ class SetupFlow:
                 "message": "❌ RLUSD trustline creation failed"
             }
     
+    def create_missing_trustlines(self, wallet, setup_status, include_optional=False, on_create=None):
+        """
+        Create the trustlines a setup status reports as missing
+        
+        Args:
+            wallet: User's wallet
+            setup_status: Result of check_setup_status for this wallet
+            include_optional: Also create missing optional trustlines (RLUSD)
+            on_create: Optional callback(issuer) called before each TrustSet
+            
+        Returns:
+            List of dictionaries with success, issuer, issuer_key and tx_hash or error
+        """
+        statuses = list(setup_status["required_issuers"])
+        if include_optional:
+            statuses += setup_status["optional_issuers"]
+        
+        results = []
+        for status in statuses:
+            if status["has_trustline"]:
+                continue
+            issuer = status["issuer"]
+            if on_create:
+                on_create(issuer)
+            result = self.client.create_trustline(
+                wallet,
+                issuer["address"],
+                issuer["currency"]
+            )
+            
+            if result.is_successful():
+                results.append({
+                    "success": True,
+                    "issuer": issuer["name"],
+                    "issuer_key": issuer["key"],
+                    "tx_hash": result.result.get("hash")
+                })
+            else:
+                results.append({
+                    "success": False,
+                    "issuer": issuer["name"],
+                    "issuer_key": issuer["key"],
+                    "error": result.result
+                })
+        return results
+    
     def complete_setup(self, wallet):
         """
         Complete user setup: create required trustlines
@@ -161,31 +202,12 @@ class SetupFlow:
         """
         setup_status = self.check_setup_status(wallet.classic_address)
         
-        results = []
-        
         # Create required trustlines (guidance issuer only)
-        for status in setup_status["required_issuers"]:
-            if not status["has_trustline"]:
-                issuer = status["issuer"]
-                print(f"Creating trustline for {issuer['name']}...")
-                result = self.client.create_trustline(
-                    wallet,
-                    issuer["address"],
-                    issuer["currency"]
-                )
-                
-                if result.is_successful():
-                    results.append({
-                        "success": True,
-                        "issuer": issuer["name"],
-                        "tx_hash": result.result.get("hash")
-                    })
-                else:
-                    results.append({
-                        "success": False,
-                        "issuer": issuer["name"],
-                        "error": result.result
-                    })
+        results = self.create_missing_trustlines(
+            wallet,
+            setup_status,
+            on_create=lambda issuer: print(f"Creating trustline for {issuer['name']}...")
+        )
         
         # Check if RLUSD trustline exists (informational)
         rlusd_status = setup_status["optional_issuers"][0] if setup_status["optional_issuers"] else None
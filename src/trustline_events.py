@@ -0,0 +1,214 @@
+"""
+Trustline Events
+
+Pushes opt-in state changes to connected clients instead of having each
+browser poll /api/check-trustline.
+
+One websocket subscription per process watches every wallet that has a
+connected client. When a validated transaction touches a watched wallet's
+trustlines, its opt-in state is recomputed once and fanned out to all of that
+wallet's subscribers. Recomputing runs on a small thread pool, so a slow or
+failing lookup never stalls the stream; events for a wallet whose lookup is
+still queued are coalesced into it.
+"""
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.clients import WebsocketClient
+from xrpl.models.requests import Subscribe, Unsubscribe
+
+from config import settings
+from src.xrpl_client import XRPLClient
+from src.access_control import AccessControl
+from config.issuers import VERIFIED_ISSUERS
+
+
+def affected_trustline_accounts(message):
+    """
+    Accounts whose trustlines a validated transaction stream message changed
+
+    Args:
+        message: "transaction" message from the accounts stream
+
+    Returns:
+        Set of XRPL addresses on either side of each touched RippleState
+    """
+    accounts = set()
+    meta = message.get("meta") or {}
+    for node in meta.get("AffectedNodes", []):
+        entry = node.get("CreatedNode") or node.get("ModifiedNode") or node.get("DeletedNode") or {}
+        if entry.get("LedgerEntryType") != "RippleState":
+            continue
+        fields = entry.get("NewFields") or entry.get("FinalFields") or {}
+        for side in ("HighLimit", "LowLimit"):
+            issuer = fields.get(side, {}).get("issuer")
+            if issuer:
+                accounts.add(issuer)
+    return accounts
+
+
+class TrustlineEventHub:
+    """Shares one ledger subscription between all connected SSE clients"""
+
+    def __init__(self, url=None, access_control=None, publish_workers=4):
+        """
+        Initialize event hub
+
+        Args:
+            url: rippled websocket URL (default from settings)
+            access_control: AccessControl used to recompute opt-in state
+            publish_workers: Threads recomputing state after stream events
+        """
+        self.url = url or settings.XRPL_WS_URL
+        self.access_control = access_control or AccessControl(XRPLClient(testnet=True))
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._last_state = {}
+        # Wallets with a recompute queued but not started
+        self._queued = set()
+        self._publisher = ThreadPoolExecutor(max_workers=publish_workers, thread_name_prefix="trustline-events")
+        self._ws = None
+        self._thread = None
+
+    def subscribe(self, wallet_address):
+        """
+        Register a client for a wallet's opt-in transitions
+
+        Args:
+            wallet_address: Wallet to watch
+
+        Returns:
+            Queue that receives opt-in state dictionaries
+        """
+        client_queue = queue.Queue()
+        with self._lock:
+            is_new = wallet_address not in self._subscribers
+            self._subscribers.setdefault(wallet_address, set()).add(client_queue)
+        self._ensure_running()
+        if is_new:
+            self._send(Subscribe(accounts=[wallet_address]))
+        return client_queue
+
+    def unsubscribe(self, wallet_address, client_queue):
+        """Remove a client; the ledger subscription is dropped with the last one"""
+        with self._lock:
+            clients = self._subscribers.get(wallet_address, set())
+            clients.discard(client_queue)
+            if clients:
+                return
+            self._subscribers.pop(wallet_address, None)
+            self._last_state.pop(wallet_address, None)
+        self._send(Unsubscribe(accounts=[wallet_address]))
+
+    def current_state(self, wallet_address):
+        """Last published state for a wallet, computing it if none is known yet"""
+        with self._lock:
+            state = self._last_state.get(wallet_address)
+        if state is None:
+            state = self._compute(wallet_address)
+            with self._lock:
+                if wallet_address in self._subscribers:
+                    state = self._last_state.setdefault(wallet_address, state)
+        return state
+
+    def _compute(self, wallet_address):
+        state = self.access_control.get_opt_in_state(wallet_address)
+        keys = state["opted_in_issuer_keys"]
+        return {
+            "wallet_address": wallet_address,
+            "opted_in": bool(keys),
+            "opted_in_issuer_keys": keys,
+            "opted_in_issuers": [VERIFIED_ISSUERS[key]["name"] for key in keys],
+            "ledger_index": state["ledger_index"],
+        }
+
+    def _queue_publish(self, wallet_address):
+        """Recompute a wallet's state off the stream thread (coalescing queued events)"""
+        with self._lock:
+            if wallet_address in self._queued:
+                return
+            self._queued.add(wallet_address)
+        self._publisher.submit(self._publish, wallet_address)
+
+    def _publish(self, wallet_address):
+        with self._lock:
+            self._queued.discard(wallet_address)
+        try:
+            state = self._compute(wallet_address)
+        except Exception as e:
+            # Subscribers keep the last state; the next event for the wallet retries
+            print(f"Trustline event lookup failed for {wallet_address}: {e}", file=sys.stderr)
+            return
+        with self._lock:
+            clients = list(self._subscribers.get(wallet_address, ()))
+            if not clients:
+                return
+            previous = self._last_state.get(wallet_address)
+            self._last_state[wallet_address] = state
+        if previous and previous["opted_in_issuer_keys"] == state["opted_in_issuer_keys"]:
+            return
+        for client_queue in clients:
+            client_queue.put(state)
+
+    def _send(self, request):
+        ws = self._ws
+        if ws is not None and ws.is_open():
+            try:
+                ws.send(request)
+            except Exception:
+                # The listener thread resubscribes everything on reconnect
+                pass
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        # Give the listener a moment to connect so the first subscribe is not lost
+        for _ in range(50):
+            if self._ws is not None and self._ws.is_open():
+                return
+            time.sleep(0.05)
+
+    def _run(self):
+        """Listener loop: one websocket, reconnecting with backoff"""
+        backoff = 1
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                watched = list(self._subscribers)
+            try:
+                with WebsocketClient(self.url) as ws:
+                    self._ws = ws
+                    ws.send(Subscribe(accounts=watched))
+                    backoff = 1
+                    for message in ws:
+                        if message.get("type") != "transaction" or not message.get("validated"):
+                            continue
+                        with self._lock:
+                            touched = affected_trustline_accounts(message) & set(self._subscribers)
+                        for wallet_address in touched:
+                            self._queue_publish(wallet_address)
+            except Exception as e:
+                print(f"Trustline event stream disconnected: {e}", file=sys.stderr)
+            finally:
+                self._ws = None
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+_default_hub = None
+
+
+def get_hub():
+    """Get the process-wide event hub (created on first use)"""
+    global _default_hub
+    if _default_hub is None:
+        _default_hub = TrustlineEventHub()
+    return _default_hub
@@ -0,0 +1,249 @@
+"""
+Trustline Set
+
+Compact, column-oriented storage for large trustline lists (operator and
+issuer accounts with tens of thousands of lines).
+
+Instead of one dict of strings per line, a TrustlineSet keeps:
+    - peer accounts as 20-byte account IDs in one bytearray
+    - currencies as small codes into an interned currency table
+    - balance, limit and limit_peer as float columns
+    - boolean line flags packed into one byte per line
+plus an open-addressing hash index of row numbers by (peer account,
+currency). Dictionaries in the familiar account_lines format are only built
+when a caller asks for one.
+
+Amounts are stored as doubles, which hold the 15 significant digits of an XRPL
+issued-currency amount exactly; dict views render them with that precision.
+"""
+from array import array
+
+from xrpl.core.addresscodec import encode_classic_address
+
+from src.xrpl_client import format_currency_code
+
+
+# Line flag bits (account_lines boolean fields)
+_FLAG_FIELDS = ("no_ripple", "no_ripple_peer", "authorized", "peer_authorized", "freeze", "freeze_peer")
+
+_XRPL_ALPHABET = "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz"
+_BASE58_VALUES = {char: value for value, char in enumerate(_XRPL_ALPHABET)}
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MIN_CAPACITY = 16
+
+
+def _account_id(address):
+    """
+    20-byte account ID of a classic address
+    
+    Lines come from rippled, so the checksum is not re-verified here; the
+    address is only decoded (several times faster than the checked decoder).
+    """
+    value = 0
+    for char in address:
+        value = value * 58 + _BASE58_VALUES[char]
+    # Version byte (0x00, the leading "r") + 20-byte account ID + 4-byte checksum
+    return value.to_bytes(25, "big")[1:21]
+
+
+def _ledger_currency(currency):
+    """Currency code as account_lines reports it (40-char hex passes through)"""
+    return currency if len(currency) == 40 else format_currency_code(currency)
+
+
+def _format_amount(value):
+    """Render a float column value the way rippled prints amounts"""
+    text = "%.15g" % value
+    if "e" in text:
+        # 1e-05 -> 1e-5, 1e+20 -> 1e20
+        mantissa, exponent = text.split("e")
+        text = f"{mantissa}e{int(exponent)}"
+    return "0" if text == "-0" else text
+
+
+class TrustlineSet:
+    """Struct-of-arrays trustline list indexed by (peer account, currency)"""
+
+    __slots__ = ("_peers", "_currency_codes", "_currencies", "_currency_index",
+                 "balances", "limits", "limits_peer", "_flags", "_slots", "ledger_index")
+
+    def __init__(self, lines=(), ledger_index=None):
+        """
+        Initialize trustline set
+
+        Args:
+            lines: Trustline objects in account_lines format (optional)
+            ledger_index: Ledger the lines were read from (optional)
+        """
+        self._peers = bytearray()
+        self._currency_codes = array("H")
+        self._currencies = []
+        self._currency_index = {}
+        self.balances = array("d")
+        self.limits = array("d")
+        self.limits_peer = array("d")
+        self._flags = bytearray()
+        self._slots = array("l", [-1]) * _MIN_CAPACITY
+        self.ledger_index = ledger_index
+        self.extend(lines)
+
+    def _intern_currency(self, currency):
+        code = self._currency_index.get(currency)
+        if code is None:
+            code = self._currency_index[currency] = len(self._currencies)
+            self._currencies.append(currency)
+        return code
+
+    def _probe(self, peer_id, code):
+        """
+        Find the index slot for (peer_id, code)
+
+        Returns:
+            Tuple of (slot position, row number or -1 if the slot is empty)
+        """
+        slots = self._slots
+        mask = len(slots) - 1
+        pos = ((int.from_bytes(peer_id[:8], "little") ^ (code * _HASH_MULTIPLIER)) >> 3) & mask
+        peers = self._peers
+        codes = self._currency_codes
+        while True:
+            row = slots[pos]
+            if row < 0:
+                return pos, -1
+            if codes[row] == code and peers[row * 20:row * 20 + 20] == peer_id:
+                return pos, row
+            pos = (pos + 1) & mask
+
+    def _grow(self):
+        """Double the index (keeps the load factor at or below one half)"""
+        self._slots = array("l", [-1]) * (len(self._slots) * 2)
+        peers = self._peers
+        for row, code in enumerate(self._currency_codes):
+            pos, _ = self._probe(bytes(peers[row * 20:row * 20 + 20]), code)
+            self._slots[pos] = row
+
+    def append(self, line):
+        """
+        Add one trustline (account_lines format); replaces an existing line
+        to the same peer and currency
+
+        Args:
+            line: Trustline dictionary with account, currency, balance, limit, ...
+        """
+        peer_id = _account_id(line["account"])
+        code = self._intern_currency(line["currency"])
+        flags = 0
+        for bit, field in enumerate(_FLAG_FIELDS):
+            if line.get(field):
+                flags |= 1 << bit
+
+        pos, row = self._probe(peer_id, code)
+        if row >= 0:
+            self.balances[row] = float(line.get("balance", 0))
+            self.limits[row] = float(line.get("limit", 0))
+            self.limits_peer[row] = float(line.get("limit_peer", 0))
+            self._flags[row] = flags
+            return
+
+        self._slots[pos] = len(self.balances)
+        self._peers += peer_id
+        self._currency_codes.append(code)
+        self.balances.append(float(line.get("balance", 0)))
+        self.limits.append(float(line.get("limit", 0)))
+        self.limits_peer.append(float(line.get("limit_peer", 0)))
+        self._flags.append(flags)
+        if 2 * len(self._flags) > len(self._slots):
+            self._grow()
+
+    def extend(self, lines):
+        """Add several trustlines (see append)"""
+        for line in lines:
+            self.append(line)
+
+    def __len__(self):
+        return len(self.balances)
+
+    def find(self, account, currency):
+        """
+        Row of the line to a peer in a currency
+
+        Args:
+            account: Peer (issuer) address
+            currency: Currency code (e.g., "USD", "GID", "RLUSD") or 40-char hex
+
+        Returns:
+            Row number, or -1 if there is no such line
+        """
+        code = self._currency_index.get(_ledger_currency(currency))
+        if code is None:
+            return -1
+        try:
+            peer_id = _account_id(account)
+        except (KeyError, OverflowError):
+            # Not a classic address, so it cannot be a peer
+            return -1
+        return self._probe(peer_id, code)[1]
+
+    def contains(self, account, currency):
+        """True if there is a line to account in currency"""
+        return self.find(account, currency) >= 0
+
+    def account(self, row):
+        """Peer address of a row"""
+        return encode_classic_address(bytes(self._peers[row * 20:row * 20 + 20]))
+
+    def currency(self, row):
+        """Currency code of a row, as stored on the ledger"""
+        return self._currencies[self._currency_codes[row]]
+
+    def line(self, row):
+        """
+        account_lines-style dictionary for one row (built on demand)
+
+        Returns:
+            Dictionary with account, currency, balance, limit, limit_peer and flags
+        """
+        flags = self._flags[row]
+        line = {
+            "account": self.account(row),
+            "currency": self.currency(row),
+            "balance": _format_amount(self.balances[row]),
+            "limit": _format_amount(self.limits[row]),
+            "limit_peer": _format_amount(self.limits_peer[row]),
+        }
+        for bit, field in enumerate(_FLAG_FIELDS):
+            if flags & (1 << bit):
+                line[field] = True
+        return line
+
+    def get(self, account, currency):
+        """Dictionary view of one line, or None if there is no such line"""
+        row = self.find(account, currency)
+        return self.line(row) if row >= 0 else None
+
+    def __iter__(self):
+        """Dictionary views of every line, built lazily"""
+        for row in range(len(self)):
+            yield self.line(row)
+
+    def rows_for_currency(self, currency):
+        """Row numbers of every line in one currency"""
+        code = self._currency_index.get(_ledger_currency(currency))
+        if code is None:
+            return []
+        return [row for row, row_code in enumerate(self._currency_codes) if row_code == code]
+
+    def total_balance(self, currency):
+        """Sum of balances in one currency (from this account's point of view)"""
+        balances = self.balances
+        return sum(balances[row] for row in self.rows_for_currency(currency))
+
+    def nbytes(self):
+        """Approximate bytes held by the columns and the index"""
+        return (
+            len(self._peers)
+            + self._currency_codes.itemsize * len(self._currency_codes)
+            + self.balances.itemsize * len(self.balances) * 3
+            + len(self._flags)
+            + self._slots.itemsize * len(self._slots)
+        )
@@ -0,0 +1,164 @@
+"""
+Trustline Sync
+
+Keeps a local copy of accounts' trustlines up to date incrementally.
+
+Each account remembers the validated ledger it was last synced to. A refresh
+asks account_tx only for newer transactions and applies their RippleState
+changes as a diff; an idle account costs one small request. A full
+account_lines re-fetch happens only on first sync or when the delta is larger
+than max_delta_transactions.
+"""
+import json
+import os
+import threading
+
+from xrpl.clients import XRPLRequestFailureException
+
+from src.ripple_state import iter_ripple_state_changes, line_from_ripple_state
+
+
+class TrustlineSync:
+    """Incrementally synced trustline state for many accounts"""
+
+    def __init__(self, xrpl_client, store_path=None, max_delta_transactions=200):
+        """
+        Initialize trustline sync
+
+        Args:
+            xrpl_client: XRPLClient instance
+            store_path: JSON file to persist state in (optional; in-memory only if None)
+            max_delta_transactions: Above this many new transactions, re-fetch instead
+        """
+        self.client = xrpl_client
+        self.store_path = store_path
+        self.max_delta_transactions = max_delta_transactions
+        self._lock = threading.Lock()
+        self.accounts = {}
+        self.stats = {"full_fetches": 0, "delta_refreshes": 0, "transactions_applied": 0}
+        if store_path and os.path.exists(store_path):
+            self.load()
+
+    def get_lines(self, account):
+        """Last synced trustlines of an account (empty if never synced)"""
+        state = self.accounts.get(account)
+        return list(state["lines"].values()) if state else []
+
+    def get_ledger_index(self, account):
+        """Ledger index an account was last synced to (None if never synced)"""
+        state = self.accounts.get(account)
+        return state["ledger_index"] if state else None
+
+    def refresh(self, account):
+        """
+        Bring one account's trustlines up to the latest validated ledger
+
+        Args:
+            account: XRPL address
+
+        Returns:
+            List of trustline objects (account_lines format)
+        """
+        state = self.accounts.get(account)
+        if state is None or not self._apply_delta(account, state):
+            self._full_fetch(account)
+        return self.get_lines(account)
+
+    def refresh_many(self, accounts):
+        """
+        Refresh several accounts
+
+        Args:
+            accounts: Iterable of XRPL addresses
+
+        Returns:
+            Dictionary of account -> list of trustline objects
+        """
+        return {account: self.refresh(account) for account in accounts}
+
+    def _full_fetch(self, account):
+        lines, ledger_index = self.client.get_all_trustlines(account)
+        with self._lock:
+            self.accounts[account] = {
+                "ledger_index": ledger_index,
+                "lines": {(line["account"], line["currency"]): line for line in lines},
+            }
+            self.stats["full_fetches"] += 1
+
+    def _apply_delta(self, account, state):
+        """Apply transactions newer than the synced ledger; False if a re-fetch is needed"""
+        try:
+            result = self.client.get_account_transactions(
+                account,
+                ledger_index_min=state["ledger_index"] + 1,
+                limit=self.max_delta_transactions + 1,
+                forward=True
+            )
+        except XRPLRequestFailureException as e:
+            # Already synced to the latest validated ledger: nothing newer to ask for
+            if e.error == "lgrIdxsInvalid":
+                return True
+            raise
+        transactions = result.get("transactions", [])
+        if result.get("marker") or len(transactions) > self.max_delta_transactions:
+            return False
+
+        with self._lock:
+            for entry in transactions:
+                self.apply_transaction(account, entry.get("meta"), state)
+            self.stats["transactions_applied"] += len(transactions)
+            self.stats["delta_refreshes"] += 1
+            if result.get("ledger_index_max") is not None:
+                state["ledger_index"] = max(state["ledger_index"], result["ledger_index_max"])
+        return True
+
+    def apply_transaction(self, account, meta, state=None):
+        """
+        Apply one validated transaction's RippleState changes to an account
+
+        Args:
+            account: XRPL address whose lines to update
+            meta: Transaction metadata
+            state: Account state (defaults to the stored state for account)
+        """
+        state = state if state is not None else self.accounts.get(account)
+        if state is None:
+            return
+        for change, fields, _ in iter_ripple_state_changes(meta):
+            line = line_from_ripple_state(fields, account)
+            if line is None:
+                continue
+            key = (line["account"], line["currency"])
+            if change == "deleted":
+                state["lines"].pop(key, None)
+            else:
+                state["lines"][key] = line
+
+    def load(self):
+        """Load state from store_path"""
+        with open(self.store_path, "r") as f:
+            data = json.load(f)
+        self.accounts = {
+            account: {
+                "ledger_index": entry["ledger_index"],
+                "lines": {(line["account"], line["currency"]): line for line in entry["lines"]},
+            }
+            for account, entry in data.get("accounts", {}).items()
+        }
+
+    def save(self):
+        """Atomically write state to store_path"""
+        with self._lock:
+            data = {
+                "accounts": {
+                    account: {
+                        "ledger_index": state["ledger_index"],
+                        "lines": list(state["lines"].values()),
+                    }
+                    for account, state in self.accounts.items()
+                }
+            }
+        tmp_path = f"{self.store_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.store_path)
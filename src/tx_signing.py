@@ -0,0 +1,330 @@
+"""
+Transaction Signing
+
+Signing service for wallet operations (TrustSet, Payment).
+
+Deriving a keypair from a seed costs tens of milliseconds, so KeyCache keeps
+derived keypairs in memory for a bounded time. Entries are keyed by a hash of
+the seed (the seed itself is not kept), and the private key is held in a
+bytearray that is overwritten with zeros when the entry expires, is evicted or
+the cache is cleared. Expired entries are purged on every lookup and by a
+timer at their expiry, so a seed used once is not kept past its TTL even if
+the process goes idle. Lookups get a copy of the keypair made under the cache
+lock, so zeroizing an entry never affects a signature already in progress.
+Python may still hold those transient str copies while signing; the cache only
+bounds how long the long-lived copy exists.
+
+SigningService signs batches of already-autofilled transactions (Sequence,
+Fee and LastLedgerSequence set) across a process pool and returns serialized
+blobs ready for submission (XRPLClient.submit_blob).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from xrpl.core.binarycodec import encode
+from xrpl.models.transactions.transaction import Transaction
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+from config import settings
+
+
+# Prefix of a signed transaction when computing its hash (rippled HashPrefix::transactionID)
+_TXN_HASH_PREFIX = bytes.fromhex("54584E00")
+
+
+def transaction_hash(tx_blob):
+    """Hash (transaction ID) of a signed transaction blob"""
+    return hashlib.sha512(_TXN_HASH_PREFIX + bytes.fromhex(tx_blob)).digest()[:32].hex().upper()
+
+
+class _Keypair:
+    """Copy of a keypair handed out by KeyCache (unaffected by zeroizing the entry)"""
+
+    __slots__ = ("classic_address", "public_key", "private_key", "algorithm")
+
+    def __init__(self, classic_address, public_key, private_key, algorithm):
+        self.classic_address = classic_address
+        self.public_key = public_key
+        self.private_key = private_key
+        self.algorithm = algorithm
+
+    def wallet(self, seed=None):
+        """Wallet built from the keypair (no derivation)"""
+        return Wallet(self.public_key, self.private_key, seed=seed, algorithm=self.algorithm)
+
+
+class _CachedKey:
+    """Derived keypair with a zeroizable private key"""
+
+    __slots__ = ("classic_address", "public_key", "private_key", "algorithm", "expires")
+
+    def __init__(self, wallet, expires):
+        self.classic_address = wallet.classic_address
+        self.public_key = wallet.public_key
+        self.private_key = bytearray(wallet.private_key.encode("ascii"))
+        self.algorithm = wallet.algorithm
+        self.expires = expires
+
+    def keypair(self):
+        """Copy of the keypair (caller holds the cache lock, so it can't be zeroized meanwhile)"""
+        return _Keypair(self.classic_address, self.public_key, self.private_key.decode("ascii"), self.algorithm)
+
+    def zeroize(self):
+        """Overwrite the private key in place"""
+        self.private_key[:] = bytes(len(self.private_key))
+
+
+class KeyCache:
+    """LRU of derived keypairs with a bounded lifetime"""
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        """
+        Initialize key cache
+
+        Args:
+            ttl_seconds: How long a derived keypair is kept (default from settings)
+            max_entries: Least recently used keypairs are evicted beyond this size
+                (default from settings)
+        """
+        self.ttl_seconds = ttl_seconds or settings.SIGNING_KEY_TTL_SECONDS
+        self.max_entries = max_entries or settings.SIGNING_KEY_CACHE_SIZE
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _fingerprint(seed):
+        return hashlib.sha256(seed.encode("utf-8")).digest()
+
+    def _evict(self, fingerprint):
+        """Drop and zeroize one entry (caller holds the lock)"""
+        self._keys.pop(fingerprint).zeroize()
+        self.evictions += 1
+
+    def _purge_expired(self, now):
+        """Zeroize and drop expired entries (caller holds the lock)"""
+        for fingerprint in [f for f, key in self._keys.items() if key.expires <= now]:
+            self._evict(fingerprint)
+
+    def _schedule_purge(self, now):
+        """Arm a timer for the next expiry while keys are held (caller holds the lock)"""
+        if self._timer is not None or not self._keys:
+            return
+        delay = max(0.0, min(key.expires for key in self._keys.values()) - now)
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            now = time.monotonic()
+            self._purge_expired(now)
+            self._schedule_purge(now)
+
+    def get(self, seed, algorithm=None):
+        """
+        Cached keypair for a seed, derived on first use
+
+        Args:
+            seed: Wallet seed
+            algorithm: CryptoAlgorithm (default: the one encoded in the seed)
+
+        Returns:
+            _Keypair (a copy; the cached entry may be zeroized at any time)
+        """
+        fingerprint = self._fingerprint(seed)
+        now = time.monotonic()
+        with self._lock:
+            # At most SIGNING_KEY_CACHE_SIZE entries, so scanning them is cheap
+            self._purge_expired(now)
+            key = self._keys.get(fingerprint)
+            if key is not None:
+                self._keys.move_to_end(fingerprint)
+                self.hits += 1
+                return key.keypair()
+            self.misses += 1
+
+        # Derivation is the slow part: don't hold the lock while doing it
+        wallet = Wallet.from_seed(seed, algorithm=algorithm)
+        key = _CachedKey(wallet, now + self.ttl_seconds)
+        with self._lock:
+            if fingerprint in self._keys:
+                self._evict(fingerprint)
+            self._keys[fingerprint] = key
+            while len(self._keys) > self.max_entries:
+                self._evict(next(iter(self._keys)))
+            self._schedule_purge(now)
+        return _Keypair(wallet.classic_address, wallet.public_key, wallet.private_key, wallet.algorithm)
+
+    def wallet(self, seed, algorithm=None):
+        """
+        Wallet for a seed, reusing a cached keypair when there is one
+
+        Args:
+            seed: Wallet seed
+            algorithm: CryptoAlgorithm (default: the one encoded in the seed)
+
+        Returns:
+            xrpl Wallet
+        """
+        return self.get(seed, algorithm).wallet(seed)
+
+    def purge(self):
+        """Zeroize and drop expired keypairs"""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+
+    def clear(self):
+        """Zeroize and drop every keypair"""
+        with self._lock:
+            for fingerprint in list(self._keys):
+                self._evict(fingerprint)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def metrics(self):
+        """Cache counters for monitoring"""
+        return {"entries": len(self._keys), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+def _sign_one(tx_json, public_key, private_key):
+    """
+    Sign one transaction
+
+    Returns:
+        Dictionary with account, tx_blob and hash, or account and error
+    """
+    try:
+        signed = sign(Transaction.from_xrpl(tx_json), Wallet(public_key, private_key))
+        tx_blob = encode(signed.to_xrpl())
+        return {"account": tx_json.get("Account"), "tx_blob": tx_blob, "hash": transaction_hash(tx_blob)}
+    except Exception as e:
+        return {"account": tx_json.get("Account"), "error": f"{type(e).__name__}: {e}"}
+
+
+def sign_chunk(items):
+    """Sign a list of (tx_json, public_key, private_key) in a worker process"""
+    return [_sign_one(*item) for item in items]
+
+
+class SigningService:
+    """Signs transaction batches across a process pool using cached keypairs"""
+
+    def __init__(self, key_cache=None, workers=None, chunk_size=16):
+        """
+        Initialize signing service
+
+        Args:
+            key_cache: KeyCache (default: the process-wide cache)
+            workers: Worker processes (default from settings, CPU count if unset;
+                0 signs in-process)
+            chunk_size: Transactions sent to a worker at a time
+        """
+        self.keys = key_cache or get_key_cache()
+        if workers is None:
+            workers = settings.SIGNING_WORKERS or os.cpu_count()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def close(self):
+        """Shut down the worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _prepare(self, transaction, seed):
+        key = self.keys.get(seed)
+        tx_json = transaction.to_xrpl() if isinstance(transaction, Transaction) else dict(transaction)
+        if tx_json.get("Account") != key.classic_address:
+            raise ValueError(f"Transaction account {tx_json.get('Account')} does not match the signing seed")
+        for field in ("Sequence", "Fee"):
+            if field not in tx_json:
+                raise ValueError(f"Transaction must be autofilled before signing (missing {field})")
+        return tx_json, key.public_key, key.private_key
+
+    def sign(self, transaction, seed):
+        """
+        Sign one transaction on the calling thread
+
+        Args:
+            transaction: Autofilled xrpl Transaction model, or dictionary in
+                ledger (PascalCase) format
+            seed: Seed of the transaction's Account
+
+        Returns:
+            Dictionary with account, tx_blob and hash (or account and error)
+
+        Raises:
+            ValueError: If the transaction is not autofilled or the seed does
+                not belong to its Account
+        """
+        return _sign_one(*self._prepare(transaction, seed))
+
+    def sign_batch(self, items):
+        """
+        Sign many transactions across the worker processes
+
+        Args:
+            items: Iterable of (transaction, seed) pairs (see sign)
+
+        Returns:
+            List of result dictionaries in input order; a transaction that
+            fails to sign gets an "error" instead of tx_blob
+
+        Raises:
+            ValueError: If a transaction is not autofilled or its seed does not
+                belong to its Account (checked before anything is signed)
+        """
+        prepared = [self._prepare(transaction, seed) for transaction, seed in items]
+        if not self.workers or len(prepared) <= self.chunk_size:
+            return sign_chunk(prepared)
+        chunks = [prepared[i:i + self.chunk_size] for i in range(0, len(prepared), self.chunk_size)]
+        results = []
+        for chunk_results in self._get_pool().map(sign_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+
+_key_cache = KeyCache()
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_key_cache():
+    """Process-wide derived keypair cache"""
+    return _key_cache
+
+
+def get_signing_service():
+    """Process-wide signing service (worker processes start on first batch)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SigningService(_key_cache)
+        return _service
@@ -4,11 +4,138 @@ XRPL Client Wrapper
 Handles XRPL connection, trustline queries, and trustline creation.
 Based on patterns from: https://github.com/RippleDevRel/xrpl-js-python-simple-scripts
 """
-from xrpl.clients import JsonRpcClient
-from xrpl.models.requests import AccountLines
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.clients import JsonRpcClient, XRPLRequestFailureException
+from xrpl.core.addresscodec import is_valid_classic_address
+from xrpl.models.requests import AccountInfo, AccountLines, AccountTx, LedgerEntry, SubmitOnly, Tx
 from xrpl.models.transactions import TrustSet
 from xrpl.transaction import submit_and_wait
-from xrpl.wallet import Wallet, generate_faucet_wallet
+from xrpl.wallet import generate_faucet_wallet
+
+from config import settings
+from src.admission import get_admission
+from src.cache import get_trustline_cache
+from src.profiling import span
+from src.ripple_state import ripple_state_index
+from src.rpc_transport import RawRpcTransport
+from src.tx_signing import get_key_cache
+
+
+# Shared by all clients in the process for concurrent ledger_entry lookups
+_LOOKUP_POOL = ThreadPoolExecutor(max_workers=8)
+
+TESTNET_RPC_URL = "https://s.altnet.rippletest.net:51234"
+MAINNET_RPC_URL = "https://xrplcluster.com"
+
+# Read-only methods that can use the raw transport, with their xrpl-py models
+_READ_MODELS = {"account_lines": AccountLines, "ledger_entry": LedgerEntry, "account_info": AccountInfo,
+                "tx": Tx, "account_tx": AccountTx}
+
+# One keep-alive transport per URL, shared by every client in the process
+_TRANSPORTS = {}
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def _get_transport(url):
+    with _TRANSPORTS_LOCK:
+        transport = _TRANSPORTS.get(url)
+        if transport is None:
+            transport = _TRANSPORTS[url] = RawRpcTransport(url)
+        return transport
+
+
+class InvalidAddressError(ValueError):
+    """Raised when an address is not a valid classic XRPL address"""
+
+
+class AccountNotFoundError(Exception):
+    """Raised when an account does not exist (unfunded) in the validated ledger"""
+
+    def __init__(self, address):
+        super().__init__(f"Account {address} not found on the ledger (is it funded?)")
+        self.address = address
+
+
+def validate_address(address):
+    """
+    Check an address locally (base58 alphabet and checksum) before any RPC
+    
+    Args:
+        address: Candidate classic XRPL address
+        
+    Raises:
+        InvalidAddressError: If the address is malformed
+    """
+    if not isinstance(address, str) or not is_valid_classic_address(address):
+        raise InvalidAddressError(f"Invalid XRPL address: {address!r}")
+
+
+class MissingAccountCache:
+    """Short-lived memory of accounts rippled reported as not found (actNotFound)
+
+    Entries expire quickly because an account starts existing as soon as it is
+    funded.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        """
+        Initialize missing account cache
+        
+        Args:
+            ttl_seconds: How long an account is remembered as missing (default from settings)
+            max_entries: Oldest entries are dropped beyond this size (default from settings)
+        """
+        self.ttl_seconds = ttl_seconds or settings.ACCOUNT_NOT_FOUND_TTL_SECONDS
+        self.max_entries = max_entries or settings.ACCOUNT_NOT_FOUND_CACHE_SIZE
+        self._expires = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def add(self, address):
+        """Remember an account as missing"""
+        with self._lock:
+            self._expires.pop(address, None)
+            self._expires[address] = time.monotonic() + self.ttl_seconds
+            while len(self._expires) > self.max_entries:
+                self._expires.popitem(last=False)
+    
+    def discard(self, address):
+        """Forget an account (e.g., after it was funded)"""
+        with self._lock:
+            self._expires.pop(address, None)
+    
+    def clear(self):
+        """Forget every account"""
+        with self._lock:
+            self._expires.clear()
+    
+    def __contains__(self, address):
+        expires = self._expires.get(address)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            self.discard(address)
+            return False
+        return True
+
+
+class ExistingAccountCache(MissingAccountCache):
+    """Short-lived memory of accounts seen to exist (funded)
+
+    Lets a wallet with no trustlines be answered without asking rippled again
+    whether it exists; accounts are rarely deleted, so entries live longer.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        super().__init__(ttl_seconds or settings.ACCOUNT_EXISTS_TTL_SECONDS, max_entries)
+
+
+# Shared by all clients in the process so repeated junk traffic stays local
+_MISSING_ACCOUNTS = MissingAccountCache()
+_EXISTING_ACCOUNTS = ExistingAccountCache()
 
 
 def text_to_hex(text):
@@ -50,21 +177,120 @@ def format_currency_code(currency):
         return text_to_hex(currency)
 
 
+def trustline_exists(trustlines, issuer_address, currency):
+    """
+    Check a list of trustlines (from account_lines) for a specific trustline
+    
+    Args:
+        trustlines: List of trustline objects
+        issuer_address: Issuer's XRPL address
+        currency: Currency code (e.g., "USD", "GID", "RLUSD")
+        
+    Returns:
+        True if trustline exists, False otherwise
+    """
+    # Format currency to match how it's stored on ledger
+    currency_formatted = format_currency_code(currency)
+    return any(
+        line["account"] == issuer_address and 
+        line["currency"] == currency_formatted
+        for line in trustlines
+    )
+
+
 class XRPLClient:
     """Wrapper for XRPL operations"""
     
-    def __init__(self, testnet=True):
+    def __init__(self, testnet=True, fast_reads=None):
         """
         Initialize XRPL client
         
         Args:
             testnet: If True, use testnet; otherwise use mainnet
+            fast_reads: Use the raw JSON-RPC transport for read-only queries
+                (default from settings.XRPL_FAST_READS)
         """
-        if testnet:
-            self.client = JsonRpcClient("https://s.altnet.rippletest.net:51234")
-        else:
-            self.client = JsonRpcClient("https://xrplcluster.com")
+        url = settings.XRPL_RPC_URL or (TESTNET_RPC_URL if testnet else MAINNET_RPC_URL)
+        self.client = JsonRpcClient(url)
         self.testnet = testnet
+        if fast_reads is None:
+            fast_reads = bool(settings.XRPL_FAST_READS)
+        self.transport = _get_transport(url) if fast_reads else None
+    
+    def _request(self, request, wallet=None):
+        """
+        Send a request to rippled through admission control
+        
+        Args:
+            request: xrpl-py request model
+            wallet: Account the request is about, for per-wallet rate limiting.
+                Paged history/sync reads pass None: they are bounded by the
+                global rate and concurrency limits only.
+            
+        Raises:
+            AdmissionRejected: If the request is shed to protect the upstream node
+        """
+        with get_admission().admit(wallet), span(f"xrpl:{request.method.value}"):
+            return self.client.request(request)
+    
+    def _read(self, method, wallet=None, **params):
+        """
+        Send a read-only query through admission control
+        
+        Uses the raw transport when enabled, otherwise the equivalent xrpl-py
+        model; both return an object with .result and .is_successful().
+        
+        Args:
+            method: "account_lines", "ledger_entry", "account_info", "tx" or "account_tx"
+            wallet: Account the request is about (see _request)
+            **params: Request parameters, named as in the rippled API
+        """
+        with get_admission().admit(wallet), span(f"xrpl:{method}"):
+            if self.transport is not None:
+                return self.transport.request(method, **params)
+            return self.client.request(_READ_MODELS[method](**params))
+    
+    def _check_account(self, address):
+        """Reject malformed or recently-missing accounts without a round trip"""
+        validate_address(address)
+        if address in _MISSING_ACCOUNTS:
+            raise AccountNotFoundError(address)
+    
+    def _raise_for_result(self, address, result):
+        """Raise the matching exception for a failed request about an account"""
+        if result.get("error") == "actNotFound":
+            _MISSING_ACCOUNTS.add(address)
+            _EXISTING_ACCOUNTS.discard(address)
+            raise AccountNotFoundError(address)
+        raise XRPLRequestFailureException(result)
+    
+    def account_exists(self, address):
+        """
+        Check whether an account exists (is funded) in the validated ledger
+        
+        Args:
+            address: XRPL address
+            
+        Returns:
+            True if the account exists, False otherwise
+        """
+        return self._account_exists(address, address)
+
+    def _account_exists(self, address, wallet):
+        """account_exists, charging the request to wallet (None: already charged)"""
+        try:
+            self._check_account(address)
+        except AccountNotFoundError:
+            return False
+        response = self._read("account_info", wallet, account=address, ledger_index="validated")
+        if response.is_successful():
+            _EXISTING_ACCOUNTS.add(address)
+            return True
+        if response.result.get("error") == "actNotFound":
+            _MISSING_ACCOUNTS.add(address)
+            _EXISTING_ACCOUNTS.discard(address)
+            return False
+        raise XRPLRequestFailureException(response.result)
     
     def get_user_trustlines(self, user_address):
         """
@@ -76,12 +302,145 @@ class XRPLClient:
         Returns:
             List of trustline objects
         """
-        request = AccountLines(
+        lines, _ = self.get_validated_trustlines(user_address)
+        return lines
+    
+    def get_validated_trustlines(self, user_address):
+        """
+        Query all trustlines for a user account along with the ledger they came from
+        
+        Args:
+            user_address: XRPL address to query
+            
+        Returns:
+            Tuple of (list of trustline objects, validated ledger index)
+            
+        Raises:
+            InvalidAddressError: If user_address is malformed
+            AccountNotFoundError: If the account does not exist
+        """
+        self._check_account(user_address)
+        response = self._read(
+            "account_lines",
+            user_address,
             account=user_address,
             ledger_index="validated"
         )
-        response = self.client.request(request)
-        return response.result.get("lines", [])
+        if not response.is_successful():
+            self._raise_for_result(user_address, response.result)
+        return response.result.get("lines", []), response.result.get("ledger_index")
+    
+    def get_all_trustlines(self, user_address, page_size=400):
+        """
+        Query every trustline of an account, following pagination markers
+        
+        All pages are read from the same validated ledger.
+        
+        Args:
+            user_address: XRPL address to query
+            page_size: Lines requested per page
+            
+        Returns:
+            Tuple of (list of trustline objects, validated ledger index)
+            
+        Raises:
+            InvalidAddressError: If user_address is malformed
+            AccountNotFoundError: If the account does not exist
+            XRPLRequestFailureException: If rippled returns another error
+        """
+        self._check_account(user_address)
+        lines = []
+        ledger_index = "validated"
+        marker = None
+        while True:
+            response = self._read(
+                "account_lines",
+                account=user_address,
+                ledger_index=ledger_index,
+                limit=page_size,
+                marker=marker
+            )
+            if not response.is_successful():
+                self._raise_for_result(user_address, response.result)
+            lines.extend(response.result.get("lines", []))
+            ledger_index = response.result.get("ledger_index", ledger_index)
+            marker = response.result.get("marker")
+            if not marker:
+                return lines, ledger_index
+    
+    def get_trustline_set(self, user_address, page_size=400):
+        """
+        Query every trustline of an account into a compact TrustlineSet
+        
+        Pages are folded into the set as they arrive, so memory stays close to
+        the compact size even for accounts with tens of thousands of lines.
+        All pages are read from the same validated ledger.
+        
+        Args:
+            user_address: XRPL address to query
+            page_size: Lines requested per page
+            
+        Returns:
+            TrustlineSet with ledger_index set
+        """
+        # Imported here because trustline_set itself depends on this module
+        from src.trustline_set import TrustlineSet
+        
+        self._check_account(user_address)
+        trustlines = TrustlineSet()
+        ledger_index = "validated"
+        marker = None
+        while True:
+            response = self._read(
+                "account_lines",
+                account=user_address,
+                ledger_index=ledger_index,
+                limit=page_size,
+                marker=marker
+            )
+            if not response.is_successful():
+                self._raise_for_result(user_address, response.result)
+            trustlines.extend(response.result.get("lines", []))
+            ledger_index = response.result.get("ledger_index", ledger_index)
+            marker = response.result.get("marker")
+            if not marker:
+                trustlines.ledger_index = ledger_index
+                return trustlines
+    
+    def get_account_transactions(self, account, ledger_index_min=-1, ledger_index_max=-1,
+                                 limit=None, marker=None, forward=True):
+        """
+        Query one page of validated transactions affecting an account
+        
+        Args:
+            account: XRPL address
+            ledger_index_min: Earliest ledger to include (-1 for the oldest available)
+            ledger_index_max: Latest ledger to include (-1 for the latest validated)
+            limit: Maximum transactions in this page
+            marker: Pagination marker from a previous page
+            forward: Oldest first if True
+            
+        Returns:
+            account_tx result dictionary ("transactions", "ledger_index_max", "marker", ...)
+            
+        Raises:
+            InvalidAddressError: If account is malformed
+            AccountNotFoundError: If the account does not exist
+            XRPLRequestFailureException: If rippled returns another error
+        """
+        self._check_account(account)
+        response = self._read(
+            "account_tx",
+            account=account,
+            ledger_index_min=ledger_index_min,
+            ledger_index_max=ledger_index_max,
+            limit=limit,
+            marker=marker,
+            forward=forward
+        )
+        if not response.is_successful():
+            self._raise_for_result(account, response.result)
+        return response.result
     
     def has_trustline(self, user_address, issuer_address, currency):
         """
@@ -95,15 +454,92 @@ class XRPLClient:
         Returns:
             True if trustline exists, False otherwise
         """
-        # Format currency to match how it's stored on ledger
-        currency_formatted = format_currency_code(currency)
+        node, _ = self.get_trustline_entry(user_address, issuer_address, currency)
+        return node is not None
+    
+    def get_trustline_entry(self, user_address, issuer_address, currency):
+        """
+        Fetch the single RippleState object between a user and an issuer
+        
+        The object ID is computed locally, so cost does not depend on how many
+        trustlines the user holds.
         
-        trustlines = self.get_user_trustlines(user_address)
-        return any(
-            line["account"] == issuer_address and 
-            line["currency"] == currency_formatted
-            for line in trustlines
+        Args:
+            user_address: User's XRPL address
+            issuer_address: Issuer's XRPL address
+            currency: Currency code (e.g., "USD", "GID", "RLUSD")
+            
+        Returns:
+            Tuple of (RippleState object or None if no trustline, validated ledger index)
+            
+        Raises:
+            InvalidAddressError: If user_address is malformed
+            AccountNotFoundError: If the account was recently found not to exist
+            XRPLRequestFailureException: If rippled returns an error other than entryNotFound
+        """
+        self._check_account(user_address)
+        return self._trustline_entry(user_address, issuer_address, currency, user_address)
+
+    def _trustline_entry(self, user_address, issuer_address, currency, wallet):
+        """get_trustline_entry, charging the request to wallet (None: already charged)"""
+        response = self._read(
+            "ledger_entry",
+            wallet,
+            index=ripple_state_index(user_address, issuer_address, currency),
+            ledger_index="validated"
         )
+        result = response.result
+        if response.is_successful():
+            return result.get("node"), result.get("ledger_index")
+        if result.get("error") == "entryNotFound":
+            return None, result.get("ledger_index")
+        raise XRPLRequestFailureException(result)
+    
+    def get_trustline_entries(self, user_address, issuers):
+        """
+        Fetch the RippleState objects between a user and several issuers concurrently
+        
+        Charged to the wallet's admission bucket once, however many issuers
+        are looked up.
+        
+        Args:
+            user_address: User's XRPL address
+            issuers: List of issuer dictionaries with "address" and "currency"
+            
+        Returns:
+            Tuple of (list of RippleState objects or None, aligned with issuers,
+            lowest validated ledger index among the lookups)
+            
+        Raises:
+            InvalidAddressError: If user_address is malformed
+            AccountNotFoundError: If the account does not exist
+            AdmissionRejected: If the wallet is over its rate
+        """
+        self._check_account(user_address)
+        get_admission().charge_wallet(user_address)
+        futures = [
+            _LOOKUP_POOL.submit(
+                self._trustline_entry,
+                user_address,
+                issuer["address"],
+                issuer["currency"],
+                None
+            )
+            for issuer in issuers
+        ]
+        # Missing trustlines and a missing account look the same to ledger_entry.
+        # Unless the account is known to exist, ask alongside the lookups (no extra
+        # round trip); the answer is cached either way
+        exists = None
+        if issuers and user_address not in _EXISTING_ACCOUNTS:
+            exists = _LOOKUP_POOL.submit(self._account_exists, user_address, None)
+        results = [future.result() for future in futures]
+        if any(node is not None for node, _ in results):
+            _EXISTING_ACCOUNTS.add(user_address)
+        elif exists is not None and not exists.result():
+            raise AccountNotFoundError(user_address)
+        ledger_indexes = [ledger_index for _, ledger_index in results if ledger_index is not None]
+        return [node for node, _ in results], (min(ledger_indexes) if ledger_indexes else None)
     
     def create_trustline(self, wallet, issuer_address, currency, limit="1000000000"):
         """
@@ -139,6 +575,9 @@ class XRPLClient:
         # Pattern: submit_and_wait(transaction, client, wallet)
         response = submit_and_wait(trust_set_tx, self.client, wallet)
         
+        # Cached snapshots from before this ledger are now wrong on every instance
+        get_trustline_cache().invalidate(wallet.classic_address, response.result.get("ledger_index"))
+        
         return response
     
     def create_wallet(self):
@@ -148,6 +587,63 @@ class XRPLClient:
         return generate_faucet_wallet(self.client)
     
     def import_wallet(self, seed):
-        """Import wallet from seed"""
-        return Wallet.from_seed(seed)
+        """Import wallet from seed (derived keys are cached, see src/tx_signing.py)"""
+        return get_key_cache().wallet(seed)
+    
+    def submit_blob(self, tx_blob, wallet=None):
+        """
+        Submit an already-signed transaction (e.g., from SigningService.sign_batch)
+        
+        Args:
+            tx_blob: Serialized signed transaction (hex)
+            wallet: Sending account, for per-wallet rate limiting
+            
+        Returns:
+            Submit response (engine_result is preliminary until validated)
+        """
+        if self.transport is not None:
+            # A signed blob can't apply twice, so the transport's reconnect retry is safe
+            with get_admission().admit(wallet), span("xrpl:submit"):
+                return self.transport.request("submit", tx_blob=tx_blob)
+        return self._request(SubmitOnly(tx_blob=tx_blob), wallet)
+    
+    def get_account_root(self, address, ledger_index="validated"):
+        """
+        Query an account's AccountRoot (Balance, Sequence, OwnerCount, ...)
+        
+        Args:
+            address: XRPL address
+            ledger_index: "validated", or "current" to include transactions
+                applied to the open ledger (the next usable Sequence)
+            
+        Returns:
+            Tuple of (account_data dictionary, ledger index of the answer)
+            
+        Raises:
+            AccountNotFoundError: If the account does not exist
+        """
+        self._check_account(address)
+        response = self._read("account_info", account=address, ledger_index=ledger_index)
+        if not response.is_successful():
+            self._raise_for_result(address, response.result)
+        result = response.result
+        return result["account_data"], result.get("ledger_index", result.get("ledger_current_index"))
+    
+    def get_transaction(self, tx_hash):
+        """
+        Look up a submitted transaction
+        
+        Args:
+            tx_hash: Transaction hash
+            
+        Returns:
+            tx result dictionary ("validated", "meta", "ledger_index", ...),
+            or None if the server does not know the transaction
+        """
+        response = self._read("tx", transaction=tx_hash)
+        if not response.is_successful():
+            if response.result.get("error") == "txnNotFound":
+                return None
+            raise XRPLRequestFailureException(response.result)
+        return response.result
 
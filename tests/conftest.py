@@ -0,0 +1,27 @@
+"""
+Shared fixtures
+
+Tests import the project the way the API handlers and demo scripts do, from
+the repository root.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def mock_ledger():
+    """An in-process mock rippled that XRPLClient talks to, stopped afterwards"""
+    from config import settings
+    from src.mock_ledger import MockLedger
+
+    ledger = MockLedger()
+    url = ledger.start()
+    previous = settings.XRPL_RPC_URL
+    settings.XRPL_RPC_URL = url
+    yield ledger
+    settings.XRPL_RPC_URL = previous
+    ledger.stop()
@@ -0,0 +1,71 @@
+"""Tests for src/access_tokens.py"""
+from src.access_tokens import AccessTokenSigner, RevocationFilter, token_from_request
+
+
+WALLET = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+OTHER_WALLET = "rPT1Sjq2YGrBMTttX4GZHjKu9dyfzbpAYe"
+
+
+def make_signer(**kwargs):
+    return AccessTokenSigner(secret="test-secret", ttl_seconds=60, revocations=RevocationFilter(4096, 4), **kwargs)
+
+
+def test_issued_token_verifies_for_its_wallet_and_issuers():
+    signer = make_signer()
+    grant = signer.issue(WALLET, ["rlusd", "community_aid"], 1234)
+
+    payload = signer.verify(grant["token"], WALLET)
+    assert payload["w"] == WALLET
+    assert payload["i"] == ["community_aid", "rlusd"]
+    assert payload["l"] == 1234
+    assert payload["exp"] == grant["expires_at"]
+    assert signer.verify(grant["token"], WALLET, "rlusd") is not None
+
+
+def test_token_rejected_for_other_wallet_or_issuer():
+    signer = make_signer()
+    token = signer.issue(WALLET, ["rlusd"], 1)["token"]
+
+    assert signer.verify(token, OTHER_WALLET) is None
+    assert signer.verify(token, WALLET, "community_aid") is None
+
+
+def test_tampered_or_foreign_token_rejected():
+    signer = make_signer()
+    token = signer.issue(WALLET, ["rlusd"], 1)["token"]
+    body, _, signature = token.partition(".")
+
+    assert signer.verify(body + "." + signature[::-1], WALLET) is None
+    assert signer.verify("garbage", WALLET) is None
+    assert signer.verify("", WALLET) is None
+    other = AccessTokenSigner(secret="other-secret", ttl_seconds=60, revocations=RevocationFilter(4096, 4))
+    assert other.verify(token, WALLET) is None
+
+
+def test_expired_token_rejected(monkeypatch):
+    signer = make_signer()
+    token = signer.issue(WALLET, ["rlusd"], 1)["token"]
+
+    import src.access_tokens as access_tokens
+    later = access_tokens.time.time() + 61
+    monkeypatch.setattr(access_tokens.time, "time", lambda: later)
+    assert signer.verify(token, WALLET) is None
+
+
+def test_revoked_grant_and_wallet_rejected():
+    signer = make_signer()
+    first = signer.issue(WALLET, ["rlusd"], 1)["token"]
+    second = signer.issue(WALLET, ["rlusd"], 1)["token"]
+
+    signer.revocations.add(signer.verify(first, WALLET)["jti"])
+    assert signer.verify(first, WALLET) is None
+    assert signer.verify(second, WALLET) is not None
+
+    signer.revocations.add(f"wallet:{WALLET}")
+    assert signer.verify(second, WALLET) is None
+
+
+def test_token_from_request_prefers_bearer_header():
+    assert token_from_request({"Authorization": "Bearer abc"}, {"access_token": ["xyz"]}) == "abc"
+    assert token_from_request({}, {"access_token": ["xyz"]}) == "xyz"
+    assert token_from_request({}, None) is None
@@ -0,0 +1,77 @@
+"""Tests for src/analytics.py"""
+import json
+import os
+
+from src.analytics import SECONDS_PER_DAY, IssuerAnalytics
+
+
+ISSUER = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+DAY = 20000
+
+
+def make_analytics():
+    return IssuerAnalytics([{"address": ISSUER, "currency": "GID"}])
+
+
+def test_replayed_events_are_counted_once():
+    analytics = make_analytics()
+    close_time = DAY * SECONDS_PER_DAY
+
+    assert analytics.add_consent_event(ISSUER, "rA", 100, 0, "create", close_time)
+    assert analytics.add_consent_event(ISSUER, "rB", 101, 3, "create", close_time)
+    assert not analytics.add_consent_event(ISSUER, "rA", 100, 0, "create", close_time)
+    # Older events arriving later still count the first time
+    assert analytics.add_consent_event(ISSUER, "rC", 50, 1, "remove", close_time)
+    assert analytics.add_purchase(ISSUER, "rA", "p1", 2_500_000, 102, 0, close_time, "HASH1")
+    assert not analytics.add_purchase(ISSUER, "rA", "p1", 2_500_000, 102, 0, close_time, "HASH1")
+
+    stats = analytics.get_stats(ISSUER, days=1, end_day=DAY)
+    assert stats["totals"] == {"opt_ins": 2, "churn": 1, "net_opt_ins": 1, "purchases": 1, "revenue_xrp": "2.5"}
+    assert stats["daily"][0]["opt_ins"] == 2
+    assert stats["products"] == [{"id": "p1", "purchases": 1, "revenue_xrp": "2.5"}]
+    assert stats["as_of_ledger"] == 102
+
+
+def test_modify_events_do_not_count():
+    analytics = make_analytics()
+    analytics.add_consent_event(ISSUER, "rA", 100, 0, "modify")
+    assert analytics.get_stats(ISSUER)["totals"]["opt_ins"] == 0
+
+
+def test_saved_snapshot_keeps_keys_separate(tmp_path):
+    path = str(tmp_path / "analytics.json")
+    analytics = make_analytics()
+    for i in range(50):
+        analytics.add_consent_event(ISSUER, f"r{i}", 100 + i, 0, "create")
+    analytics.save(path)
+    analytics.save(path)
+
+    with open(path) as f:
+        snapshot = json.load(f)
+    assert "seen" not in snapshot["issuers"][ISSUER]
+    # Only the keys file the snapshot names is kept
+    assert sorted(os.listdir(tmp_path)) == ["analytics.json", snapshot["keys"]]
+
+    served = IssuerAnalytics([])
+    served.load(path, keys=False)
+    assert served.get_stats(ISSUER)["totals"]["opt_ins"] == 50
+    assert served.get_stats(ISSUER)["as_of_ledger"] == 149
+
+    resumed = IssuerAnalytics([])
+    resumed.load(path)
+    assert not resumed.add_consent_event(ISSUER, "r7", 107, 0, "create")
+    assert resumed.add_consent_event(ISSUER, "rNew", 10, 0, "create")
+    assert resumed.get_stats(ISSUER)["totals"]["opt_ins"] == 51
+
+
+def test_snapshot_with_inline_keys_still_loads(tmp_path):
+    path = tmp_path / "analytics.json"
+    path.write_text(json.dumps({"issuers": {ISSUER: {
+        "totals": [1, 0, 0, 0], "days": [], "products": [], "product_days": [],
+        "seen": {"consent": [[100, 0, "rA", "create"]]},
+    }}}))
+    analytics = IssuerAnalytics([])
+    analytics.load(str(path))
+
+    assert analytics.get_stats(ISSUER)["as_of_ledger"] == 100
+    assert not analytics.add_consent_event(ISSUER, "rA", 100, 0, "create")
@@ -0,0 +1,121 @@
+"""Tests for src/cache.py"""
+import pytest
+
+from src import cache
+from src.cache import FileBackend, TwoTierCache, get_trustline_state
+
+
+def make_cache(backend=None, **kwargs):
+    options = dict(l1_size=100, l1_ttl=60, l2_ttl=60, sync_interval=0, stale_ttl=3600)
+    options.update(kwargs)
+    return TwoTierCache("test", backend, **options)
+
+
+def test_put_and_get_keep_newest_ledger():
+    tlc = make_cache()
+    tlc.put("w", {"a": True}, 10)
+    tlc.put("w", {"a": False}, 9)
+
+    assert tlc.get("w") == ({"a": True}, 10)
+    assert tlc.get("missing") is None
+
+
+def test_invalidation_floor_rejects_older_snapshots():
+    tlc = make_cache()
+    tlc.put("w", {"a": False}, 10)
+    tlc.invalidate("w", 12)
+
+    assert tlc.get("w") is None
+    assert tlc.get_stale("w") is None
+    # A lookup that started before the change validated can't write back
+    tlc.put("w", {"a": False}, 11)
+    assert tlc.get("w") is None
+    assert tlc.stats["stale_rejected"] == 1
+    tlc.put("w", {"a": True}, 12)
+    assert tlc.get("w") == ({"a": True}, 12)
+
+
+def test_invalidation_reaches_other_instances(tmp_path):
+    backend = FileBackend(str(tmp_path))
+    first, second = make_cache(backend), make_cache(backend)
+    second.get("w")  # establishes where the second instance reads the log from
+
+    first.put("w", {"a": False}, 10)
+    assert second.get("w") == ({"a": False}, 10)
+    first.invalidate("w", 11)
+
+    assert second.get("w") is None
+    second.put("w", {"a": False}, 10)
+    assert second.get("w") is None
+    assert second.stats["remote_invalidations"] == 1
+
+
+def test_l2_shared_between_instances(tmp_path):
+    backend = FileBackend(str(tmp_path))
+    make_cache(backend).put("w", {"a": True}, 5)
+
+    other = make_cache(backend)
+    assert other.get("w") == ({"a": True}, 5)
+    assert other.stats["l2_hits"] == 1
+
+
+def test_stale_served_after_expiry(monkeypatch):
+    tlc = make_cache(l1_ttl=1)
+    tlc.put("w", {"a": True}, 7)
+    later = cache.time.monotonic() + 5
+    monkeypatch.setattr(cache.time, "monotonic", lambda: later)
+
+    assert tlc.get("w") is None
+    value, ledger_index, _ = tlc.get_stale("w")
+    assert (value, ledger_index) == ({"a": True}, 7)
+
+
+class CountingClient:
+    """Answers get_trustline_entries from a set of (wallet, issuer address) lines"""
+
+    def __init__(self, lines, ledger_index=100):
+        self.lines = lines
+        self.ledger_index = ledger_index
+        self.calls = 0
+
+    def get_trustline_entries(self, user_address, issuers):
+        self.calls += 1
+        entries = [{} if (user_address, issuer["address"]) in self.lines else None for issuer in issuers]
+        return entries, self.ledger_index
+
+
+ISSUERS = [{"key": "a", "address": "rA", "currency": "AAA"}, {"key": "b", "address": "rB", "currency": "BBB"}]
+
+
+@pytest.fixture
+def trustline_cache(monkeypatch):
+    tlc = make_cache()
+    monkeypatch.setattr(cache, "_trustline_cache", tlc)
+    return tlc
+
+
+def test_existing_trustlines_answered_from_cache(trustline_cache):
+    client = CountingClient({("rWallet1", "rA"), ("rWallet1", "rB")})
+
+    assert get_trustline_state(client, "rWallet1", ISSUERS) == ({"a": True, "b": True}, 100)
+    assert get_trustline_state(client, "rWallet1", ISSUERS) == ({"a": True, "b": True}, 100)
+    assert client.calls == 1
+
+
+def test_missing_trustline_is_always_reread(trustline_cache):
+    client = CountingClient({("rWallet2", "rA")})
+
+    assert get_trustline_state(client, "rWallet2", ISSUERS)[0] == {"a": True, "b": False}
+    # Opting in happens in the wallet: the next check must see it
+    client.lines.add(("rWallet2", "rB"))
+    assert get_trustline_state(client, "rWallet2", ISSUERS)[0] == {"a": True, "b": True}
+    assert client.calls == 2
+    assert cache.get_cached_trustline_state("rWallet2", ISSUERS) is not None
+
+
+def test_missing_trustline_never_served_stale(trustline_cache):
+    client = CountingClient(set())
+    get_trustline_state(client, "rWallet3", ISSUERS)
+
+    assert cache.get_cached_trustline_state("rWallet3", ISSUERS) is None
+    assert cache.get_cached_trustline_state("rWallet3", ISSUERS, stale=True) is None
@@ -0,0 +1,103 @@
+"""Tests for src/catalog.py"""
+import random
+
+import pytest
+
+from src.catalog import SORT_ORDERS, InvalidCursorError, ProductIndex, encode_cursor
+
+
+def make_products(count=137, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"p{i}",
+            "name": f"{rng.choice(['Budget', 'savings', 'Loan', 'allowance'])} guide {rng.randint(0, 50)}",
+            "type": rng.choice(["guide", "course", "tool"]),
+            "price_xrp": str(rng.choice([1, 2.5, 5, 10, 25])),
+        }
+        for i in range(count)
+    ]
+
+
+def expected(products, product_type, min_price, max_price, sort):
+    band = [
+        (i, product) for i, product in enumerate(products)
+        if (product_type is None or product["type"] == product_type)
+        and (min_price is None or float(product["price_xrp"]) >= min_price)
+        and (max_price is None or float(product["price_xrp"]) <= max_price)
+    ]
+    keys = {
+        "catalog": lambda item: item[0],
+        "price": lambda item: (float(item[1]["price_xrp"]), item[0]),
+        "name": lambda item: (item[1]["name"].lower(), item[0]),
+    }
+    ordered = sorted(band, key=keys[sort.lstrip("-")], reverse=sort.startswith("-"))
+    return [product["id"] for _, product in ordered]
+
+
+def page_through(index, limit, **filters):
+    ids, cursor, totals = [], None, set()
+    while True:
+        page = index.query(limit=limit, cursor=cursor, **filters)
+        ids.extend(product["id"] for product in page["products"])
+        totals.add(page["total"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, totals
+
+
+@pytest.mark.parametrize("sort", SORT_ORDERS)
+@pytest.mark.parametrize("product_type,min_price,max_price", [
+    (None, None, None),
+    ("guide", None, None),
+    (None, 2, 10),
+    ("course", 5, None),
+    ("tool", None, 2.5),
+])
+def test_cursors_page_through_every_match_once(sort, product_type, min_price, max_price):
+    products = make_products()
+    index = ProductIndex("issuer", products)
+    want = expected(products, product_type, min_price, max_price, sort)
+
+    ids, totals = page_through(index, 7, product_type=product_type, min_price=min_price,
+                               max_price=max_price, sort=sort)
+    assert ids == want
+    assert totals == {len(want)}
+
+
+def test_empty_band_and_unknown_type():
+    index = ProductIndex("issuer", make_products())
+
+    assert index.query(min_price=1000)["products"] == []
+    assert index.query(product_type="missing") == {"products": [], "total": 0, "next_cursor": None}
+
+
+def test_cursor_rejected_after_catalog_change_or_sort_change():
+    products = make_products()
+    index = ProductIndex("issuer", products)
+    cursor = index.query(limit=5)["next_cursor"]
+
+    with pytest.raises(InvalidCursorError):
+        index.query(limit=5, cursor=cursor, sort="price")
+    changed = ProductIndex("issuer", products + [{"id": "new", "name": "New", "type": "guide", "price_xrp": "1"}])
+    with pytest.raises(InvalidCursorError):
+        changed.query(limit=5, cursor=cursor)
+    with pytest.raises(InvalidCursorError):
+        index.query(cursor="not-a-cursor")
+    with pytest.raises(InvalidCursorError):
+        index.query(cursor=encode_cursor(index.version, "catalog", -1, 0))
+
+
+def test_unknown_sort_rejected():
+    with pytest.raises(ValueError):
+        ProductIndex("issuer", make_products()).query(sort="random")
+
+
+def test_search_prefers_name_matches():
+    products = [
+        {"id": "a", "name": "Savings basics", "description": "", "type": "guide", "price_xrp": "1"},
+        {"id": "b", "name": "Budgeting", "description": "with savings tips", "type": "guide", "price_xrp": "1"},
+    ]
+    results = ProductIndex("issuer", products).search("savings")
+
+    assert [product["id"] for _, product in results] == ["a", "b"]
@@ -0,0 +1,79 @@
+"""Tests for src/consent_timeline.py"""
+from src.consent_timeline import ConsentTimeline
+
+
+ISSUER = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"
+HOLDER = "rPT1Sjq2YGrBMTttX4GZHjKu9dyfzbpAYe"
+
+
+def make_timeline():
+    timeline = ConsentTimeline([{"address": ISSUER, "currency": "GID"}])
+    timeline.add_event(ISSUER, HOLDER, 100, 5, "create")
+    timeline.add_event(ISSUER, HOLDER, 200, 2, "remove")
+    # Out of order: inserted before the removal
+    timeline.add_event(ISSUER, HOLDER, 150, 0, "modify")
+    timeline.add_event(ISSUER, HOLDER, 300, 0, "create")
+    return timeline
+
+
+def test_was_opted_in_at_points_in_history():
+    timeline = make_timeline()
+
+    assert not timeline.was_opted_in(ISSUER, HOLDER, 99)
+    assert not timeline.was_opted_in(ISSUER, HOLDER, 100, tx_index=5)
+    assert timeline.was_opted_in(ISSUER, HOLDER, 100, tx_index=6)
+    assert timeline.was_opted_in(ISSUER, HOLDER, 100)
+    assert timeline.was_opted_in(ISSUER, HOLDER, 200, tx_index=2)
+    assert not timeline.was_opted_in(ISSUER, HOLDER, 200)
+    assert timeline.was_opted_in(ISSUER, HOLDER, 300)
+    assert not timeline.was_opted_in(ISSUER, "rUnknown", 300)
+
+
+def test_history_starting_with_removal_was_opted_in_before():
+    timeline = ConsentTimeline([])
+    timeline.add_event(ISSUER, HOLDER, 100, 0, "remove")
+
+    assert timeline.was_opted_in(ISSUER, HOLDER, 50)
+    assert list(timeline.iter_intervals(ISSUER)) == [{"holder": HOLDER, "start_ledger": None, "end_ledger": 100}]
+
+
+def test_events_and_intervals():
+    timeline = make_timeline()
+
+    assert [event["kind"] for event in timeline.get_events(ISSUER, HOLDER)] == ["create", "modify", "remove", "create"]
+    assert list(timeline.iter_intervals(ISSUER)) == [
+        {"holder": HOLDER, "start_ledger": 100, "end_ledger": 200},
+        {"holder": HOLDER, "start_ledger": 300, "end_ledger": None},
+    ]
+    assert timeline.current_holders(ISSUER) == [HOLDER]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    timeline = make_timeline()
+    timeline.synced_ledger[ISSUER] = 300
+    path = str(tmp_path / "timeline.json")
+    timeline.save(path)
+
+    loaded = ConsentTimeline([])
+    loaded.load(path)
+    assert loaded.synced_ledger == {ISSUER: 300}
+    assert loaded.get_events(ISSUER, HOLDER) == timeline.get_events(ISSUER, HOLDER)
+
+
+def test_ingest_issuer_history_from_ledger(mock_ledger):
+    from src.xrpl_client import XRPLClient
+
+    mock_ledger.fund(ISSUER)
+    mock_ledger.fund(HOLDER)
+    mock_ledger.add_trustline(HOLDER, ISSUER, "GID")
+    mock_ledger.close_ledger()
+    timeline = ConsentTimeline([{"address": ISSUER, "currency": "GID"}])
+    client = XRPLClient()
+
+    assert timeline.ingest_issuer_history(client, ISSUER) == 1
+    assert timeline.current_holders(ISSUER) == [HOLDER]
+
+    mock_ledger.remove_trustline(HOLDER, ISSUER, "GID")
+    mock_ledger.close_ledger()
+    assert timeline.ingest_issuer_history(client, ISSUER) == 1
+    assert timeline.current_holders(ISSUER) == []
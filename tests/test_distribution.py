@@ -0,0 +1,205 @@
+"""Tests for src/distribution.py against the mock ledger"""
+import pytest
+from xrpl.wallet import Wallet
+
+from config import settings
+from src.distribution import (
+    STATUS_DELIVERED,
+    STATUS_FAILED,
+    STATUS_UNKNOWN,
+    DistributionEngine,
+    load_journal,
+)
+from src.mock_ledger import MockLedger
+from src.ripple_state import ripple_state_index
+from src.tx_signing import SigningService, transaction_hash
+from src.xrpl_client import XRPLClient
+
+
+CURRENCY = "GID"
+
+
+class Network:
+    """Mock ledger closing every few milliseconds, with an issuer and funded holders"""
+
+    def __init__(self, holders=5):
+        self.ledger = MockLedger()
+        self.issuer = Wallet.create()
+        self.ledger.fund(self.issuer.classic_address, drops=10 ** 10)
+        self.holders = [Wallet.create().classic_address for _ in range(holders)]
+        for holder in self.holders:
+            self.ledger.fund(holder)
+            self.ledger.add_trustline(holder, self.issuer.classic_address, CURRENCY)
+        # Every submission that reaches the ledger: (destination, tx hash)
+        self.submitted = []
+        # Destinations whose Payments are lost before reaching the ledger
+        self.lost = set()
+        submit = self.ledger.submit
+
+        def counted(params):
+            tx_hash = transaction_hash(params["tx_blob"])
+            destination = _destination(params["tx_blob"])
+            if destination in self.lost:
+                self.lost.discard(destination)
+                return {"engine_result": "telINSUF_FEE_P", "status": "success"}
+            self.submitted.append((destination, tx_hash))
+            return submit(params)
+        self.ledger.submit = counted
+
+    def balance(self, holder):
+        node = self.ledger.ripple_states[ripple_state_index(holder, self.issuer.classic_address, CURRENCY)]
+        value = float(node["Balance"]["value"])
+        return value if node["LowLimit"]["issuer"] == holder else -value
+
+    def sends_to(self, holder):
+        return sum(1 for destination, _ in self.submitted if destination == holder)
+
+    def engine(self, journal, **kwargs):
+        options = dict(chunk_size=2, submit_workers=2, ledger_window=2, poll_interval=0.02)
+        options.update(kwargs)
+        return DistributionEngine(XRPLClient(), {"address": self.issuer.classic_address, "currency": CURRENCY},
+                                  "1", journal, seed=self.issuer.seed,
+                                  signing_service=SigningService(workers=0), **options)
+
+
+def _destination(tx_blob):
+    from xrpl.core.binarycodec import decode
+    return decode(tx_blob)["Destination"]
+
+
+@pytest.fixture
+def network():
+    net = Network()
+    url = net.ledger.start(close_interval=0.05)
+    previous = settings.XRPL_RPC_URL
+    settings.XRPL_RPC_URL = url
+    yield net
+    settings.XRPL_RPC_URL = previous
+    net.ledger.stop()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+def test_every_holder_paid_once(network, journal):
+    stats = network.engine(journal).run()
+
+    assert stats["delivered"] == len(network.holders)
+    assert stats["pending"] == 0
+    assert all(network.balance(holder) == 1 for holder in network.holders)
+    _, records = load_journal(journal)
+    assert {record["status"] for record in records.values()} == {STATUS_DELIVERED}
+
+
+def test_expired_payment_with_unused_sequence_is_resent(network, journal):
+    network.lost.add(network.holders[0])
+    stats = network.engine(journal).run()
+
+    assert stats["expired"] >= 1
+    assert stats["rounds"] == 2
+    assert stats["delivered"] == len(network.holders)
+    assert all(network.balance(holder) == 1 for holder in network.holders)
+    _, records = load_journal(journal)
+    assert records[network.holders[0]]["status"] == STATUS_DELIVERED
+
+
+def test_run_stops_sending_after_an_expiry(network, journal):
+    network.lost.add(network.holders[0])
+    stats = network.engine(journal, chunk_size=1).run()
+
+    # Round one sent the lost Payment and at most the next chunk before noticing
+    first_round = stats["submitted"] - len(network.holders)
+    assert 1 <= first_round <= 2
+    assert stats["expired"] == first_round
+    assert all(network.sends_to(holder) <= 1 for holder in network.holders[2:])
+    assert all(network.balance(holder) == 1 for holder in network.holders)
+
+
+def test_used_sequence_with_failed_lookup_is_unknown_and_never_resent(network, journal):
+    target = network.holders[1]
+    tx = network.ledger.tx
+    hidden = set()
+
+    def lookup(params):
+        if params.get("transaction") in hidden:
+            return network.ledger._error("txnNotFound", params)
+        return tx(params)
+    network.ledger.tx = lookup
+    submit = network.ledger.submit
+
+    def hide_target(params):
+        if _destination(params["tx_blob"]) == target:
+            hidden.add(transaction_hash(params["tx_blob"]))
+        return submit(params)
+    network.ledger.submit = hide_target
+
+    stats = network.engine(journal).run()
+    assert stats["unknown"] == 1
+    _, records = load_journal(journal)
+    assert records[target]["status"] == STATUS_UNKNOWN
+
+    # Still unknown on the next run: looked up again, not resent
+    stats = network.engine(journal).run()
+    assert stats["planned"] == 0
+    assert network.sends_to(target) == 1
+    assert network.balance(target) == 1
+
+    # Once the lookup works the record settles
+    hidden.clear()
+    network.engine(journal).run()
+    _, records = load_journal(journal)
+    assert records[target]["status"] == STATUS_DELIVERED
+    assert network.sends_to(target) == 1
+
+
+def test_rerun_after_crash_never_pays_twice(network, journal, monkeypatch):
+    # The last Payment is journaled as submitted but never reaches the ledger
+    network.lost.add(network.holders[-1])
+    engine = network.engine(journal, chunk_size=len(network.holders))
+
+    def crash(*args):
+        raise RuntimeError("killed")
+    monkeypatch.setattr(engine, "_resolve", crash)
+    with pytest.raises(RuntimeError):
+        engine.run()
+    _, records = load_journal(journal)
+    assert len(records) == len(network.holders)
+
+    stats = network.engine(journal).run()
+    assert stats["recovered"] == len(network.holders)
+    assert stats["skipped"] == len(network.holders) - 1
+    assert stats["planned"] == 1
+    assert all(network.balance(holder) == 1 for holder in network.holders)
+    assert all(network.sends_to(holder) == 1 for holder in network.holders)
+
+
+def test_tec_result_is_not_retried(network, journal):
+    target = network.holders[2]
+    engine = network.engine(journal)
+    plan = engine.plan
+
+    def plan_then_remove_line(addresses=None):
+        planned = plan(addresses)
+        # The line disappears between planning and sending: tecNO_LINE
+        network.ledger.remove_trustline(target, network.issuer.classic_address, CURRENCY)
+        return planned
+    engine.plan = plan_then_remove_line
+
+    stats = engine.run()
+    assert stats["failed"] == 1
+    assert stats["rounds"] == 1
+    assert stats["expired"] == 0
+    assert network.sends_to(target) == 1
+    _, records = load_journal(journal)
+    assert records[target]["status"] == STATUS_FAILED
+    assert records[target]["result"].startswith("tec")
+
+
+def test_dry_run_sends_nothing(network, journal):
+    stats = network.engine(journal, dry_run=True).run()
+
+    assert stats["planned"] == len(network.holders)
+    assert network.submitted == []
+    assert load_journal(journal) == (None, {})
@@ -0,0 +1,162 @@
+"""Tests for src/groups.py"""
+import pytest
+from xrpl.wallet import Wallet
+
+from config.issuers import VERIFIED_ISSUERS
+from src.cache import FileBackend
+from src.consent_timeline import ledger_position
+from src.groups import AccessMatrix, GroupStore, WalletGroup, validate_group_name
+from src.xrpl_client import XRPLClient
+
+
+KEYS = [f"issuer{i}" for i in range(10)]
+
+
+def test_set_packs_bits_and_keeps_newest_position():
+    matrix = AccessMatrix(KEYS)
+    matrix.add_member("rA")
+    matrix.add_member("rB")
+
+    assert matrix.stride == 2
+    assert matrix.set("rB", "issuer9", True, 100)
+    assert matrix.bits == bytearray([0, 0, 0, 0b10])
+    assert matrix.get("rB", "issuer9") and not matrix.get("rA", "issuer9")
+    # An older snapshot never overwrites a newer event
+    assert not matrix.set("rB", "issuer9", False, 99)
+    assert matrix.get("rB", "issuer9")
+    assert matrix.set("rB", "issuer9", False, 101)
+    assert not matrix.get("rB", "issuer9")
+    assert not matrix.set("rUnknown", "issuer0", True, 1)
+
+
+def test_ledger_index_is_newest_cell():
+    matrix = AccessMatrix(KEYS)
+    matrix.add_member("rA")
+    assert matrix.ledger_index() is None
+
+    matrix.set("rA", "issuer0", True, ledger_position(500, 3))
+    matrix.set("rA", "issuer1", True, ledger_position(400, 0))
+    assert matrix.ledger_index() == 500
+
+
+def test_remove_member_moves_last_row():
+    matrix = AccessMatrix(KEYS)
+    for wallet in ("rA", "rB", "rC"):
+        matrix.add_member(wallet)
+    matrix.set("rC", "issuer3", True, 5)
+
+    assert matrix.remove_member("rA")
+    assert not matrix.remove_member("rA")
+    assert matrix.members == ["rC", "rB"]
+    assert matrix.get("rC", "issuer3")
+    assert matrix.opted_in_counts()["issuer3"] == 1
+    assert len(matrix.bits) == 2 * matrix.stride and len(matrix.positions) == 2 * len(KEYS)
+
+
+def test_merge_takes_newer_cells_only():
+    ours, theirs = AccessMatrix(KEYS), AccessMatrix(KEYS)
+    for matrix in (ours, theirs):
+        matrix.add_member("rA")
+    ours.set("rA", "issuer0", True, 10)
+    theirs.set("rA", "issuer0", False, 5)
+    theirs.set("rA", "issuer1", True, 20)
+
+    ours.merge(theirs)
+    assert ours.get("rA", "issuer0") and ours.get("rA", "issuer1")
+
+
+def test_with_columns_and_round_trip():
+    matrix = AccessMatrix(KEYS[:2])
+    matrix.add_member("rA")
+    matrix.set("rA", "issuer1", True, 7)
+
+    wider = matrix.with_columns(["issuer1", "new"])
+    assert wider.get("rA", "issuer1") and not wider.get("rA", "new")
+    loaded = AccessMatrix.from_dict(wider.to_dict())
+    assert loaded.members == ["rA"] and loaded.get("rA", "issuer1")
+
+
+def test_view_follows_synced_ledger():
+    matrix = AccessMatrix(KEYS)
+    matrix.add_member("rA")
+    group = WalletGroup("g", "hash", matrix)
+
+    _, body, etag = group.view(10)
+    assert b'"synced_ledger":10' in body
+    _, body, new_etag = group.view(11)
+    assert b'"synced_ledger":11' in body and new_etag != etag
+
+
+def test_group_names_validated():
+    validate_group_name("family-1.a")
+    for name in ("", "a" * 65, "bad name", None):
+        with pytest.raises(ValueError):
+            validate_group_name(name)
+
+
+@pytest.fixture
+def funded(mock_ledger):
+    issuers = [VERIFIED_ISSUERS[key] for key in VERIFIED_ISSUERS]
+    for issuer in issuers:
+        mock_ledger.fund(issuer["address"])
+    wallets = [Wallet.create().classic_address for _ in range(4)]
+    for wallet in wallets[:3]:
+        mock_ledger.fund(wallet)
+    # wallets[3] stays unfunded
+    mock_ledger.add_trustline(wallets[0], issuers[0]["address"], issuers[0]["currency"])
+    mock_ledger.add_trustline(wallets[1], issuers[1]["address"], issuers[1]["currency"])
+    mock_ledger.close_ledger()
+    return mock_ledger, issuers, wallets
+
+
+def test_store_builds_syncs_and_shares_groups(funded, tmp_path):
+    ledger, issuers, wallets = funded
+    client = XRPLClient()
+    store = GroupStore(FileBackend(str(tmp_path)))
+    token = store.create_group("family", wallets[:2], client)
+    group = store.authorize("family", token)
+
+    assert group.matrix.get(wallets[0], issuers[0]["key"])
+    assert group.matrix.get(wallets[1], issuers[1]["key"])
+    assert not group.matrix.get(wallets[0], issuers[1]["key"])
+    assert store.authorize("family", "wrong") is None
+
+    # Added members are read without touching the existing rows
+    ledger.add_trustline(wallets[2], issuers[0]["address"], issuers[0]["currency"])
+    ledger.close_ledger()
+    assert store.add_members(group, wallets[2:], client) == 2
+    group = store.groups["family"]
+    assert group.matrix.get(wallets[2], issuers[0]["key"])
+    assert not any(group.matrix.get(wallets[3], issuer["key"]) for issuer in issuers)
+    assert group.matrix.get(wallets[0], issuers[0]["key"])
+
+    # Ledger changes arrive through one sync
+    ledger.remove_trustline(wallets[0], issuers[0]["address"], issuers[0]["currency"])
+    ledger.close_ledger()
+    assert store.sync(client) == 1
+    store.flush()
+    assert not store.groups["family"].matrix.get(wallets[0], issuers[0]["key"])
+
+    other = GroupStore(FileBackend(str(tmp_path)))
+    shared = other.authorize("family", token)
+    assert shared is not None
+    assert shared.matrix.members == store.groups["family"].matrix.members
+    assert not shared.matrix.get(wallets[0], issuers[0]["key"])
+
+    assert store.remove_members(group, [wallets[1]]) == 1
+    assert wallets[1] not in store.groups["family"].matrix
+    store.delete_group(store.groups["family"])
+    other.refresh(force=True)
+    assert other.authorize("family", token) is None
+
+
+def test_store_rejects_duplicates_and_oversized_groups(funded):
+    _, _, wallets = funded
+    client = XRPLClient()
+    store = GroupStore(max_members=2)
+    store.create_group("g", wallets[:1], client)
+
+    with pytest.raises(ValueError):
+        store.create_group("g", wallets[:1], client)
+    with pytest.raises(ValueError):
+        store.create_group("h", wallets[:3], client)
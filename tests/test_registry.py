@@ -0,0 +1,93 @@
+"""Tests for config/registry.py"""
+import json
+import os
+
+from config.registry import IssuerMapping, IssuerRegistry
+
+
+def write_registry(directory, issuers, version=1):
+    path = directory / "issuers.json"
+    path.write_text(json.dumps({"version": version, "issuers": issuers}))
+    return str(path)
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+ALPHA = {"name": "Alpha", "address": "rAlpha", "currency": "AAA", "is_required": True}
+BETA = {"name": "Beta", "address": "rBeta", "currency": "BBB"}
+
+
+def test_indexes_by_key_address_and_requirement(tmp_path):
+    registry = IssuerRegistry(write_registry(tmp_path, {"alpha": ALPHA, "beta": BETA}))
+
+    assert registry.get("alpha")["key"] == "alpha"
+    assert registry.get_by_address("rBeta")["key"] == "beta"
+    assert [issuer["key"] for issuer in registry.required()] == ["alpha"]
+    assert [issuer["key"] for issuer in registry.optional()] == ["beta"]
+    assert registry.get("missing") is None
+    assert registry.version == 1
+
+
+def test_file_changes_are_reloaded(tmp_path):
+    path = write_registry(tmp_path, {"alpha": ALPHA})
+    registry = IssuerRegistry(path, reload_interval=0)
+    assert len(registry) == 1
+    generation = registry.generation
+
+    write_registry(tmp_path, {"alpha": ALPHA, "beta": BETA}, version=2)
+    bump_mtime(path)
+    assert registry.get("beta")["address"] == "rBeta"
+    assert registry.version == 2
+    assert registry.generation == generation + 1
+
+
+def test_reload_waits_for_interval(tmp_path):
+    path = write_registry(tmp_path, {"alpha": ALPHA})
+    registry = IssuerRegistry(path, reload_interval=3600)
+    assert len(registry) == 1
+
+    write_registry(tmp_path, {"alpha": ALPHA, "beta": BETA}, version=2)
+    bump_mtime(path)
+    assert registry.get("beta") is None
+    registry.refresh(force=True)
+    assert registry.get("beta") is not None
+
+
+def test_update_issuer_bumps_version(tmp_path):
+    registry = IssuerRegistry(write_registry(tmp_path, {"alpha": ALPHA}), reload_interval=3600)
+
+    registry.update_issuer("alpha", address="rMoved")
+    assert registry.version == 2
+    assert registry.get_by_address("rMoved")["key"] == "alpha"
+    assert registry.get_by_address("rAlpha") is None
+
+
+def test_products_load_lazily_and_reload(tmp_path):
+    registry = IssuerRegistry(write_registry(tmp_path, {"alpha": ALPHA}), reload_interval=0)
+    assert registry.get_products("alpha") == []
+    assert registry.catalog_signature("alpha") is None
+
+    products_dir = tmp_path / "products"
+    products_dir.mkdir()
+    catalog = products_dir / "alpha.json"
+    catalog.write_text(json.dumps([{"id": "p1"}]))
+    assert registry.get_products("alpha") == [{"id": "p1"}]
+    signature = registry.catalog_signature("alpha")
+
+    catalog.write_text(json.dumps([{"id": "p1"}, {"id": "p2"}]))
+    bump_mtime(str(catalog))
+    assert len(registry.get_products("alpha")) == 2
+    assert registry.catalog_signature("alpha") != signature
+    assert registry.get_products("unknown") == []
+
+
+def test_mapping_view(tmp_path):
+    mapping = IssuerMapping(IssuerRegistry(write_registry(tmp_path, {"alpha": ALPHA, "beta": BETA})))
+
+    assert list(mapping) == ["alpha", "beta"]
+    assert "alpha" in mapping and "gamma" not in mapping
+    assert mapping["beta"]["name"] == "Beta"
+    assert mapping.get("gamma", "default") == "default"
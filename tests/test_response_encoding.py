@@ -0,0 +1,78 @@
+"""Tests for src/response_encoding.py and its use by the API handlers"""
+import gzip
+import json
+
+import pytest
+
+from config import settings
+from src import response_encoding
+from src.local_api import call
+from src.response_encoding import PreEncoded, encode_json, negotiate_encoding, parse_fields
+
+
+def test_parse_fields_builds_nested_selector():
+    assert parse_fields(None) is None
+    assert parse_fields(" ") is None
+    assert parse_fields("products.id,products.price_xrp,total") == {
+        "products": {"id": True, "price_xrp": True}, "total": True,
+    }
+    # A whole selection wins over paths below it
+    assert parse_fields("products,products.id") == {"products": True}
+
+
+@pytest.mark.parametrize("value", ["products..id", "a b", ",".join(f"f{i}" for i in range(51))])
+def test_parse_fields_rejects_bad_paths(value):
+    with pytest.raises(ValueError):
+        parse_fields(value)
+
+
+def test_encode_json_selects_fields_through_lists_and_pre_encoded():
+    products = [PreEncoded({"id": "p1", "name": "One", "price_xrp": "1"}),
+                PreEncoded({"id": "p2", "name": "Two", "price_xrp": "2"})]
+    payload = {"products": products, "total": 2, "next_cursor": None}
+
+    assert json.loads(encode_json(payload)) == json.loads(json.dumps(payload))
+    selected = encode_json(payload, parse_fields("products.id,total,missing"))
+    assert json.loads(selected) == {"products": [{"id": "p1"}, {"id": "p2"}], "total": 2}
+    assert encode_json(products[0], parse_fields("name")) == b'{"name":"One"}'
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0", None),
+    ("*", "br" if response_encoding.brotli is not None else "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("identity, *;q=0", None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_handler_applies_fields_selector():
+    status, _, body = call("issuer-info", "GET", "/api/issuer-info/community_aid?fields=name,currency")
+
+    assert status == 200
+    assert set(json.loads(body)) == {"name", "currency"}
+
+
+def test_handler_rejects_malformed_fields():
+    status, _, _ = call("issuer-info", "GET", "/api/issuer-info/community_aid?fields=na%20me")
+
+    assert status == 400
+
+
+def test_handler_compresses_for_accepting_clients(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_BYTES", 1)
+    status, plain_headers, plain = call("issuer-info", "GET", "/api/issuer-info/community_aid")
+    assert status == 200
+    assert "content-encoding" not in plain_headers
+
+    status, headers, body = call("issuer-info", "GET", "/api/issuer-info/community_aid",
+                                 headers={"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in headers["vary"]
+    assert gzip.decompress(body) == plain